@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark cho phần tính toán của /predict-price và /simple-predict-price
+
+Gọi thẳng `compute_predict_price` / `compute_simple_predict_price` (không qua
+HTTP, tắt cache kết quả) với các điểm ngẫu nhiên trong TP.HCM, trên dữ liệu
+giả lập `--rows` dòng. Cần model đã train trong BDS_MODEL_DIR.
+
+    python -m benchmarks.bench_api --rows 100000 --calls 2000
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import latency_summary, metric, time_calls, write_results
+from benchmarks.synthetic_data import write_dataset
+
+
+def random_points(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(10.70, 10.88, n), rng.uniform(106.62, 106.80, n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark predict_price / simple_predict_price")
+    parser.add_argument("--rows", type=int, default=100_000, help="Số dòng dữ liệu giả lập")
+    parser.add_argument("--data", default=None, help="Dùng file CSV có sẵn thay vì sinh dữ liệu")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--no-grid", action="store_true", help="Tắt lưới hồ sơ khu vực")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bds-bench-") as workdir:
+        data_path = args.data or write_dataset(os.path.join(workdir, "data.csv"), args.rows)
+        # Cấu hình phải được đặt trước khi import src.app
+        os.environ.update({
+            "BDS_DATASET_PATH": data_path,
+            "BDS_DATASET_WATCH_INTERVAL": "0",
+            "BDS_MODEL_WATCH_INTERVAL": "0",
+            "BDS_RESULT_CACHE_ENABLED": "0",
+            "BDS_GRID_ENABLED": "0" if args.no_grid else "1",
+            "BDS_GRID_PATH": os.path.join(workdir, "grid.npz"),
+        })
+        from src import app as api
+
+        start = time.perf_counter()
+        snapshot = api.dataset_store.load()
+        load_seconds = time.perf_counter() - start
+        bundle = api.current_bundle()
+
+        latitude, longitude = random_points(args.calls)
+        districts = itertools.cycle(bundle.encoders["district"].classes_.tolist())
+        predict_requests = itertools.cycle([
+            api.PredictRequest(
+                latitude=lat, longitude=lon, area=80, bedrooms=2, bathrooms=2, type="apartment",
+                district=next(districts), year_built=2015, floor=5, total_floors=20, parking=1,
+                facing_direction="South", distance_to_center_km=3.0, distance_to_metro_km=0.8,
+                distance_to_school_km=0.5, distance_to_hospital_km=1.2, distance_to_mall_km=0.9,
+                nearby_avg_price_per_m2=60_000_000, nearby_price_count=15, condition_score=8.0,
+            )
+            for lat, lon in zip(latitude, longitude)
+        ])
+        simple_requests = itertools.cycle([
+            api.SimplePredictRequest(latitude=lat, longitude=lon, bedrooms=int(b), district=next(districts))
+            for lat, lon, b in zip(latitude, longitude, np.resize([1, 2, 3, 4], args.calls))
+        ])
+
+        print(f"⏱️  Dữ liệu {len(snapshot.columns.district_codes):,} dòng, load {load_seconds:.2f}s, {args.calls} lần gọi mỗi endpoint")
+        predict = time_calls(lambda: api.compute_predict_price(next(predict_requests), bundle), args.calls)
+        simple = time_calls(lambda: api.compute_simple_predict_price(next(simple_requests), bundle), args.calls)
+
+        metrics = [metric("dataset.load_seconds", load_seconds, "s")]
+        metrics += latency_summary(predict, "predict_price")
+        metrics += latency_summary(simple, "simple_predict_price")
+        write_results(
+            "api",
+            {"rows": args.rows if args.data is None else None, "data": args.data, "calls": args.calls,
+             "grid": not args.no_grid, "model_version": bundle.version},
+            metrics,
+            args.output,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark crawler với server HTTP local thay cho nhatot.com
+
+Server trả các trang danh sách giả lập (HTML như bench_parse, hoặc JSON
+Next.js nhúng trong trang với --format json), crawler chạy ở chế độ "http"
+nên không cần browserless.
+
+    python -m benchmarks.bench_crawl --pages 200 --concurrency 8
+    python -m benchmarks.bench_crawl --format json --latency-ms 50
+    python -m benchmarks.bench_crawl --rate-limit 20 --pacing adaptive   # server trả 429 khi vượt 20 request/s
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+from collections import deque
+
+import numpy as np
+from aiohttp import web
+
+from benchmarks.bench_parse import listing_page
+from benchmarks.common import latency_summary, metric, write_results
+
+LISTING_PATH = "/mua-ban-bat-dong-san-da-nang"
+
+
+def json_page(items: int, seed: int) -> str:
+    """Trang với dữ liệu tin đăng nhúng trong __NEXT_DATA__ (không có DOM danh sách)"""
+    rng = np.random.default_rng(seed)
+    ads = [
+        {
+            "list_id": 100000 + seed * items + i,
+            "subject": f"Bán nhà {i} tầng, {rng.integers(35, 200)} m2",
+            "price_string": f"{rng.integers(1, 20)},{rng.integers(0, 10)} tỷ",
+            "size": int(rng.integers(35, 200)),
+            "area_name": "Quận Hải Châu",
+            "ward_name": "Phường Thạch Thang",
+            "rooms": int(rng.integers(1, 5)),
+            "toilets": int(rng.integers(1, 4)),
+            "category_name": "Nhà ở",
+            "image": f"//cdn.chotot.com/{i}.jpg",
+            "date": "2 giờ trước",
+        }
+        for i in range(items)
+    ]
+    payload = {"props": {"pageProps": {"initialState": {"adlisting": {"data": {"ads": ads}}}}}}
+    return (
+        "<html><head><title>Nhà Tốt</title></head><body><div id=\"__next\"></div>"
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(payload, ensure_ascii=False)}</script>'
+        "</body></html>"
+    )
+
+
+async def start_server(items: int, page_format: str, latency: float, rate_limit: float = 0.0, stats: dict = None):
+    """Server local; với rate_limit > 0 trả HTTP 429 khi số request trong 1 giây gần nhất vượt rate_limit"""
+    render = json_page if page_format == "json" else listing_page
+    cache = {}
+    stats = stats if stats is not None else {}
+    stats.update(requests=0, blocked=0)
+    recent = deque()
+
+    async def listing(request):
+        stats["requests"] += 1
+        if rate_limit:
+            now = time.monotonic()
+            while recent and now - recent[0] > 1.0:
+                recent.popleft()
+            if len(recent) >= rate_limit:
+                stats["blocked"] += 1
+                return web.Response(status=429, text="Too Many Requests")
+            recent.append(now)
+        page_num = int(request.query.get("page", 1))
+        if page_num not in cache:
+            cache[page_num] = render(items, page_num)
+        if latency:
+            await asyncio.sleep(latency)
+        return web.Response(text=cache[page_num], content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get(LISTING_PATH, listing)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}{LISTING_PATH}"
+
+
+async def run(args):
+    from crawler.index import NhatotRealEstateCrawler
+    from crawler.sinks import MemorySink
+
+    stats = {}
+    runner, base_url = await start_server(args.items, args.format, args.latency_ms / 1000, args.rate_limit, stats)
+    try:
+        crawler = NhatotRealEstateCrawler(
+            max_pages=args.pages, concurrency=args.concurrency, min_interval=args.min_interval,
+            pacing=args.pacing, mode="http", base_url=base_url, sink=MemorySink(),
+        )
+        durations = []
+        fetch = crawler.backends[0].fetch
+
+        async def timed_fetch(url):
+            result = await fetch(url)
+            durations.append(result.seconds)
+            return result
+
+        crawler.backends[0].fetch = timed_fetch
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await crawler.crawl_nhatot_danang()
+        seconds = time.perf_counter() - start
+    finally:
+        await runner.cleanup()
+    return seconds, durations, crawler.items_count, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crawler qua HTTP với server local")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20, help="Số tin mỗi trang")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--format", choices=["html", "json"], default="html")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Độ trễ giả lập của server")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Số request/giây tối đa trước khi server trả 429")
+    parser.add_argument("--pacing", choices=["fixed", "adaptive"], default="fixed")
+    parser.add_argument("--min-interval", type=float, default=0.0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    seconds, durations, items, stats = asyncio.run(run(args))
+    block_rate = stats["blocked"] / max(stats["requests"], 1)
+    print(f"⏱️  {args.pages} trang, {items:,} tin trong {seconds:.2f}s, {block_rate:.1%} request bị chặn")
+    write_results(
+        "crawl",
+        {"pages": args.pages, "items_per_page": args.items, "concurrency": args.concurrency,
+         "format": args.format, "latency_ms": args.latency_ms, "rate_limit": args.rate_limit,
+         "pacing": args.pacing, "min_interval": args.min_interval},
+        latency_summary(durations, "crawl.fetch") + [
+            metric("crawl.seconds_per_page", seconds / args.pages, "s"),
+            metric("crawl.pages_per_second", args.pages / seconds, "pages/s", better="higher"),
+            metric("crawl.items_total", items, "items", better="higher"),
+            metric("crawl.block_rate", block_rate, "ratio"),
+        ],
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+So sánh thời gian load và bộ nhớ giữa CSV và snapshot dạng cột
+
+    python -m benchmarks.bench_dataset --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import metric, write_results
+from benchmarks.synthetic_data import write_dataset
+from src.columnar import convert_csv, read_dataset
+
+
+def timed_load(path: str, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frame = read_dataset(path)
+        best = min(best, time.perf_counter() - start)
+    return best, frame.memory_usage(deep=True).sum() / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark load dữ liệu: CSV và snapshot dạng cột")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Số dòng dữ liệu giả lập")
+    parser.add_argument("--data", default=None, help="Dùng file CSV có sẵn thay vì sinh dữ liệu")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bds-bench-") as workdir:
+        csv_path = args.data or write_dataset(os.path.join(workdir, "data.csv"), args.rows)
+        snapshot_path = os.path.join(workdir, "data.cols")
+        start = time.perf_counter()
+        convert_csv(csv_path, snapshot_path)
+        convert_seconds = time.perf_counter() - start
+
+        csv_seconds, csv_mb = timed_load(csv_path, args.repeat)
+        columnar_seconds, columnar_mb = timed_load(snapshot_path, args.repeat)
+
+    write_results(
+        "dataset",
+        {"rows": args.rows if args.data is None else None, "data": args.data, "repeat": args.repeat},
+        [
+            metric("dataset.convert_seconds", convert_seconds, "s"),
+            metric("dataset.csv.load_seconds", csv_seconds, "s"),
+            metric("dataset.csv.memory_mb", csv_mb, "MB"),
+            metric("dataset.columnar.load_seconds", columnar_seconds, "s"),
+            metric("dataset.columnar.memory_mb", columnar_mb, "MB"),
+            metric("dataset.load_speedup", csv_seconds / columnar_seconds, "x", better="higher"),
+        ],
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+So sánh thời gian dự đoán giữa XGBoost và cây biên dịch (src/tree_compiler.py)
+
+Chạy từ thư mục backend sau khi đã train model:
+    python -m benchmarks.bench_inference --sizes 1 10 100 1000 10000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.config import MODEL_DIR
+from src.model_bundle import load_bundle
+from src.tree_compiler import CompiledForest
+
+
+def sample_features(bundle, n: int, seed: int = 0) -> np.ndarray:
+    """Lấy n dòng feature (đã scale) từ smoke set, thêm nhiễu để các dòng khác nhau"""
+    rng = np.random.default_rng(seed)
+    if bundle.smoke_features is not None:
+        base = bundle.scaler.transform(bundle.smoke_features)
+    else:
+        base = np.zeros((1, len(bundle.feature_columns)))
+    rows = base[rng.integers(0, len(base), n)]
+    return rows + rng.normal(scale=0.05, size=rows.shape)
+
+
+def time_call(fn, features: np.ndarray, min_seconds: float) -> float:
+    """Thời gian trung bình (ms) mỗi lần gọi, chạy ít nhất `min_seconds`"""
+    fn(features)
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(features)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference XGBoost và cây biên dịch")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--version", default=None, help="Version bundle (mặc định LATEST)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    parser.add_argument("--json", dest="json_path", default=None, help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    bundle = load_bundle(args.model_dir, args.version)
+    forest = CompiledForest.from_booster(bundle.model.get_booster())
+    print(f"Bundle {bundle.version}: {forest.n_trees} cây, độ sâu {forest.depth}")
+
+    results = []
+    print(f"{'batch':>8} {'xgboost ms':>12} {'compiled ms':>12} {'speedup':>8} {'max rel diff':>13}")
+    for size in args.sizes:
+        features = sample_features(bundle, size)
+        expected = bundle.model.predict(features)
+        actual = forest.predict(features)
+        max_rel_diff = float(np.max(np.abs(actual - expected) / np.maximum(np.abs(expected), 1e-9)))
+
+        stock_ms = time_call(bundle.model.predict, features, args.min_seconds)
+        compiled_ms = time_call(forest.predict, features, args.min_seconds)
+        results.append({
+            "batch_size": size,
+            "xgboost_ms": stock_ms,
+            "compiled_ms": compiled_ms,
+            "speedup": stock_ms / compiled_ms,
+            "max_rel_diff": max_rel_diff,
+        })
+        print(f"{size:>8} {stock_ms:>12.3f} {compiled_ms:>12.3f} {stock_ms / compiled_ms:>7.2f}x {max_rel_diff:>13.2e}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"model_version": bundle.version, "results": results}, f, indent=2)
+        print(f"Đã ghi kết quả vào {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
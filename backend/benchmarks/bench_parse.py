@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark NhatotRealEstateCrawler.extract_property_data trên HTML cố định
+
+Mặc định dùng các trang danh sách giả lập theo đúng cấu trúc mà parser đang
+chọn (div.list-view ... ListAds_ListAds__ANK2d > ul > div); có thể truyền
+`--fixtures` là thư mục chứa các trang .html đã lưu từ nhatot.com.
+
+    python -m benchmarks.bench_parse --pages 20 --items 20
+    python -m benchmarks.bench_parse --fixtures saved_pages/
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+
+import numpy as np
+
+from benchmarks.common import latency_summary, metric, write_results
+
+TYPES = ["Căn hộ/Chung cư", "Nhà ở", "Đất"]
+DIRECTIONS = ["Hướng Nam", "Hướng Bắc", "Hướng Đông", "Hướng Tây"]
+LOCATIONS = ["Quận 1", "Quận 3", "Quận 7", "Quận Bình Thạnh", "Thành phố Thủ Đức"]
+
+
+def listing_item(rng: np.random.Generator, idx: int) -> str:
+    bedrooms = rng.integers(1, 5)
+    area = rng.integers(35, 200)
+    return f"""
+<div><li itemprop="itemListElement"><a itemprop="item" href="/mua-ban-can-ho/{100000 + idx}.htm">
+  <div><img src="https://cdn.chotot.com/{idx}.jpg" alt="Tin {idx}"></div>
+  <div>
+    <div>Tin ưu tiên</div>
+    <h3>Bán căn hộ {bedrooms} phòng ngủ, {area} m2, sổ hồng chính chủ</h3>
+    <span>{bedrooms} PN • {DIRECTIONS[idx % 4]} • {TYPES[idx % 3]}</span>
+    <div><span>{rng.integers(1, 20)},{rng.integers(0, 10)} tỷ</span><span>{rng.integers(40, 120)} tr/m²</span><span>{area} m²</span></div>
+    <span>{LOCATIONS[idx % 5]} • {rng.integers(1, 24)} giờ trước</span>
+  </div>
+</a></li></div>"""
+
+
+def listing_page(items: int, seed: int) -> str:
+    """Một trang danh sách giả lập với `items` tin đăng"""
+    rng = np.random.default_rng(seed)
+    body = "".join(listing_item(rng, seed * items + i) for i in range(items))
+    return (
+        "<html><head><title>Nhà Tốt</title></head><body>"
+        '<div class="list-view"><div><div class="ListAds_ListAds__ANK2d"><ul>'
+        f"{body}</ul></div></div></div></body></html>"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parser trang danh sách Nhà Tốt")
+    parser.add_argument("--fixtures", default=None, help="Thư mục chứa các trang .html đã lưu")
+    parser.add_argument("--pages", type=int, default=20, help="Số trang giả lập")
+    parser.add_argument("--items", type=int, default=20, help="Số tin mỗi trang giả lập")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lượt parse toàn bộ trang")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from crawler.index import NhatotRealEstateCrawler
+
+    if args.fixtures:
+        paths = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+        if not paths:
+            parser.error(f"Không có file .html trong {args.fixtures}")
+        pages = [open(path, encoding="utf-8").read() for path in paths]
+    else:
+        pages = [listing_page(args.items, seed) for seed in range(args.pages)]
+
+    crawler = NhatotRealEstateCrawler()
+    durations = []
+    items = 0
+    # Parser in rất nhiều log, bỏ đi để chỉ đo phần parse
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        for _ in range(args.repeat):
+            for page_num, html in enumerate(pages, start=1):
+                start = time.perf_counter()
+                items += len(crawler.extract_property_data(html, page_num))
+                durations.append(time.perf_counter() - start)
+                log.seek(0)
+                log.truncate()
+    total = sum(durations)
+
+    print(f"⏱️  {len(pages)} trang x {args.repeat} lượt, {items:,} tin")
+    write_results(
+        "parse",
+        {"fixtures": args.fixtures, "pages": len(pages), "items_per_page": None if args.fixtures else args.items,
+         "repeat": args.repeat},
+        latency_summary(durations, "parse.page") + [
+            metric("parse.items_per_second", items / total, "items/s", better="higher"),
+            metric("parse.items_total", items, "items", better="higher"),
+        ],
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
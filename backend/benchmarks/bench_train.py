@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark train_model.main trên dữ liệu giả lập
+
+Bundle được ghi vào thư mục tạm nên không ảnh hưởng models/ đang dùng.
+
+    python -m benchmarks.bench_train --rows 100000
+    python -m benchmarks.bench_train --rows 2000000 --streaming --chunk-rows 250000
+"""
+import argparse
+import contextlib
+import io
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.common import metric, write_results
+from benchmarks.synthetic_data import write_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark train_model.main")
+    parser.add_argument("--rows", type=int, default=100_000, help="Số dòng dữ liệu giả lập")
+    parser.add_argument("--data", default=None, help="Dùng file CSV có sẵn thay vì sinh dữ liệu")
+    parser.add_argument("--streaming", action="store_true", help="Train out-of-core (train_model --streaming)")
+    parser.add_argument("--chunk-rows", type=int, default=250_000, help="Số dòng mỗi khối khi --streaming")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+    train_args = ["--streaming", "--chunk-rows", str(args.chunk_rows)] if args.streaming else []
+    name = "train_streaming" if args.streaming else "train"
+
+    with tempfile.TemporaryDirectory(prefix="bds-bench-") as workdir:
+        data_path = args.data or write_dataset(os.path.join(workdir, "data.csv"), args.rows)
+        # Cấu hình phải được đặt trước khi import src.train_model
+        os.environ["BDS_DATASET_PATH"] = data_path
+        os.environ["BDS_MODEL_DIR"] = os.path.join(workdir, "models")
+        from src import train_model
+
+        print(f"⏱️  Đang train trên {data_path}...")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            train_model.main(train_args)
+        seconds = time.perf_counter() - start
+        # ru_maxrss tính bằng KB trên Linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        rows = sum(1 for _ in open(data_path, encoding="utf-8")) - 1
+        write_results(
+            name,
+            {"rows": rows, "data": args.data, "chunk_rows": args.chunk_rows if args.streaming else None},
+            [
+                metric(f"{name}.seconds", seconds, "s"),
+                metric(f"{name}.rows_per_second", rows / seconds, "rows/s", better="higher"),
+                metric(f"{name}.peak_rss_mb", peak_rss_mb, "MB"),
+            ],
+            args.output,
+        )
+
+
+if __name__ == "__main__":
+    main()
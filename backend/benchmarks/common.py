@@ -0,0 +1,84 @@
+"""Tiện ích dùng chung cho các benchmark: đo thời gian, phân vị, ghi kết quả JSON
+
+Mỗi benchmark ghi một file JSON dạng:
+    {
+      "benchmark": "api",
+      "commit": "<git sha>", "timestamp": "...", "python": "...", "machine": "...",
+      "params": {...},
+      "metrics": [{"name": "...", "value": 1.23, "unit": "ms", "better": "lower"}, ...]
+    }
+để `python -m benchmarks.compare` so sánh giữa các commit.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def latency_summary(seconds, prefix: str) -> List[dict]:
+    """Các chỉ số độ trễ (ms) p50/p95/p99/mean từ danh sách thời gian (giây)"""
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    return [
+        metric(f"{prefix}.p50_ms", float(np.percentile(ms, 50)), "ms"),
+        metric(f"{prefix}.p95_ms", float(np.percentile(ms, 95)), "ms"),
+        metric(f"{prefix}.p99_ms", float(np.percentile(ms, 99)), "ms"),
+        metric(f"{prefix}.mean_ms", float(ms.mean()), "ms"),
+    ]
+
+
+def metric(name: str, value: float, unit: str, better: str = "lower") -> dict:
+    return {"name": name, "value": value, "unit": unit, "better": better}
+
+
+def time_calls(fn: Callable[[], object], n: int, warmup: int = 5) -> List[float]:
+    """Gọi `fn` n lần (sau `warmup` lần khởi động), trả về thời gian từng lần (giây)"""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def write_results(benchmark: str, params: Dict, metrics: List[dict], output: Optional[str] = None) -> str:
+    """Ghi kết quả ra `output` (mặc định benchmarks/results/<commit>/<benchmark>.json)"""
+    commit = git_commit()
+    if output is None:
+        output = os.path.join(RESULTS_DIR, commit, f"{benchmark}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    result = {
+        "benchmark": benchmark,
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": f"{platform.machine()} {os.cpu_count()} CPU",
+        "params": params,
+        "metrics": metrics,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    width = max(len(m["name"]) for m in metrics) if metrics else 0
+    for m in metrics:
+        print(f"  {m['name']:<{width}}  {m['value']:>14.3f} {m['unit']}")
+    print(f"📄 Đã ghi kết quả vào {output}")
+    return output
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+So sánh kết quả benchmark giữa hai commit
+
+Nhận hai file JSON hoặc hai thư mục benchmarks/results/<commit>/ (so từng file
+cùng tên). Metric xấu đi quá `--threshold` (theo chiều "better" của metric) bị
+đánh dấu hồi quy và lệnh trả về mã lỗi 1, dùng được trong CI.
+
+    python -m benchmarks.compare benchmarks/results/abc123 benchmarks/results/def456
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List, Tuple
+
+
+def load_results(path: str) -> dict:
+    """benchmark -> {metric -> dict} từ một file JSON hoặc một thư mục kết quả"""
+    paths = (
+        [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".json")]
+        if os.path.isdir(path) else [path]
+    )
+    results = {}
+    for file_path in paths:
+        with open(file_path, encoding="utf-8") as f:
+            data = json.load(f)
+        results[data["benchmark"]] = {m["name"]: m for m in data["metrics"]}
+    return results
+
+
+def compare(base: dict, head: dict, threshold: float) -> Tuple[List[tuple], int]:
+    """Các dòng (benchmark, metric, cũ, mới, % thay đổi, trạng thái) và số hồi quy"""
+    rows = []
+    regressions = 0
+    for benchmark in sorted(set(base) & set(head)):
+        for name, old in base[benchmark].items():
+            new = head[benchmark].get(name)
+            if new is None or not old["value"]:
+                continue
+            change = (new["value"] - old["value"]) / abs(old["value"])
+            worse = change if old.get("better", "lower") == "lower" else -change
+            if worse > threshold:
+                status = "REGRESSION"
+                regressions += 1
+            elif worse < -threshold:
+                status = "improved"
+            else:
+                status = ""
+            rows.append((benchmark, name, old["value"], new["value"], change * 100, old["unit"], status))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh kết quả benchmark giữa hai commit")
+    parser.add_argument("base", help="File JSON hoặc thư mục kết quả gốc")
+    parser.add_argument("head", help="File JSON hoặc thư mục kết quả mới")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Ngưỡng hồi quy (mặc định 10%%)")
+    args = parser.parse_args()
+
+    rows, regressions = compare(load_results(args.base), load_results(args.head), args.threshold)
+    if not rows:
+        print("⚠️ Không có metric chung để so sánh")
+        return 0
+
+    width = max(len(f"{b}/{n}") for b, n, *_ in rows)
+    for benchmark, name, old, new, change, unit, status in rows:
+        print(f"  {benchmark + '/' + name:<{width}}  {old:>12.3f} -> {new:>12.3f} {unit:<7} {change:+7.1f}%  {status}")
+    if regressions:
+        print(f"❌ {regressions} metric hồi quy quá {args.threshold:.0%}")
+        return 1
+    print("✅ Không có hồi quy")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Load test HTTP chạy trong cùng tiến trình
+
+Khởi động uvicorn với `src.app:app` ở một thread nền, sau đó `--concurrency`
+client aiohttp gửi request liên tục trong `--duration` giây. Báo cáo p50/p95/p99,
+throughput và số request theo mã trạng thái. Client và server dùng chung GIL
+nên con số là cận dưới; để đo nhiều worker hãy chạy `src.serve` riêng và
+truyền `--url`.
+
+    python -m benchmarks.load_test --endpoint simple --concurrency 32 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+from benchmarks.common import latency_summary, metric, write_results
+
+ENDPOINTS = ("simple", "predict", "districts")
+
+
+def make_request(endpoint: str, rng: random.Random):
+    """(method, path, json) cho một request ngẫu nhiên trong TP.HCM"""
+    latitude = round(rng.uniform(10.70, 10.88), 6)
+    longitude = round(rng.uniform(106.62, 106.80), 6)
+    district = rng.choice(["Quan 1", "Quan 3", "Quan 7", "Quan Binh Thanh", "Thu Duc"])
+    if endpoint == "simple":
+        return "POST", "/simple-predict-price", {
+            "latitude": latitude, "longitude": longitude, "bedrooms": rng.randint(1, 4), "district": district,
+        }
+    if endpoint == "predict":
+        return "POST", "/predict-price", {
+            "latitude": latitude, "longitude": longitude, "area": rng.randint(40, 150), "bedrooms": 2,
+            "bathrooms": 2, "type": "apartment", "district": district, "year_built": 2015, "floor": 5,
+            "total_floors": 20, "parking": 1, "facing_direction": "South", "distance_to_center_km": 3.0,
+            "distance_to_metro_km": 0.8, "distance_to_school_km": 0.5, "distance_to_hospital_km": 1.2,
+            "distance_to_mall_km": 0.9, "nearby_avg_price_per_m2": 60_000_000, "nearby_price_count": 15,
+            "condition_score": 8.0,
+        }
+    return "GET", "/districts", None
+
+
+def start_server(host: str, port: int):
+    """Chạy uvicorn ở thread nền, chờ tới khi server sẵn sàng"""
+    import uvicorn
+
+    from src.app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", ws="none"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Không khởi động được uvicorn")
+        time.sleep(0.05)
+    return server, thread
+
+
+async def run_load(url: str, endpoint: str, concurrency: int, duration: float, seed: int):
+    import aiohttp
+
+    latencies = []
+    statuses = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def client(session, worker_id):
+        rng = random.Random(seed + worker_id)
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(endpoint, rng)
+            start = time.perf_counter()
+            try:
+                async with session.request(method, url + path, json=body) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+            except aiohttp.ClientError:
+                statuses["error"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(session, i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test HTTP cho API dự đoán giá")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="simple")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Số giây gửi request")
+    parser.add_argument("--url", default=None, help="Đo server có sẵn thay vì chạy trong tiến trình")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache", action="store_true", help="Giữ cache kết quả (mặc định tắt)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        if not args.cache:
+            os.environ["BDS_RESULT_CACHE_ENABLED"] = "0"
+        server, thread = start_server("127.0.0.1", args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    print(f"🚀 {args.concurrency} client -> {url} ({args.endpoint}) trong {args.duration:.0f}s")
+    try:
+        latencies, statuses, elapsed = asyncio.run(
+            run_load(url.rstrip("/"), args.endpoint, args.concurrency, args.duration, args.seed)
+        )
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    total = sum(statuses.values())
+    ok = statuses.get(200, 0)
+    print("📊 Mã trạng thái: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items(), key=str)))
+    write_results(
+        "load",
+        {"endpoint": args.endpoint, "concurrency": args.concurrency, "duration": args.duration,
+         "in_process": args.url is None, "cache": args.cache or args.url is not None,
+         "statuses": {str(status): count for status, count in statuses.items()}},
+        latency_summary(latencies, f"load.{args.endpoint}") + [
+            metric(f"load.{args.endpoint}.throughput_rps", total / elapsed, "req/s", better="higher"),
+            metric(f"load.{args.endpoint}.error_rate", (total - ok) / total if total else 0.0, "ratio"),
+        ],
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Sinh dữ liệu bất động sản giả lập có phân bố giống TP.HCM
+
+Cùng schema với real_estate_data.csv: mỗi quận có tâm, bán kính và giá/m2
+nền riêng; tọa độ rải quanh tâm quận, giá phụ thuộc quận, loại nhà, diện
+tích, tuổi nhà và khoảng cách tới trung tâm. Dữ liệu được sinh và ghi theo
+từng khối nên có thể tạo tới hàng chục triệu dòng mà không cần nhiều RAM.
+
+    python -m benchmarks.synthetic_data --rows 1000000 --output bench_data.csv
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.spatial_index import haversine_km
+
+# Quận: (vĩ độ tâm, kinh độ tâm, bán kính (độ), giá/m2 nền, tỷ trọng số tin)
+DISTRICTS = {
+    "Quan 1": (10.7769, 106.7009, 0.010, 95e6, 0.06),
+    "Quan 3": (10.7843, 106.6844, 0.010, 80e6, 0.07),
+    "Quan 4": (10.7578, 106.7013, 0.008, 55e6, 0.06),
+    "Quan 5": (10.7540, 106.6634, 0.010, 60e6, 0.08),
+    "Quan 10": (10.7746, 106.6679, 0.010, 65e6, 0.08),
+    "Quan 2": (10.7872, 106.7498, 0.020, 70e6, 0.12),
+    "Quan 7": (10.7340, 106.7218, 0.020, 60e6, 0.14),
+    "Quan Binh Thanh": (10.8106, 106.7091, 0.015, 62e6, 0.13),
+    "Quan Phu Nhuan": (10.7992, 106.6802, 0.010, 70e6, 0.08),
+    "Thu Duc": (10.8494, 106.7537, 0.035, 45e6, 0.18),
+}
+CENTER = (10.7769, 106.7009)
+TYPES = np.array(["apartment", "house", "villa"])
+TYPE_WEIGHTS = np.array([0.6, 0.32, 0.08])
+TYPE_PRICE_FACTOR = np.array([1.0, 1.15, 1.4])
+FACINGS = np.array(["North", "South", "East", "West"])
+
+COLUMNS = [
+    "latitude", "longitude", "price", "area", "bedrooms", "bathrooms", "type", "district", "ward",
+    "year_built", "floor", "total_floors", "parking", "facing_direction",
+    "distance_to_center_km", "distance_to_metro_km", "distance_to_school_km",
+    "distance_to_hospital_km", "distance_to_mall_km",
+    "nearby_avg_price_per_m2", "nearby_price_count", "condition_score",
+]
+
+
+def generate_chunk(n: int, seed: int) -> pd.DataFrame:
+    """Sinh n dòng dữ liệu (cố định theo seed)"""
+    rng = np.random.default_rng(seed)
+    names = np.array(list(DISTRICTS))
+    params = np.array([DISTRICTS[name][:4] for name in names])
+    weights = np.array([DISTRICTS[name][4] for name in names])
+    district_idx = rng.choice(len(names), size=n, p=weights / weights.sum())
+    center_lat, center_lon, radius, base_price = params[district_idx].T
+
+    latitude = center_lat + rng.normal(scale=radius, size=n)
+    longitude = center_lon + rng.normal(scale=radius, size=n)
+
+    type_idx = rng.choice(len(TYPES), size=n, p=TYPE_WEIGHTS)
+    is_apartment = type_idx == 0
+    area = np.where(
+        is_apartment,
+        rng.lognormal(np.log(70), 0.3, size=n),
+        rng.lognormal(np.log(110), 0.4, size=n),
+    ).clip(25, 600).round(1)
+    bedrooms = np.clip(np.rint(area / 35 + rng.normal(scale=0.6, size=n)), 1, 8).astype(int)
+    bathrooms = np.clip(bedrooms - rng.integers(0, 2, size=n), 1, None)
+    year_built = rng.integers(1995, 2025, size=n)
+    total_floors = np.where(is_apartment, rng.integers(5, 41, size=n), rng.integers(1, 6, size=n))
+    floor = np.where(is_apartment, rng.integers(1, total_floors + 1), 1)
+    parking = (rng.random(n) < np.where(is_apartment, 0.6, 0.8)).astype(int)
+    facing = FACINGS[rng.integers(0, len(FACINGS), size=n)]
+
+    distance_to_center = haversine_km(latitude, longitude, CENTER[0], CENTER[1])
+    distance_to_metro = (rng.exponential(1.5, size=n) + 0.1).round(2)
+    distance_to_school = (rng.exponential(0.5, size=n) + 0.1).round(2)
+    distance_to_hospital = (rng.exponential(1.2, size=n) + 0.1).round(2)
+    distance_to_mall = (rng.exponential(1.0, size=n) + 0.1).round(2)
+    condition_score = np.clip(rng.normal(8.0, 0.9, size=n), 5.0, 10.0).round(1)
+
+    nearby_avg_price = (base_price * rng.normal(1.0, 0.08, size=n)).round(-5)
+    nearby_price_count = rng.poisson(15, size=n)
+    price_per_m2 = (
+        base_price
+        * TYPE_PRICE_FACTOR[type_idx]
+        * np.exp(-distance_to_center / 40)
+        * (1 - (2024 - year_built) * 0.006)
+        * (0.85 + condition_score / 50)
+        * rng.lognormal(0, 0.12, size=n)
+    )
+    price = (price_per_m2 * area).round(-6)
+
+    return pd.DataFrame({
+        "latitude": latitude.round(6),
+        "longitude": longitude.round(6),
+        "price": price.astype(np.int64),
+        "area": area,
+        "bedrooms": bedrooms,
+        "bathrooms": bathrooms,
+        "type": TYPES[type_idx],
+        "district": names[district_idx],
+        "ward": np.char.add("Phuong ", rng.integers(1, 21, size=n).astype(str)),
+        "year_built": year_built,
+        "floor": floor,
+        "total_floors": total_floors,
+        "parking": parking,
+        "facing_direction": facing,
+        "distance_to_center_km": distance_to_center.round(2),
+        "distance_to_metro_km": distance_to_metro,
+        "distance_to_school_km": distance_to_school,
+        "distance_to_hospital_km": distance_to_hospital,
+        "distance_to_mall_km": distance_to_mall,
+        "nearby_avg_price_per_m2": nearby_avg_price.astype(np.int64),
+        "nearby_price_count": nearby_price_count,
+        "condition_score": condition_score,
+    }, columns=COLUMNS)
+
+
+def write_dataset(path: str, rows: int, seed: int = 42, chunk_size: int = 500_000) -> str:
+    """Ghi `rows` dòng dữ liệu giả lập ra file CSV theo từng khối"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        for i, start in enumerate(range(0, rows, chunk_size)):
+            chunk = generate_chunk(min(chunk_size, rows - start), seed + i)
+            chunk.to_csv(f, header=(i == 0), index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu bất động sản giả lập (schema real_estate_data.csv)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Số dòng (10k - 10M)")
+    parser.add_argument("--output", default="bench_data.csv")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_dataset(args.output, args.rows, args.seed)
+    size_mb = os.path.getsize(args.output) / 1e6
+    print(f"✅ Đã sinh {args.rows:,} dòng ({size_mb:.1f} MB) vào {args.output} trong {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
 """
 Nhatot Real Estate Crawler Package
 
-Crawler dữ liệu bất động sản từ nhatot.com sử dụng browserless
+Crawler dữ liệu bất động sản từ nhatot.com qua HTTP, fallback browserless
 """
 
+from .backends import BrowserBackend, HttpBackend
 from .index import NhatotRealEstateCrawler, main, async_main
+from .sinks import ColumnarSink, CsvSink, JsonlSink, MemorySink, open_sink
+from .state import CrawlState
 
 __version__ = "1.0.0"
 __author__ = "Nhatot Crawler Team"
 
-__all__ = ["NhatotRealEstateCrawler", "main", "async_main"] 
\ No newline at end of file
+__all__ = ["NhatotRealEstateCrawler", "HttpBackend", "BrowserBackend",
+           "CsvSink", "JsonlSink", "ColumnarSink", "MemorySink", "open_sink",
+           "CrawlState", "main", "async_main"] 
\ No newline at end of file
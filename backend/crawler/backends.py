@@ -0,0 +1,207 @@
+"""
+Các backend tải trang danh sách cho crawler
+
+Mỗi backend có cùng giao diện `start()` / `fetch(url)` / `close()`:
+
+- HttpBackend: tải HTML bằng một aiohttp session dùng chung (keep-alive,
+  nén gzip/deflate, giới hạn số kết nối). Trang danh sách của nhatot.com được
+  render phía server nên phần lớn các trang không cần trình duyệt.
+- BrowserBackend: tải qua headless Chrome của browserless (pyppeteer), với
+  một pool tab; chỉ dùng cho các trang cần chạy JavaScript.
+
+Crawler thử lần lượt các backend, trang nào backend trước không trả về dữ
+liệu tin đăng thì mới chuyển sang backend sau.
+"""
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import aiohttp
+from pyppeteer import connect
+from pyppeteer.errors import TimeoutError as PageTimeoutError
+
+USER_AGENT = (
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+)
+HEADERS = {
+    'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.8',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+}
+# Site đang giới hạn/chặn crawler
+BLOCK_STATUSES = (403, 429)
+CAPTCHA_PATTERN = re.compile(r'captcha|cf-challenge|challenge-form|Just a moment\.\.\.', re.IGNORECASE)
+# Trình duyệt chờ tới khi có tin đăng trong danh sách (hoặc trang captcha) thay vì chờ mạng rảnh
+WAIT_SELECTOR = 'div.ListAds_ListAds__ANK2d ul > div, iframe[src*="captcha"], #challenge-form'
+
+
+@dataclass
+class FetchResult:
+    url: str
+    html: str
+    status: int
+    seconds: float
+    backend: str
+
+
+def looks_like_captcha(html: str) -> bool:
+    """Trang captcha/challenge thay cho trang danh sách (chỉ xét khi trang không có tin đăng)"""
+    return bool(CAPTCHA_PATTERN.search(html))
+
+
+async def wait_for_listings(page, timeout: float) -> bool:
+    """Chờ danh sách tin đăng xuất hiện; False nếu hết timeout (vd. trang cuối không có tin)"""
+    try:
+        await page.waitForSelector(WAIT_SELECTOR, {'timeout': int(timeout * 1000)})
+        return True
+    except PageTimeoutError:
+        return False
+
+
+async def prepare_tab(page):
+    """Đặt user agent và headers của crawler cho một tab"""
+    # Set user agent để tránh bị phát hiện bot
+    await page.setUserAgent(USER_AGENT)
+    await page.setExtraHTTPHeaders(HEADERS)
+    return page
+
+
+class HttpBackend:
+    name = "http"
+
+    def __init__(self, concurrency: int = 8, timeout: float = 20.0):
+        """
+        Args:
+            concurrency: Số kết nối HTTP tối đa
+            timeout: Timeout (giây) của một request
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={**HEADERS, 'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'},
+            )
+        return True
+
+    async def fetch(self, url: str) -> FetchResult:
+        await self.start()
+        start = time.perf_counter()
+        async with self.session.get(url) as response:
+            html = await response.text()
+            return FetchResult(url, html, response.status, time.perf_counter() - start, self.name)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class BrowserBackend:
+    name = "browser"
+
+    def __init__(
+        self,
+        browserless_url: str = "ws://localhost:3000",
+        tabs: int = 1,
+        timeout: float = 30.0,
+        wait_timeout: float = 10.0,
+    ):
+        """
+        Args:
+            browserless_url: URL của browserless service
+            tabs: Số tab mở sẵn (số trang tải đồng thời qua trình duyệt)
+            timeout: Timeout (giây) khi tải một trang
+            wait_timeout: Thời gian (giây) chờ danh sách tin đăng render sau khi có DOM
+        """
+        self.browserless_url = browserless_url
+        self.tabs = tabs
+        self.timeout = timeout
+        self.wait_timeout = wait_timeout
+        self.browser = None
+        self._pages = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        """Kết nối browserless và mở pool tab (chỉ lần gọi đầu tiên)"""
+        async with self._start_lock:
+            if self._idle is not None:
+                return True
+            print("🔗 Đang kết nối đến browserless service...")
+            self.browser = await connect(
+                browserWSEndpoint=self.browserless_url,
+                defaultViewport={'width': 1920, 'height': 1080}
+            )
+            idle = asyncio.Queue()
+            for _ in range(self.tabs):
+                try:
+                    page = await prepare_tab(await self.browser.newPage())
+                except Exception as e:
+                    # Vẫn crawl được với số tab đã mở
+                    if not self._pages:
+                        raise
+                    print(f"⚠️ Lỗi mở thêm tab: {e}")
+                    break
+                self._pages.append(page)
+                idle.put_nowait(page)
+            self._idle = idle
+            print(f"✅ Đã kết nối browserless, mở {len(self._pages)} tab")
+            return True
+
+    async def fetch(self, url: str) -> FetchResult:
+        await self.start()
+        page = await self._idle.get()
+        try:
+            start = time.perf_counter()
+            response = await page.goto(url, {
+                'waitUntil': 'domcontentloaded',
+                'timeout': int(self.timeout * 1000)
+            })
+            await wait_for_listings(page, self.wait_timeout)
+            html = await page.content()
+            status = response.status if response is not None else 200
+            return FetchResult(url, html, status, time.perf_counter() - start, self.name)
+        finally:
+            self._idle.put_nowait(page)
+
+    async def close(self):
+        for page in self._pages:
+            try:
+                if not page.isClosed():
+                    await page.close()
+            except Exception as e:
+                print(f"⚠️ Lỗi đóng page: {e}")
+        self._pages = []
+        self._idle = None
+        if self.browser is not None:
+            try:
+                await self.browser.disconnect()
+                print("🔐 Đã đóng kết nối browser")
+            except Exception as e:
+                print(f"⚠️ Lỗi đóng browser: {e}")
+            self.browser = None
+
+
+def default_backends(mode: str, browserless_url: str, concurrency: int):
+    """
+    Chuỗi backend theo chế độ crawl.
+
+    Args:
+        mode: "auto" (HTTP, trang nào cần JavaScript thì dùng trình duyệt), "http" hoặc "browser"
+    """
+    if mode == "http":
+        return [HttpBackend(concurrency)]
+    if mode == "browser":
+        return [BrowserBackend(browserless_url, concurrency)]
+    if mode == "auto":
+        return [HttpBackend(concurrency), BrowserBackend(browserless_url, concurrency)]
+    raise ValueError(f"Chế độ crawl không hợp lệ: {mode}")
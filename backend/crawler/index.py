@@ -1,96 +1,83 @@
 import asyncio
-import csv
+import json
 import time
 from datetime import datetime
-from typing import List, Dict, Any
-from pyppeteer import connect
+from typing import List, Dict, Any, Optional
 from bs4 import BeautifulSoup
 import re
 
+from .backends import BLOCK_STATUSES, default_backends, looks_like_captcha
+from .pacing import AdaptivePacer, PolitenessBudget
+from .sinks import Sink, open_sink
+from .state import CrawlState
+
+BASE_URL = "https://www.nhatot.com/mua-ban-bat-dong-san-da-nang"
+# Dữ liệu trang do Next.js nhúng sẵn trong HTML
+NEXT_DATA_PATTERN = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL
+)
+
 
 class NhatotRealEstateCrawler:
-    def __init__(self, browserless_url: str = "ws://localhost:3000", max_pages: int = 5):
+    def __init__(
+        self,
+        browserless_url: str = "ws://localhost:3000",
+        max_pages: int = 5,
+        concurrency: int = 1,
+        min_interval: float = 0.5,
+        budget: Optional[PolitenessBudget] = None,
+        pacing: str = "adaptive",
+        block_retries: int = 2,
+        mode: str = "auto",
+        base_url: str = BASE_URL,
+        backends: Optional[list] = None,
+        sink: Optional[Sink] = None,
+        state: Optional[CrawlState] = None,
+        restart: bool = False,
+    ):
         """
         Khởi tạo crawler với browserless service
         
         Args:
             browserless_url: URL của browserless service (mặc định localhost:3000)
             max_pages: Số trang tối đa để crawl (mặc định 5)
+            concurrency: Số trang crawl song song (số kết nối HTTP / số tab trình duyệt)
+            min_interval: Khoảng cách tối thiểu (giây) giữa hai lần tải trang, tính chung mọi trang
+            budget: Budget dùng chung với crawler khác (mặc định tạo mới theo `pacing`)
+            pacing: "adaptive" (AdaptivePacer: tự tăng/giảm tốc độ, không nhanh hơn min_interval)
+                hoặc "fixed" (PolitenessBudget: luôn cách nhau min_interval)
+            block_retries: Số lần tải lại một trang bị chặn (429/403/captcha) trước khi bỏ qua
+            mode: "auto" (HTTP, fallback trình duyệt), "http" hoặc "browser"
+            base_url: URL trang danh sách (đổi được để test với server local)
+            backends: Chuỗi backend tự chọn thay cho `mode` (xem crawler/backends.py)
+            sink: Nơi ghi kết quả theo từng trang (mặc định file CSV theo thời gian, xem crawler/sinks.py)
+            state: Trạng thái crawl giữa các lần chạy (resume, chỉ ghi tin mới/đổi, xem crawler/state.py)
+            restart: Bỏ lần crawl chưa xong trong state, bắt đầu lại từ trang 1
         """
         self.browserless_url = browserless_url
         self.max_pages = max_pages
-        self.browser = None
-        self.page = None
-        self.scraped_data = []
+        self.concurrency = max(1, concurrency)
+        if budget is None:
+            if pacing == "adaptive":
+                budget = AdaptivePacer(self.concurrency, min_interval=min_interval)
+            elif pacing == "fixed":
+                budget = PolitenessBudget(self.concurrency, min_interval)
+            else:
+                raise ValueError(f"Chế độ pacing không hợp lệ: {pacing}")
+        self.budget = budget
+        self.block_retries = block_retries
+        self.base_url = base_url
+        self.backends = backends or default_backends(mode, browserless_url, self.concurrency)
+        self.sink = sink
+        self.state = state
+        self.restart = restart
+        self.items_count = 0
+        self.new_count = 0
+        self.updated_count = 0
+        # Các trang lỗi (không crawl được) của lần crawl gần nhất
+        self.failed_pages: List[int] = []
+        self._stop_page: Optional[int] = None
         
-    async def connect_browser(self):
-        """Kết nối đến browserless service bằng pyppeteer"""
-        try:
-            print("🔗 Đang kết nối đến browserless service...")
-            self.browser = await connect(
-                browserWSEndpoint=self.browserless_url,
-                defaultViewport={'width': 1920, 'height': 1080}
-            )
-            print("✅ Đã kết nối thành công!")
-            return True
-        except Exception as e:
-            print(f"❌ Lỗi kết nối: {e}")
-            return False
-    
-    async def create_page(self):
-        """Tạo page mới"""
-        try:
-            self.page = await self.browser.newPage()
-            
-            # Set user agent để tránh bị phát hiện bot
-            await self.page.setUserAgent(
-                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-            )
-            
-            # Set extra headers
-            await self.page.setExtraHTTPHeaders({
-                'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.8',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-            })
-            
-            print("✅ Đã tạo page thành công!")
-            return True
-        except Exception as e:
-            print(f"❌ Lỗi tạo page: {e}")
-            return False
-    
-    async def navigate_to_page(self, url: str, page_num: int = 1):
-        """Navigate đến trang web với page number"""
-        try:
-            if page_num > 1:
-                url = f"{url}?page={page_num}"
-            
-            print(f"🌐 Đang truy cập trang {page_num}: {url}")
-            
-            # Navigate với timeout
-            await self.page.goto(url, {
-                'waitUntil': 'networkidle2',
-                'timeout': 30000
-            })
-            
-            # Chờ thêm một chút để trang load hoàn toàn
-            await asyncio.sleep(2)
-            
-            print(f"✅ Đã tải trang {page_num} thành công!")
-            return True
-        except Exception as e:
-            print(f"❌ Lỗi tải trang {page_num}: {e}")
-            return False
-    
-    async def get_page_content(self) -> str:
-        """Lấy HTML content của trang"""
-        try:
-            content = await self.page.content()
-            return content
-        except Exception as e:
-            print(f"❌ Lỗi lấy content: {e}")
-            return ""
-    
     def extract_property_data(self, html_content: str, page_num: int) -> List[Dict[str, Any]]:
         """
         Extract dữ liệu bất động sản từ HTML
@@ -106,6 +93,7 @@ class NhatotRealEstateCrawler:
         
         soup = BeautifulSoup(html_content, 'lxml')
         properties = []
+        property_items = []
         
         # Tìm container chính theo cấu trúc: div.list-view>div>div.ListAds_ListAds__ANK2d>ul>div
         main_container = soup.select_one('div.list-view div div.ListAds_ListAds__ANK2d ul')
@@ -251,96 +239,281 @@ class NhatotRealEstateCrawler:
         
         return property_data
     
-    def save_to_csv(self, filename: str = None):
-        """Lưu dữ liệu vào file CSV"""
-        if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"../real_estate_data_{timestamp}.csv"
-        
-        if not self.scraped_data:
-            print("⚠️ Không có dữ liệu để lưu")
-            return
-        
-        print(f"💾 Đang lưu {len(self.scraped_data)} bất động sản vào {filename}...")
-        
-        fieldnames = [
-            'title', 'price', 'area', 'location', 'description', 
-            'url', 'image_url', 'posted_date', 'property_type',
-            'bedrooms', 'bathrooms', 'page_number', 'item_index', 'scraped_at'
-        ]
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(self.scraped_data)
-        
-        print(f"✅ Đã lưu thành công vào {filename}")
-    
-    async def crawl_nhatot_danang(self):
-        """Crawl dữ liệu bất động sản Đà Nẵng từ nhatot.com theo pages"""
-        base_url = "https://www.nhatot.com/mua-ban-bat-dong-san-da-nang"
-        
+    def extract_embedded_listings(self, html_content: str, page_num: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Extract tin đăng từ JSON Next.js nhúng trong trang (`__NEXT_DATA__`), không cần parse DOM.
+
+        Returns:
+            Danh sách bất động sản, None nếu trang không có JSON tin đăng
+        """
+        match = NEXT_DATA_PATTERN.search(html_content)
+        if not match:
+            return None
         try:
-            # Kết nối browser
-            if not await self.connect_browser():
-                return False
-            
-            # Tạo page
-            if not await self.create_page():
-                return False
-            
-            # Crawl từng trang
-            for page_num in range(1, self.max_pages + 1):
-                print(f"\n🔄 Đang crawl trang {page_num}/{self.max_pages}...")
-                
-                # Navigate đến trang
-                if not await self.navigate_to_page(base_url, page_num):
-                    print(f"❌ Không thể tải trang {page_num}, bỏ qua...")
+            ads = _find_ads(json.loads(match.group(1)))
+        except ValueError as e:
+            print(f"⚠️ Lỗi đọc JSON trang {page_num}: {e}")
+            return None
+        if ads is None:
+            return None
+
+        scraped_at = datetime.now().isoformat()
+        properties = []
+        for idx, ad in enumerate(ads):
+            location = ', '.join(str(part) for part in (ad.get('ward_name'), ad.get('area_name')) if part)
+            image = ad.get('image') or ad.get('webp_image') or ''
+            properties.append({
+                'title': ad.get('subject', ''),
+                'price': ad.get('price_string', ad.get('price', '')),
+                'price_unit': '',
+                'area': f"{ad['size']} m²" if ad.get('size') else '',
+                'location': location,
+                'description': ad.get('body', ''),
+                'url': f"https://www.nhatot.com/{ad['list_id']}.htm",
+                'image_url': f"https:{image}" if image.startswith('//') else image,
+                'posted_date': ad.get('date', ''),
+                'property_type': ad.get('category_name', ''),
+                'bedrooms': ad.get('rooms', ''),
+                'bathrooms': ad.get('toilets', ''),
+                'page_number': page_num,
+                'item_index': idx + 1,
+                'scraped_at': scraped_at,
+            })
+        properties = [item for item in properties if item['title']]
+        print(f"✅ Extract thành công {len(properties)} bất động sản từ JSON trang {page_num}")
+        return properties
+
+    def parse_listing_page(self, html_content: str, page_num: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Extract tin đăng từ JSON nhúng, nếu không có thì từ HTML.
+
+        Returns:
+            Danh sách bất động sản, None nếu trang không có dữ liệu tin đăng (cần chạy JavaScript)
+        """
+        properties = self.extract_embedded_listings(html_content, page_num)
+        if properties is not None:
+            return properties
+        if 'ListAds_ListAds__ANK2d' not in html_content:
+            return None
+        return self.extract_property_data(html_content, page_num)
+
+    def page_url(self, page_num: int) -> str:
+        return self.base_url if page_num == 1 else f"{self.base_url}?page={page_num}"
+
+    async def _crawl_one(self, page_num: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Tải và extract một trang, thử lần lượt các backend.
+
+        Backend sau (trình duyệt) chỉ được dùng khi backend trước lỗi hoặc trả
+        về trang không có dữ liệu tin đăng. Kết quả mỗi lần tải được báo cho
+        budget; trang bị chặn (429/403/captcha) được tải lại tối đa
+        `block_retries` lần.
+        """
+        url = self.page_url(page_num)
+        for backend in self.backends:
+            for attempt in range(self.block_retries + 1):
+                print(f"🌐 Đang truy cập trang {page_num} ({backend.name}): {url}")
+                try:
+                    async with self.budget.slot():
+                        # Trang chờ slot lâu có thể đã nằm sau trang dừng phân trang
+                        if self._stop_page is not None and page_num > self._stop_page:
+                            return None
+                        result = await backend.fetch(url)
+                except Exception as e:
+                    self.budget.record(error=True, source=backend.name)
+                    print(f"❌ Lỗi tải trang {page_num} ({backend.name}): {e}")
+                    break
+
+                page_data = None
+                if result.status < 400:
+                    page_data = self.parse_listing_page(result.html, page_num)
+                blocked = result.status in BLOCK_STATUSES or (
+                    result.status < 400 and page_data is None and looks_like_captcha(result.html)
+                )
+                if blocked:
+                    # Pacer đã giảm tốc, tải lại trang sau khoảng chờ mới
+                    self.budget.record(blocked=True, source=backend.name)
+                    print(f"🚫 Trang {page_num} bị chặn (HTTP {result.status}, {backend.name}), lần {attempt + 1}")
                     continue
+                if result.status >= 400:
+                    if result.status >= 500:
+                        self.budget.record(error=True, source=backend.name)
+                    print(f"❌ Trang {page_num} trả về HTTP {result.status} ({backend.name})")
+                    break
 
-                # Lấy HTML content
-                html_content = await self.get_page_content()
-                
-                if html_content:
-                    # Extract dữ liệu
-                    page_data = self.extract_property_data(html_content, page_num)
-                    self.scraped_data.extend(page_data)
-                    
-                    print(f"✅ Crawl trang {page_num}: +{len(page_data)} bất động sản")
+                self.budget.record(result.seconds, source=backend.name)
+                if page_data is None:
+                    print(f"⚠️ Trang {page_num} không có dữ liệu tin đăng khi tải bằng {backend.name}")
+                    break
+                print(f"✅ Crawl trang {page_num} ({backend.name}, {result.seconds:.2f}s): +{len(page_data)} bất động sản")
+                return page_data
+
+        print(f"❌ Không thể crawl trang {page_num}, bỏ qua...")
+        return None
+
+    async def crawl_pages(
+        self, sink: Sink, start_page: int = 1, run_id: Optional[int] = None, resumed_until: int = 0
+    ) -> int:
+        """
+        Crawl các trang start_page..max_pages với `concurrency` worker, ghi vào sink theo thứ tự trang.
+
+        Số trang được phát qua một asyncio.Queue, mỗi worker lấy trang tiếp
+        theo ngay khi xong trang trước; budget giới hạn số trang tải đồng thời
+        và nhịp tải chung. Trang xong trước được giữ lại cho đến khi các trang
+        trước nó xong, và worker không tải vượt quá `2 * concurrency` trang so
+        với trang chưa ghi đầu tiên, nên bộ nhớ không phụ thuộc số trang.
+
+        Khi có `self.state`, chỉ tin mới/đã đổi được ghi và việc phân trang dừng
+        ở trang đầu tiên không có tin mới (các trang sau đó là tin cũ hơn), trừ
+        các trang <= `resumed_until` mà lần crawl đang chạy tiếp đã ghi trước đó.
+        Các trang lỗi được ghi vào `self.failed_pages`.
+
+        Returns:
+            Số trang crawl được
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for page_num in range(start_page, self.max_pages + 1):
+            queue.put_nowait(page_num)
+        window = 2 * self.concurrency
+        pending: Dict[int, Optional[List[Dict[str, Any]]]] = {}
+        next_page = start_page
+        pages_done = 0
+        # Còn liên tục từ trang đầu (chưa có trang lỗi) để đánh dấu trang đã xong khi resume
+        contiguous = True
+        self.failed_pages = []
+        self._stop_page = None
+        ready = asyncio.Condition()
+
+        def write_page(page_num: int, page_data: List[Dict[str, Any]]):
+            if self.state is None:
+                sink.write(page_data)
+                self.items_count += len(page_data)
+                return
+            delta = self.state.diff(page_data)
+            # Ghi sink trước rồi mới lưu trạng thái: process bị kill giữa chừng chỉ làm tin bị ghi lại lần sau
+            sink.write(delta.rows)
+            self.state.commit_page(run_id, page_num, delta, advance=contiguous)
+            self.items_count += len(delta.rows)
+            self.new_count += delta.new
+            self.updated_count += delta.updated
+            print(f"🗂️  Trang {page_num}: {delta.new} tin mới, {delta.updated} tin cập nhật, {delta.unchanged} tin đã có")
+            if page_data and delta.new == 0 and page_num > resumed_until:
+                print(f"⏹️  Trang {page_num} không có tin mới, dừng phân trang")
+                self._stop_page = page_num
+                # Bỏ các trang chưa tải
+                while not queue.empty():
+                    queue.get_nowait()
+                    queue.task_done()
+
+        def write_ready():
+            nonlocal next_page, pages_done, contiguous
+            while next_page in pending:
+                page_data = pending.pop(next_page)
+                if page_data is None:
+                    contiguous = False
+                    # Trang sau trang dừng phân trang không được tải, không phải lỗi
+                    if self._stop_page is None:
+                        self.failed_pages.append(next_page)
+                elif self._stop_page is None:
+                    write_page(next_page, page_data)
+                    pages_done += 1
+                next_page += 1
+
+        async def worker():
+            while True:
+                try:
+                    page_num = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                async with ready:
+                    await ready.wait_for(lambda: page_num < next_page + window)
+                page_data = None
+                try:
+                    if self._stop_page is None:
+                        print(f"\n🔄 Đang crawl trang {page_num}/{self.max_pages}...")
+                        page_data = await self._crawl_one(page_num)
+                except Exception as e:
+                    print(f"❌ Lỗi crawl trang {page_num}: {e}")
+                finally:
+                    # Trang lỗi vẫn được đánh dấu xong để các trang sau được ghi
+                    async with ready:
+                        pending[page_num] = page_data
+                        write_ready()
+                        ready.notify_all()
+                    queue.task_done()
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return pages_done
+
+    async def crawl_nhatot_danang(self):
+        """Crawl dữ liệu bất động sản Đà Nẵng từ nhatot.com theo pages"""
+        sink = self.sink or open_sink()
+        self.items_count = self.new_count = self.updated_count = 0
+        run_id, start_page, resumed_until = None, 1, 0
+        if self.state is not None:
+            run_id, start_page, resumed_until = self.state.start_run(self.base_url, restart=self.restart)
+            if start_page > 1:
+                print(f"↩️  Chạy tiếp lần crawl trước từ trang {start_page}")
+        try:
+            # Crawl song song, mỗi trang được ghi ngay khi các trang trước nó đã ghi
+            pages_done = await self.crawl_pages(sink, start_page, run_id, resumed_until)
+            if self.state is not None:
+                if self.failed_pages:
+                    # Chưa đánh dấu xong: lần sau chạy tiếp từ trang lỗi đầu tiên thay vì mất tin của trang đó
+                    print(
+                        f"⚠️ {len(self.failed_pages)} trang lỗi ({', '.join(map(str, self.failed_pages))}), "
+                        f"lần crawl sau sẽ chạy tiếp từ trang {self.failed_pages[0]}"
+                    )
                 else:
-                    print(f"❌ Không thể lấy content từ trang {page_num}")
-                
-                # Delay giữa các trang để tránh bị block
-                if page_num < self.max_pages:
-                    print(f"⏳ Chờ 2s trước khi crawl trang tiếp theo...")
-                    await asyncio.sleep(2)
-            
-            # Lưu dữ liệu
-            if self.scraped_data:
-                self.save_to_csv()
-                print(f"🎉 Crawl hoàn thành! Tổng cộng: {len(self.scraped_data)} bất động sản từ {page_num} trang")
+                    self.state.finish_run(run_id)
+
+            if self.state is not None and pages_done:
+                print(
+                    f"🎉 Crawl hoàn thành! {pages_done} trang: {self.new_count} tin mới, "
+                    f"{self.updated_count} tin cập nhật ({self.state.listing_count()} tin đã biết)"
+                )
+                return True
+            elif self.items_count:
+                print(f"🎉 Crawl hoàn thành! Tổng cộng: {self.items_count} bất động sản từ {pages_done} trang")
                 return True
             else:
                 print("⚠️ Không crawl được dữ liệu nào")
                 return False
-                
+
         except Exception as e:
             print(f"❌ Lỗi trong quá trình crawl: {e}")
             return False
         finally:
-            try:
-                if self.page and not self.page.isClosed():
-                    await self.page.close()
-                    print("🔐 Đã đóng page")
-            except Exception as e:
-                print(f"⚠️ Lỗi đóng page: {e}")
-            
-            try:
-                if self.browser:
-                    await self.browser.disconnect()
-                    print("🔐 Đã đóng kết nối browser")
-            except Exception as e:
-                print(f"⚠️ Lỗi đóng browser: {e}")
+            # Cả khi bị dừng giữa chừng: giữ các trang đã ghi, bỏ file rỗng
+            if not sink.closed:
+                if self.items_count:
+                    path = sink.finalize()
+                    if path:
+                        print(f"✅ Đã lưu {self.items_count} bất động sản vào {path}")
+                else:
+                    sink.abort()
+            for backend in self.backends:
+                try:
+                    await backend.close()
+                except Exception as e:
+                    print(f"⚠️ Lỗi đóng backend {backend.name}: {e}")
+
+
+def _find_ads(data) -> Optional[list]:
+    """Danh sách tin đăng đầu tiên (các dict có list_id và subject) trong JSON của trang"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            # Trang cuối: danh sách "ads" rỗng nghĩa là hết tin, không phải trang cần JavaScript
+            if node.get('ads') == []:
+                return []
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            if node and all(isinstance(item, dict) and 'list_id' in item and 'subject' in item for item in node):
+                return node
+            stack.extend(node)
+    return None
 
 
 async def async_main():
@@ -0,0 +1,155 @@
+"""
+Giới hạn tốc độ crawl dùng chung cho mọi tab
+
+Tất cả các tab (hoặc nhiều crawler dùng chung một budget) phải lấy slot
+trước khi tải một trang: số trang tải đồng thời không vượt quá
+`max_concurrency` và hai lần bắt đầu tải cách nhau ít nhất `min_interval`
+giây, nên thêm tab chỉ tăng tốc tới mức site cho phép.
+
+- PolitenessBudget: giới hạn cố định
+- AdaptivePacer: giới hạn tự điều chỉnh kiểu AIMD theo kết quả mỗi lần tải
+  (`record`): tăng dần khi site phản hồi tốt, giảm một nửa khi bị chặn
+
+Cả hai có cùng giao diện `slot()` / `record(...)`.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+
+class PolitenessBudget:
+    def __init__(self, max_concurrency: int = 3, min_interval: float = 1.0):
+        """
+        Args:
+            max_concurrency: Số trang được tải đồng thời tối đa
+            min_interval: Khoảng cách tối thiểu (giây) giữa hai lần bắt đầu tải trang
+        """
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Giữ một slot trong suốt thời gian tải trang"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            # Xếp hàng theo thứ tự: mỗi request dời mốc bắt đầu tiếp theo thêm min_interval
+            async with self._lock:
+                wait = self._next_start - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start = loop.time() + self.min_interval
+            yield
+
+    def record(self, seconds: Optional[float] = None, blocked: bool = False, error: bool = False, source: str = ""):
+        """Budget cố định không dùng kết quả tải trang"""
+
+
+class AdaptivePacer:
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        min_interval: float = 0.25,
+        max_interval: float = 30.0,
+        start_interval: float = 2.0,
+        rate_step: float = 0.5,
+        slow_factor: float = 3.0,
+    ):
+        """
+        Args:
+            max_concurrency: Số trang tải đồng thời tối đa (bắt đầu từ 1)
+            min_interval: Khoảng cách nhỏ nhất (giây) giữa hai lần bắt đầu tải trang
+            max_interval: Khoảng cách lớn nhất khi bị chặn liên tục
+            start_interval: Khoảng cách ban đầu
+            rate_step: Khi tải thành công, tốc độ (trang/giây) tăng thêm chừng này mỗi giây
+            slow_factor: Latency trung bình vượt quá bội số này của latency nhỏ nhất thì coi là quá tải
+        """
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.rate_step = rate_step
+        self.slow_factor = slow_factor
+        self.concurrency = 1.0
+        self.interval = min(max(start_interval, min_interval), max_interval)
+        self.requests = 0
+        self.blocked = 0
+        self.errors = 0
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+        self._last_decrease = float('-inf')
+        # source -> (latency trung bình EWMA, latency nhỏ nhất)
+        self._latency: Dict[str, tuple] = {}
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self.concurrency))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Giữ một slot trong suốt thời gian tải trang"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            async with self._lock:
+                wait = self._next_start - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start = loop.time() + self.interval
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def record(self, seconds: Optional[float] = None, blocked: bool = False, error: bool = False, source: str = ""):
+        """
+        Ghi nhận kết quả một lần tải trang và điều chỉnh tốc độ.
+
+        Args:
+            seconds: Thời gian tải (chỉ dùng khi thành công)
+            blocked: Bị chặn/giới hạn (HTTP 429/403, captcha)
+            error: Lỗi mạng/timeout/HTTP 5xx
+            source: Tên backend (latency của HTTP và trình duyệt được theo dõi riêng)
+        """
+        self.requests += 1
+        if blocked:
+            self.blocked += 1
+            self._decrease(0.5, "bị chặn")
+            # Chờ hết khoảng cách mới trước khi tải tiếp
+            self._next_start = max(self._next_start, asyncio.get_running_loop().time() + self.interval)
+            return
+        if error:
+            self.errors += 1
+            self._decrease(0.75, "lỗi tải trang")
+            return
+        if seconds is not None:
+            average, fastest = self._latency.get(source, (seconds, seconds))
+            average = 0.7 * average + 0.3 * seconds
+            fastest = min(fastest, seconds)
+            self._latency[source] = (average, fastest)
+            if average > self.slow_factor * max(fastest, 0.1):
+                self._decrease(0.75, f"phản hồi chậm ({average:.1f}s)")
+                return
+        # Tăng cộng: thêm ~1 trang song song sau mỗi `concurrency` lần thành công,
+        # tốc độ tải tăng ~rate_step trang/giây sau mỗi giây
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+        if self.interval > 0:
+            rate = 1 / self.interval
+            self.interval = max(self.min_interval, 1 / (rate + self.rate_step / rate))
+
+    def _decrease(self, factor: float, reason: str):
+        """Giảm nhân, tối đa một lần mỗi `interval` để các request đang chạy cùng bị chặn chỉ tính một lần"""
+        now = asyncio.get_running_loop().time()
+        if now - self._last_decrease < self.interval:
+            return
+        self._last_decrease = now
+        self.concurrency = max(1.0, self.concurrency * factor)
+        self.interval = min(self.max_interval, max(self.interval, self.min_interval, 0.05) / factor)
+        print(f"🐢 {reason.capitalize()}: giảm còn {self.limit} trang song song, cách nhau {self.interval:.2f}s")
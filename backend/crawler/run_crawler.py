@@ -8,6 +8,8 @@ import argparse
 import sys
 import time
 from .index import NhatotRealEstateCrawler
+from .sinks import open_sink
+from .state import CrawlState
 
 
 def print_banner():
@@ -24,7 +26,14 @@ def print_banner():
 async def run_crawler_with_options(
     browserless_url: str,
     max_pages: int,
-    output_file: str = None
+    output_file: str = None,
+    concurrency: int = 1,
+    min_interval: float = 0.5,
+    mode: str = "auto",
+    output_format: str = None,
+    state_path: str = None,
+    restart: bool = False,
+    pacing: str = "adaptive"
 ):
     """
     Chạy crawler với các tùy chọn được chỉ định
@@ -33,27 +42,42 @@ async def run_crawler_with_options(
         browserless_url: URL của browserless service
         max_pages: Số trang tối đa để crawl
         output_file: Tên file output (optional)
+        concurrency: Số trang crawl song song
+        min_interval: Khoảng cách tối thiểu (giây) giữa hai lần tải trang
+        mode: "auto" (HTTP, fallback trình duyệt), "http" hoặc "browser"
+        output_format: "csv", "jsonl" hoặc "columnar" (mặc định theo phần mở rộng của output_file)
+        state_path: File SQLite trạng thái crawl (resume, chỉ lưu tin mới/đổi) - optional
+        restart: Bỏ lần crawl chưa xong trong state, bắt đầu lại từ trang 1
+        pacing: "adaptive" (tự điều chỉnh theo phản hồi của site) hoặc "fixed"
     """
     print(f"⚙️  Cấu hình:")
     print(f"   📍 Browserless URL: {browserless_url}")
     print(f"   📄 Số trang tối đa: {max_pages}")
+    print(f"   🧭 Chế độ: {mode}")
+    if pacing == "adaptive":
+        print(f"   🗂️  Số trang song song: tự điều chỉnh tới {concurrency}, tải trang cách nhau >= {min_interval}s")
+    else:
+        print(f"   🗂️  Số trang song song: {concurrency}, tải trang cách nhau >= {min_interval}s")
     if output_file:
         print(f"   📁 File output: {output_file}")
+    if state_path:
+        print(f"   🗃️  State: {state_path}")
     print("-" * 60)
     
-    # Khởi tạo crawler
-    crawler = NhatotRealEstateCrawler(browserless_url, max_pages)
-    
-    # Tùy chỉnh output file nếu có
-    if output_file:
-        original_save = crawler.save_to_csv
-        def custom_save():
-            return original_save(output_file)
-        crawler.save_to_csv = custom_save
+    # Khởi tạo crawler, kết quả được ghi dần theo từng trang
+    crawler = NhatotRealEstateCrawler(
+        browserless_url, max_pages, concurrency=concurrency, min_interval=min_interval, pacing=pacing, mode=mode,
+        sink=open_sink(output_file, output_format),
+        state=CrawlState(state_path) if state_path else None, restart=restart
+    )
     
     # Chạy crawler
     start_time = time.time()
-    success = await crawler.crawl_nhatot_danang()
+    try:
+        success = await crawler.crawl_nhatot_danang()
+    finally:
+        if crawler.state is not None:
+            crawler.state.close()
     end_time = time.time()
     
     print("-" * 60)
@@ -72,7 +96,12 @@ Ví dụ sử dụng:
   python run_crawler.py                                    # Chạy với cấu hình mặc định
   python run_crawler.py --pages 10                        # Crawl 10 trang
   python run_crawler.py --output my_data.csv               # Lưu vào file tùy chỉnh
+  python run_crawler.py --output data.jsonl                # Lưu dạng JSONL (hoặc --format)
   python run_crawler.py --url ws://remote:3000             # Sử dụng browserless remote
+  python run_crawler.py --pages 50 --concurrency 4         # Crawl song song tối đa 4 trang
+  python run_crawler.py --pacing fixed --min-interval 2    # Tốc độ cố định, cách nhau 2s
+  python run_crawler.py --mode browser                     # Luôn tải qua browserless
+  python run_crawler.py --state crawl_state.sqlite         # Chỉ lấy tin mới, chạy tiếp nếu bị dừng
         """
     )
     
@@ -91,7 +120,56 @@ Ví dụ sử dụng:
     
     parser.add_argument(
         "--output", "-o",
-        help="Tên file CSV output (mặc định: auto-generate với timestamp)"
+        help="Tên file output (mặc định: auto-generate với timestamp)"
+    )
+    
+    parser.add_argument(
+        "--format", "-f",
+        choices=["csv", "jsonl", "columnar"],
+        default=None,
+        help="Định dạng output (mặc định: theo phần mở rộng .csv/.jsonl/.cols, không có thì csv)"
+    )
+    
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=1,
+        help="Số trang crawl song song (mặc định: 1)"
+    )
+    
+    parser.add_argument(
+        "--mode", "-m",
+        choices=["auto", "http", "browser"],
+        default="auto",
+        help="Cách tải trang: auto = HTTP, chỉ dùng browserless cho trang cần JavaScript (mặc định: auto)"
+    )
+    
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=0.5,
+        help="Khoảng cách tối thiểu (giây) giữa hai lần tải trang, tính chung mọi trang song song (mặc định: 0.5)"
+    )
+    
+    parser.add_argument(
+        "--pacing",
+        choices=["adaptive", "fixed"],
+        default="adaptive",
+        help="adaptive = bắt đầu chậm, tăng dần số trang song song và giảm khoảng cách khi site phản hồi tốt, "
+             "giảm một nửa khi bị chặn (429/403/captcha); fixed = luôn cách nhau --min-interval (mặc định: adaptive)"
+    )
+    
+    parser.add_argument(
+        "--state", "-s",
+        default=None,
+        help="File SQLite lưu trạng thái crawl: chạy tiếp lần bị dừng, chỉ lưu tin mới/đổi, "
+             "dừng ở trang không có tin mới (mặc định: không dùng)"
+    )
+    
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Bỏ lần crawl chưa xong trong --state, bắt đầu lại từ trang 1"
     )
     
     parser.add_argument(
@@ -106,6 +184,9 @@ Ví dụ sử dụng:
     if args.pages < 1 or args.pages > 50:
         print("❌ Số trang phải từ 1-50")
         sys.exit(1)
+    if args.concurrency < 1 or args.concurrency > 16:
+        print("❌ Số trang song song phải từ 1-16")
+        sys.exit(1)
     
     # In banner nếu không ở chế độ quiet
     if not args.quiet:
@@ -116,7 +197,14 @@ Ví dụ sử dụng:
         success = asyncio.run(run_crawler_with_options(
             browserless_url=args.url,
             max_pages=args.pages,
-            output_file=args.output
+            output_file=args.output,
+            concurrency=args.concurrency,
+            min_interval=args.min_interval,
+            mode=args.mode,
+            output_format=args.format,
+            state_path=args.state,
+            restart=args.restart,
+            pacing=args.pacing
         ))
         
         if success:
@@ -0,0 +1,256 @@
+"""
+Nơi ghi kết quả crawl theo từng trang (sink)
+
+Crawler ghi các tin đăng của mỗi trang ngay khi parse xong thay vì giữ tất cả
+trong bộ nhớ đến cuối, nên bộ nhớ không tăng theo số trang và một lần crawl
+bị dừng giữa chừng vẫn giữ được các trang đã ghi.
+
+Mọi sink ghi vào `<path>.partial` trước: dữ liệu được flush sau mỗi trang và
+fsync định kỳ, `finalize()` đổi tên thành `<path>` bằng một phép rename nên
+người đọc không bao giờ thấy file dở dang.
+
+- CsvSink: file CSV
+- JsonlSink: mỗi tin đăng một dòng JSON
+- ColumnarSink: thư mục các phần (part) dạng cột, mỗi phần là một snapshot của
+  src/columnar.py; đọc lại bằng `read_parts`
+- MemorySink: giữ trong bộ nhớ (test, crawl nhỏ)
+"""
+
+import csv
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.columnar import read_snapshot, write_snapshot
+
+FIELDNAMES = [
+    'title', 'price', 'price_unit', 'area', 'location', 'description',
+    'url', 'image_url', 'posted_date', 'property_type', 'direction',
+    'bedrooms', 'bathrooms', 'page_number', 'item_index', 'scraped_at'
+]
+# Cột số nguyên, các cột còn lại được ghi dạng chuỗi
+INTEGER_FIELDS = ('page_number', 'item_index')
+
+
+class Sink:
+    """Giao diện chung: write() mỗi trang, finalize() khi xong, abort() để bỏ"""
+
+    def __init__(self, path: str, fsync_interval: float = 5.0):
+        """
+        Args:
+            path: File (hoặc thư mục) kết quả cuối cùng
+            fsync_interval: Chu kỳ (giây) fsync dữ liệu đã ghi xuống đĩa
+        """
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.fsync_interval = fsync_interval
+        self.rows_written = 0
+        self.closed = False
+        self._last_sync = time.monotonic()
+
+    def write(self, rows: List[Dict[str, Any]]):
+        """Ghi các tin đăng của một trang"""
+        if rows:
+            self._write(rows)
+            self.rows_written += len(rows)
+        self.flush()
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def flush(self):
+        pass
+
+    def sync(self):
+        self._last_sync = time.monotonic()
+
+    def finalize(self) -> str:
+        """Ghi nốt, fsync rồi đổi tên file .partial thành file kết quả"""
+        self.flush()
+        self.sync()
+        self._close()
+        self._replace()
+        _fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        self.closed = True
+        return self.path
+
+    def abort(self):
+        """Bỏ kết quả đang ghi dở"""
+        self._close()
+        if os.path.isdir(self.partial_path):
+            shutil.rmtree(self.partial_path, ignore_errors=True)
+        elif os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+        self.closed = True
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def _replace(self):
+        os.replace(self.partial_path, self.path)
+
+    def _close(self):
+        pass
+
+
+class _FileSink(Sink):
+    def __init__(self, path: str, fsync_interval: float = 5.0):
+        super().__init__(path, fsync_interval)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.partial_path, 'w', newline='', encoding='utf-8')
+
+    def flush(self):
+        if not self._file.closed:
+            self._file.flush()
+
+    def sync(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        super().sync()
+
+    def _close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class CsvSink(_FileSink):
+    def __init__(self, path: str, fsync_interval: float = 5.0):
+        super().__init__(path, fsync_interval)
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _write(self, rows):
+        self._writer.writerows(rows)
+
+
+class JsonlSink(_FileSink):
+    def _write(self, rows):
+        self._file.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows))
+
+
+class ColumnarSink(Sink):
+    def __init__(self, path: str, fsync_interval: float = 5.0, part_rows: int = 5000):
+        """
+        Args:
+            path: Thư mục kết quả
+            fsync_interval: Chu kỳ (giây) ghi phần đang gom xuống đĩa
+            part_rows: Số tin đăng tối đa mỗi phần (và tối đa giữ trong bộ nhớ)
+        """
+        super().__init__(path, fsync_interval)
+        self.part_rows = part_rows
+        self.parts = 0
+        self._buffer: List[Dict[str, Any]] = []
+        # Phần còn lại của lần ghi dở trước không được lẫn vào kết quả
+        shutil.rmtree(self.partial_path, ignore_errors=True)
+        os.makedirs(self.partial_path)
+
+    def _write(self, rows):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.part_rows:
+            self.sync()
+
+    def sync(self):
+        if self._buffer:
+            frame = pd.DataFrame(self._buffer, columns=FIELDNAMES)
+            for name in FIELDNAMES:
+                if name in INTEGER_FIELDS:
+                    frame[name] = frame[name].astype('int64')
+                else:
+                    frame[name] = frame[name].fillna('').astype(str)
+            self.parts += 1
+            # Mỗi phần là một version của snapshot, ghi bằng rename nên luôn nguyên vẹn
+            write_snapshot(frame, self.partial_path, version=f"part-{self.parts:05d}", keep=self.parts)
+            self._buffer = []
+        super().sync()
+
+    def _replace(self):
+        """
+        Đổi thư mục .partial thành thư mục kết quả.
+
+        os.replace không ghi đè được thư mục khác rỗng: thư mục kết quả cũ được
+        đổi tên sang `<path>.old` trước, rồi mới đổi tên thư mục mới vào và xóa
+        thư mục cũ.
+        """
+        if not os.path.isdir(self.path):
+            os.replace(self.partial_path, self.path)
+            return
+        old_path = f"{self.path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(self.path, old_path)
+        os.replace(self.partial_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+class MemorySink(Sink):
+    def __init__(self):
+        super().__init__(path='', fsync_interval=float('inf'))
+        self.rows: List[Dict[str, Any]] = []
+
+    def _write(self, rows):
+        self.rows.extend(rows)
+
+    def finalize(self) -> str:
+        self.closed = True
+        return self.path
+
+    def abort(self):
+        self.closed = True
+
+
+def read_parts(path: str) -> pd.DataFrame:
+    """Đọc toàn bộ các phần của kết quả ColumnarSink thành một DataFrame"""
+    parts = sorted(
+        entry for entry in os.listdir(path)
+        if entry.startswith('part-') and os.path.isdir(os.path.join(path, entry))
+    )
+    if not parts:
+        return pd.DataFrame(columns=FIELDNAMES)
+    return pd.concat([read_snapshot(path, version=part) for part in parts], ignore_index=True)
+
+
+def default_output_path(fmt: str = 'csv') -> str:
+    """Tên file mặc định theo thời gian (giống các file crawl trước đây)"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    extension = {'csv': 'csv', 'jsonl': 'jsonl', 'columnar': 'cols'}[fmt]
+    return f"../real_estate_data_{timestamp}.{extension}"
+
+
+def open_sink(path: Optional[str] = None, fmt: Optional[str] = None, fsync_interval: float = 5.0) -> Sink:
+    """
+    Tạo sink theo định dạng (mặc định suy ra từ phần mở rộng: .csv, .jsonl, .cols).
+
+    Args:
+        path: File/thư mục kết quả (mặc định tên theo thời gian)
+        fmt: "csv", "jsonl" hoặc "columnar"
+    """
+    if fmt is None:
+        extension = os.path.splitext(path or '')[1].lower()
+        fmt = {'.jsonl': 'jsonl', '.cols': 'columnar'}.get(extension, 'csv')
+    path = path or default_output_path(fmt)
+    if fmt == 'csv':
+        return CsvSink(path, fsync_interval)
+    if fmt == 'jsonl':
+        return JsonlSink(path, fsync_interval)
+    if fmt == 'columnar':
+        return ColumnarSink(path, fsync_interval)
+    raise ValueError(f"Định dạng output không hợp lệ: {fmt}")
+
+
+def _fsync_directory(directory: str):
+    """fsync thư mục để phép rename được ghi bền xuống đĩa"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,173 @@
+"""
+Trạng thái crawl lưu trong SQLite, dùng giữa các lần chạy
+
+- listings: mỗi tin đăng đã thấy (id lấy từ URL `.../<id>.htm`), hash nội dung,
+  lần đầu / lần cuối thấy. Lần crawl sau chỉ ghi tin mới hoặc tin đã đổi nội
+  dung, và dừng phân trang ở trang đầu tiên không có tin mới.
+- runs: mỗi lần crawl theo base_url với trang cuối cùng đã ghi xong (liên tục
+  từ trang đầu) và trang lớn nhất đã ghi. Lần crawl bị dừng giữa chừng hoặc có
+  trang lỗi được chạy tiếp từ trang sau trang liên tục cuối cùng; tới trang
+  lớn nhất đã ghi thì không dừng sớm (các tin đó vừa được chính lần crawl này
+  lưu).
+
+    state = CrawlState("crawl_state.sqlite")
+    crawler = NhatotRealEstateCrawler(max_pages=50, state=state)
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+LISTING_ID_PATTERN = re.compile(r'(\d+)\.htm')
+# Các trường thay đổi theo lần crawl/vị trí trên trang, không tính vào hash nội dung
+VOLATILE_FIELDS = ('page_number', 'item_index', 'scraped_at', 'posted_date')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    listing_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    base_url TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    last_page INTEGER NOT NULL DEFAULT 0,
+    max_page INTEGER NOT NULL DEFAULT 0,
+    new_listings INTEGER NOT NULL DEFAULT 0,
+    updated_listings INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_base_url ON runs (base_url, finished_at);
+"""
+
+
+def listing_id(row: Dict[str, Any]) -> str:
+    """Id của tin đăng: số trong URL `.../<id>.htm`, nếu không có thì hash URL + tiêu đề"""
+    match = LISTING_ID_PATTERN.search(row.get('url') or '')
+    if match:
+        return match.group(1)
+    key = f"{row.get('url', '')}|{row.get('title', '')}"
+    return 'h' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """Hash nội dung tin đăng (bỏ các trường thay đổi theo lần crawl)"""
+    content = {key: str(value) for key, value in row.items() if key not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class PageDelta:
+    """Tin đăng của một trang so với trạng thái đã lưu"""
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    new: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # (listing_id, url, content_hash) của mọi tin trên trang
+    records: List[Tuple[str, str, str]] = field(default_factory=list)
+
+    @property
+    def seen(self) -> int:
+        return self.updated + self.unchanged
+
+
+class CrawlState:
+    def __init__(self, path: str = "crawl_state.sqlite"):
+        """
+        Args:
+            path: File SQLite lưu trạng thái (":memory:" để test)
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def start_run(self, base_url: str, restart: bool = False) -> Tuple[int, int, int]:
+        """
+        Bắt đầu một lần crawl, hoặc chạy tiếp lần crawl chưa xong của base_url.
+
+        Args:
+            base_url: URL trang danh sách
+            restart: Bỏ lần crawl chưa xong, bắt đầu lại từ trang 1
+
+        Returns:
+            (run_id, trang bắt đầu, trang lớn nhất lần crawl này đã ghi)
+        """
+        now = datetime.now().isoformat()
+        with self.conn:
+            unfinished = self.conn.execute(
+                "SELECT run_id, last_page, max_page FROM runs WHERE base_url = ? AND finished_at IS NULL "
+                "ORDER BY run_id DESC LIMIT 1",
+                (base_url,),
+            ).fetchone()
+            if unfinished and not restart:
+                return unfinished[0], unfinished[1] + 1, unfinished[2]
+            if unfinished:
+                self.conn.execute(
+                    "UPDATE runs SET finished_at = ? WHERE base_url = ? AND finished_at IS NULL", (now, base_url)
+                )
+            cursor = self.conn.execute("INSERT INTO runs (base_url, started_at) VALUES (?, ?)", (base_url, now))
+            return cursor.lastrowid, 1, 0
+
+    def finish_run(self, run_id: int):
+        with self.conn:
+            self.conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (datetime.now().isoformat(), run_id))
+
+    def diff(self, rows: List[Dict[str, Any]]) -> PageDelta:
+        """So sánh tin đăng của một trang với trạng thái (chưa ghi gì)"""
+        delta = PageDelta()
+        in_page = set()
+        for row in rows:
+            lid = listing_id(row)
+            if lid in in_page:
+                continue
+            in_page.add(lid)
+            digest = content_hash(row)
+            stored = self.conn.execute(
+                "SELECT content_hash FROM listings WHERE listing_id = ?", (lid,)
+            ).fetchone()
+            if stored is None:
+                delta.new += 1
+                delta.rows.append(row)
+            elif stored[0] != digest:
+                delta.updated += 1
+                delta.rows.append(row)
+            else:
+                delta.unchanged += 1
+            delta.records.append((lid, row.get('url') or '', digest))
+        return delta
+
+    def commit_page(self, run_id: int, page_num: int, delta: PageDelta, advance: bool = True):
+        """
+        Lưu các tin đăng của trang (sau khi đã ghi vào sink) trong một transaction.
+
+        Args:
+            advance: Đánh dấu trang đã xong (chỉ khi mọi trang trước nó cũng đã xong)
+        """
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO listings (listing_id, url, content_hash, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (listing_id) DO UPDATE SET "
+                "url = excluded.url, content_hash = excluded.content_hash, last_seen = excluded.last_seen",
+                [(lid, url, digest, now, now) for lid, url, digest in delta.records],
+            )
+            self.conn.execute(
+                "UPDATE runs SET new_listings = new_listings + ?, updated_listings = updated_listings + ?, "
+                "last_page = CASE WHEN ? THEN MAX(last_page, ?) ELSE last_page END, "
+                "max_page = MAX(max_page, ?) WHERE run_id = ?",
+                (delta.new, delta.updated, advance, page_num, page_num, run_id),
+            )
+
+    def listing_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -1,22 +1,186 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-import joblib
+from typing import List, Optional
+import hmac
+import math
 import numpy as np
 import pandas as pd
 import os
 
-app = FastAPI(title="Dự đoán giá bất động sản", description="API dự đoán giá bất động sản tại TP.HCM")
+from src.config import (
+    MODEL_DIR, MODEL_WATCH_INTERVAL, ADMIN_TOKEN, INFERENCE_BACKEND, INFERENCE_COMPILED_MAX_ROWS,
+    DATASET_PATH, DATASET_WATCH_INTERVAL, SHARED_DIR,
+    GRID_ENABLED, GRID_MAX_CELLS, GRID_PATH, GRID_RESOLUTION,
+    BATCH_MAX_ITEMS,
+    INFERENCE_QUEUE_SIZE, INFERENCE_TIMEOUT, INFERENCE_WORKERS,
+    MICRO_BATCH_ENABLED, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS,
+    HEATMAP_CACHE_DIR, HEATMAP_MAX_SIZE, HEATMAP_TILE_SIZE,
+    RESULT_CACHE_COORD_PRECISION, RESULT_CACHE_ENABLED, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL,
+)
+from src.batching import MicroBatcher
+from src.dataset_store import DatasetStore
+from src.executor import DeadlineExceeded, ExecutorSaturated, InferenceExecutor
+from src.features import normalize_district_name
+from src.heatmap import TileCache, grid_points, neighbourhood_profiles, tile_bounds
+from src.metrics import (
+    BATCH_SIZE, CACHE_ENTRIES, CACHE_EVENTS, DATASET_INFO, EXECUTOR_EVENTS, EXECUTOR_JOBS,
+    MODEL_INFO, REGISTRY, MetricsMiddleware, StageTimer,
+)
+from src.model_bundle import ModelBundleError
+from src.model_manager import ModelManager
+from src.result_cache import ResultCache, quantize_coordinate
+from src.shared_store import SharedDatasetStore
 
-# Load model và các encoders
-try:
-    model = joblib.load("xgb_model.pkl")
-    scaler = joblib.load("scaler.pkl")
-    le_district = joblib.load("label_encoder_district.pkl")
-    le_type = joblib.load("label_encoder_type.pkl")
-    le_facing = joblib.load("label_encoder_facing.pkl")
-    feature_columns = joblib.load("feature_columns.pkl")
-except Exception as e:
-    print(f"Lỗi khi load model: {e}")
+# Dữ liệu tham chiếu cho /simple-predict-price, load một lần và giữ trong bộ nhớ.
+# Chạy qua src/serve.py thì worker gắn dữ liệu process cha đã chuẩn bị (memory-map)
+if SHARED_DIR:
+    dataset_store = SharedDatasetStore(SHARED_DIR, watch_interval=DATASET_WATCH_INTERVAL)
+else:
+    dataset_store = DatasetStore(
+        DATASET_PATH,
+        watch_interval=DATASET_WATCH_INTERVAL,
+        grid_resolution=GRID_RESOLUTION if GRID_ENABLED else None,
+        grid_path=GRID_PATH,
+        grid_max_cells=GRID_MAX_CELLS,
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    dataset_store.load()
+    dataset_store.start_watching()
+    model_manager.start_watching()
+    if batcher is not None:
+        batcher.start()
+    yield
+    if batcher is not None:
+        batcher.stop()
+    inference.shutdown()
+    model_manager.stop_watching()
+    dataset_store.stop_watching()
+
+app = FastAPI(title="Dự đoán giá bất động sản", description="API dự đoán giá bất động sản tại TP.HCM", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+# Model đang phục vụ (bundle có version), tự load lại khi models/LATEST đổi
+model_manager = ModelManager(
+    MODEL_DIR,
+    watch_interval=MODEL_WATCH_INTERVAL,
+    backend=INFERENCE_BACKEND,
+    compiled_max_rows=INFERENCE_COMPILED_MAX_ROWS,
+)
+model_manager.load()
+
+def current_bundle():
+    """Bundle đang phục vụ; request giữ tham chiếu này đến khi trả kết quả"""
+    bundle = model_manager.current()
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model chưa được load")
+    return bundle
+
+def predict_features(bundle, features, stages=None):
+    """Scale và predict một ma trận feature (n dòng) bằng bundle đã chọn"""
+    if stages is None:
+        return bundle.predict(features)
+    scaled = bundle.scaler.transform(features)
+    stages.mark("scale")
+    predictions = bundle.predict_scaled(scaled)
+    stages.mark("predict")
+    return predictions
+
+# Cache kết quả dự đoán, tự xóa khi dữ liệu hoặc model được load lại
+result_cache = (
+    ResultCache(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL) if RESULT_CACHE_ENABLED else None
+)
+if result_cache is not None:
+    dataset_store.add_listener(lambda snapshot: result_cache.invalidate())
+    model_manager.add_listener(lambda bundle: result_cache.invalidate())
+
+def cache_coordinate(value: float) -> float:
+    return quantize_coordinate(value, RESULT_CACHE_COORD_PRECISION)
+
+# Thread pool riêng cho dự đoán: hàng đợi giới hạn, quá tải thì trả 429/503 ngay
+inference = InferenceExecutor(INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE, INFERENCE_TIMEOUT)
+
+async def run_inference(fn, *args):
+    """Chạy phần tính toán nặng trong inference executor"""
+    try:
+        return await inference.run(fn, *args)
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+# Giữ tham chiếu tới các task đang chạy nền để không bị thu hồi giữa chừng
+background_tasks = set()
+
+async def fill_result(key, future, compute):
+    """Tính kết quả cho khóa đã claim và trả cho mọi request đang chờ"""
+    try:
+        value = await compute()
+    except BaseException as e:
+        result_cache.reject(key, future, e)
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        return
+    result_cache.resolve(key, future, value)
+
+async def cached_inference(key, compute):
+    """
+    Kết quả qua cache nếu được bật: có sẵn thì trả ngay, khóa đang được request khác
+    tính thì chờ kết quả đó trên event loop (không chiếm chỗ trong executor).
+
+    Args:
+        compute: Hàm async tính kết quả khi chưa có
+    """
+    if result_cache is None:
+        return await compute()
+    future, leader = result_cache.claim(key)
+    if leader:
+        fill_task = asyncio.ensure_future(fill_result(key, future, compute))
+        background_tasks.add(fill_task)
+        fill_task.add_done_callback(background_tasks.discard)
+    elif future.done():
+        return future.result()
+    # shield: request bị hủy không hủy kết quả mà các request khác đang chờ
+    return await asyncio.shield(asyncio.wrap_future(future))
+
+# Cache tile bản đồ nhiệt trên đĩa, tile của version cũ bị xóa khi model hoặc dữ liệu được thay
+tile_cache = TileCache(HEATMAP_CACHE_DIR)
+
+def prune_tile_cache():
+    bundle = model_manager.current()
+    snapshot = dataset_store.get()
+    if bundle is not None and snapshot is not None:
+        tile_cache.prune(bundle.version, snapshot.version)
+
+dataset_store.add_listener(lambda snapshot: prune_tile_cache())
+model_manager.add_listener(lambda bundle: prune_tile_cache())
+
+# Gom các request dự đoán đơn lẻ đồng thời thành micro-batch (tùy chọn)
+batcher = (
+    MicroBatcher(predict_features, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS)
+    if MICRO_BATCH_ENABLED else None
+)
+
+async def predict_batched(bundle, features, stages):
+    """
+    Dự đoán một dòng feature qua micro-batcher. Future được chờ trên event loop nên
+    request đang chờ batch không giữ thread của executor và một batch gom được nhiều
+    hơn INFERENCE_WORKERS request.
+    """
+    try:
+        prediction = await asyncio.wait_for(
+            asyncio.wrap_future(batcher.submit(bundle, features[0])), INFERENCE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail=f"Dự đoán không xong trong {INFERENCE_TIMEOUT:g} giây")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi dự đoán: {str(e)}")
+    stages.mark("micro_batch")
+    return prediction
 
 class PredictRequest(BaseModel):
     latitude: float
@@ -40,309 +204,431 @@ class PredictRequest(BaseModel):
     nearby_price_count: int
     condition_score: float
 
+class BatchPredictRequest(BaseModel):
+    items: List[PredictRequest]
+
 class SimplePredictRequest(BaseModel):
     latitude: float
     longitude: float
     bedrooms: int
     district: str
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Tính khoảng cách Euclidean giữa 2 điểm"""
-    return np.sqrt((lat1 - lat2)**2 + (lon1 - lon2)**2)
+@app.post("/predict-price")
+async def predict_price(data: PredictRequest):
+    bundle = current_bundle()
+    # Khóa cache: request đã chuẩn hóa, tọa độ làm tròn
+    fields = data.model_dump(exclude={"latitude", "longitude", "district"})
+    key = (
+        "predict-price",
+        bundle.version,
+        cache_coordinate(data.latitude),
+        cache_coordinate(data.longitude),
+        normalize_district_name(data.district),
+        *sorted(fields.items()),
+    )
+    if batcher is None:
+        return await cached_inference(key, lambda: run_inference(compute_predict_price, data, bundle))
+    return await cached_inference(key, lambda: predict_price_batched(data, bundle))
+
+def compute_predict_price(data: PredictRequest, bundle):
+    """Dựng feature, predict và trả kết quả trong một lần gọi (không qua micro-batch)"""
+    stages = StageTimer("predict-price")
+    features = predict_price_features(data, bundle, stages)
+    try:
+        # Scale và predict
+        predicted_price_per_m2 = predict_features(bundle, features, stages)[0]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi dự đoán: {str(e)}")
+    return predict_price_result(data, bundle, predicted_price_per_m2)
+
+async def predict_price_batched(data: PredictRequest, bundle):
+    """Dựng feature trong inference executor, predict qua micro-batcher"""
+    stages = StageTimer("predict-price")
+    features = await run_inference(predict_price_features, data, bundle, stages)
+    predicted_price_per_m2 = await predict_batched(bundle, features, stages)
+    return predict_price_result(data, bundle, predicted_price_per_m2)
 
-def load_real_estate_data():
-    """Load dữ liệu bất động sản từ CSV"""
+def predict_price_features(data: PredictRequest, bundle, stages):
+    """Feature (một dòng) của request"""
     try:
-        df = pd.read_csv("real_estate_data.csv")
-        return df
+        # Encode categorical và tính feature phái sinh (src/features.py)
+        features, invalid = bundle.pipeline.transform(data.model_dump())
+        errors = encoding_errors(bundle, data.model_dump(), invalid)
+        if errors:
+            raise HTTPException(status_code=400, detail=errors[0])
+        stages.mark("features")
+        return features
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Lỗi khi load dữ liệu: {e}")
-        return None
-
-def normalize_district_name(district: str) -> str:
-    """Chuẩn hóa tên quận về format trong dữ liệu training"""
-    # Mapping từ tên có dấu sang tên không dấu
-    district_mapping = {
-        "Quận 1": "Quan 1",
-        "Quận 2": "Quan 2", 
-        "Quận 3": "Quan 3",
-        "Quận 4": "Quan 4",
-        "Quận 5": "Quan 5",
-        "Quận 6": "Quan 6",
-        "Quận 7": "Quan 7",
-        "Quận 8": "Quan 8",
-        "Quận 9": "Quan 9",
-        "Quận 10": "Quan 10",
-        "Quận 11": "Quan 11",
-        "Quận 12": "Quan 12",
-        "Quận Bình Thạnh": "Quan Binh Thanh",
-        "Quận Phú Nhuận": "Quan Phu Nhuan",
-        "Quận Tân Bình": "Quan Tan Binh",
-        "Quận Tân Phú": "Quan Tan Phu",
-        "Quận Gò Vấp": "Quan Go Vap",
-        "Thành phố Thủ Đức": "Thu Duc",
-        "Thủ Đức": "Thu Duc"
+        raise HTTPException(status_code=500, detail=f"Lỗi khi dự đoán: {str(e)}")
+
+def predict_price_result(data: PredictRequest, bundle, predicted_price_per_m2):
+    # Tính tổng giá
+    total_estimated_price = predicted_price_per_m2 * data.area
+
+    return {
+        "estimated_price_per_m2": float(predicted_price_per_m2),
+        "total_estimated_price": float(total_estimated_price),
+        "area": data.area,
+        "normalized_district": normalize_district_name(data.district),
+        "model_version": bundle.version
     }
-    
-    # Nếu có trong mapping thì convert, không thì giữ nguyên
-    return district_mapping.get(district, district)
 
-@app.post("/predict-price")
-def predict_price(data: PredictRequest):
+def encoding_errors(bundle, columns, invalid):
+    """Thông báo lỗi theo vị trí dòng có giá trị categorical không có trong bundle"""
+    def value(column, i):
+        return np.atleast_1d(np.asarray(columns[column], dtype=object))[i]
+
+    errors = {}
+    available_districts = bundle.encoders["district"].classes_.tolist()
+    for i in np.flatnonzero(invalid["district"]):
+        errors[i] = f"District '{value('district', i)}' không được hỗ trợ. Các district có sẵn: {available_districts}"
+    for name, column in (("type", "type"), ("facing", "facing_direction")):
+        for i in np.flatnonzero(invalid[name]):
+            errors.setdefault(i, f"Giá trị không hợp lệ: {column} '{value(column, i)}'")
+    return errors
+
+@app.post("/predict-price/batch")
+async def predict_price_batch(request: BatchPredictRequest):
+    """Dự đoán giá cho nhiều bất động sản: một lần scaler.transform và một lần model.predict"""
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch tối đa {BATCH_MAX_ITEMS} bất động sản, nhận {len(request.items)}"
+        )
+    bundle = current_bundle()
+    if not request.items:
+        return {"results": [], "succeeded": 0, "failed": 0, "model_version": bundle.version}
+    return await run_inference(compute_predict_price_batch, request, bundle)
+
+def compute_predict_price_batch(request: BatchPredictRequest, bundle):
+    stages = StageTimer("predict-price-batch")
     try:
-        # Chuẩn hóa tên district
-        normalized_district = normalize_district_name(data.district)
-        
-        # Kiểm tra district có tồn tại trong training data không
-        try:
-            district_encoded = le_district.transform([normalized_district])[0]
-        except ValueError:
-            available_districts = list(le_district.classes_)
-            raise HTTPException(
-                status_code=400, 
-                detail=f"District '{data.district}' không được hỗ trợ. Các district có sẵn: {available_districts}"
-            )
-        
-        # Encode type và facing_direction
-        try:
-            type_encoded = le_type.transform([data.type])[0]
-            facing_encoded = le_facing.transform([data.facing_direction])[0]
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"Giá trị không hợp lệ: {str(e)}")
-        
-        # Tính toán building_age
-        current_year = 2024
-        building_age = current_year - data.year_built
-        
-        # Tính toán floor_ratio
-        floor_ratio = data.floor / data.total_floors if data.total_floors > 0 else 0
-        
-        # Tính toán avg_distance_to_amenities
-        avg_distance_to_amenities = (
-            data.distance_to_metro_km + 
-            data.distance_to_school_km + 
-            data.distance_to_hospital_km + 
-            data.distance_to_mall_km
-        ) / 4
-        
-        # Tính toán area_density
-        area_density = data.nearby_price_count / (data.distance_to_center_km + 1)
-        
-        # Tính toán price_vs_nearby_ratio (sẽ được tính sau khi có prediction)
-        # Tạm thời set = 1, sẽ cập nhật sau
-        price_vs_nearby_ratio = 1.0
-        
-        # Tạo array features theo đúng thứ tự
-        features = np.array([[
-            data.latitude,
-            data.longitude, 
-            data.bedrooms,
-            data.bathrooms,
-            data.area,
-            district_encoded,
-            type_encoded,
-            facing_encoded,
-            building_age,
-            data.floor,
-            data.total_floors,
-            floor_ratio,
-            data.parking,
-            data.condition_score,
-            data.distance_to_center_km,
-            data.distance_to_metro_km,
-            data.distance_to_school_km,
-            data.distance_to_hospital_km,
-            data.distance_to_mall_km,
-            avg_distance_to_amenities,
-            area_density,
-            data.nearby_avg_price_per_m2,
-            data.nearby_price_count,
-            price_vs_nearby_ratio
-        ]])
-        
-        # Scale features
-        features_scaled = scaler.transform(features)
-        
-        # Predict
-        predicted_price_per_m2 = model.predict(features_scaled)[0]
-        
-        # Tính tổng giá
-        total_estimated_price = predicted_price_per_m2 * data.area
-        
+        items = pd.DataFrame([item.model_dump() for item in request.items])
+
+        # Chuẩn hóa tên district theo từng giá trị khác nhau rồi map lại cho cả cột
+        normalized_district = items['district'].map(
+            {d: normalize_district_name(d) for d in items['district'].unique()}
+        )
+
+        # Dựng feature vector hóa cho cả batch, ghi nhận lỗi encode riêng cho từng item
+        features, invalid = bundle.pipeline.transform(items)
+        errors = encoding_errors(bundle, items, invalid)
+        valid = ~(invalid["district"] | invalid["type"] | invalid["facing"])
+        stages.mark("features")
+        predictions = np.empty(0)
+        if valid.any():
+            # Scale và predict một lần cho cả batch
+            predictions = predict_features(bundle, features[valid], stages)
+
+        results = []
+        prediction_iter = iter(predictions)
+        for i in range(len(items)):
+            if i in errors:
+                results.append({"index": i, "error": errors[i]})
+                continue
+            predicted_price_per_m2 = next(prediction_iter)
+            area = float(items['area'].iat[i])
+            results.append({
+                "index": i,
+                "estimated_price_per_m2": float(predicted_price_per_m2),
+                "total_estimated_price": float(predicted_price_per_m2 * area),
+                "area": float(area),
+                "normalized_district": normalized_district.iat[i],
+            })
+
         return {
-            "estimated_price_per_m2": float(predicted_price_per_m2),
-            "total_estimated_price": float(total_estimated_price),
-            "area": data.area,
-            "normalized_district": normalized_district
+            "results": results,
+            "succeeded": int(valid.sum()),
+            "failed": len(errors),
+            "model_version": bundle.version,
         }
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi khi dự đoán: {str(e)}")
 
 @app.post("/simple-predict-price")
-def simple_predict_price(data: SimplePredictRequest):
+async def simple_predict_price(data: SimplePredictRequest):
+    bundle = current_bundle()
+    snapshot = dataset_store.get()
+    key = (
+        "simple-predict-price",
+        bundle.version,
+        snapshot.version if snapshot is not None else None,
+        cache_coordinate(data.latitude),
+        cache_coordinate(data.longitude),
+        data.bedrooms,
+        normalize_district_name(data.district),
+    )
+    if batcher is None:
+        return await cached_inference(key, lambda: run_inference(compute_simple_predict_price, data, bundle))
+    return await cached_inference(key, lambda: simple_predict_price_batched(data, bundle))
+
+def compute_simple_predict_price(data: SimplePredictRequest, bundle):
+    """Dựng feature, predict và trả kết quả trong một lần gọi (không qua micro-batch)"""
+    stages = StageTimer("simple-predict-price")
+    features, profile = simple_predict_features(data, bundle, stages)
+    try:
+        # Scale và predict
+        predicted_price_per_m2 = predict_features(bundle, features, stages)[0]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi dự đoán: {str(e)}")
+    return simple_predict_result(data, bundle, predicted_price_per_m2, profile)
+
+async def simple_predict_price_batched(data: SimplePredictRequest, bundle):
+    """Dựng feature trong inference executor, predict qua micro-batcher"""
+    stages = StageTimer("simple-predict-price")
+    features, profile = await run_inference(simple_predict_features, data, bundle, stages)
+    predicted_price_per_m2 = await predict_batched(bundle, features, stages)
+    return simple_predict_result(data, bundle, predicted_price_per_m2, profile)
+
+def simple_predict_features(data: SimplePredictRequest, bundle, stages):
+    """Feature của request từ hồ sơ khu vực quanh điểm; trả về (features, profile)"""
     try:
-        # Load dữ liệu bất động sản
-        df = load_real_estate_data()
-        if df is None:
+        # Lấy snapshot dữ liệu đang giữ trong bộ nhớ (không sửa frame dùng chung)
+        snapshot = dataset_store.get()
+        if snapshot is None:
             raise HTTPException(status_code=500, detail="Không thể load dữ liệu bất động sản")
         
-        # Chuẩn hóa tên district
-        normalized_district = normalize_district_name(data.district)
-        
-        # Kiểm tra district có tồn tại trong training data không
-        try:
-            district_encoded = le_district.transform([normalized_district])[0]
-        except ValueError:
-            available_districts = list(le_district.classes_)
-            raise HTTPException(
-                status_code=400, 
-                detail=f"District '{data.district}' không được hỗ trợ. Các district có sẵn: {available_districts}"
+        # Tra hồ sơ khu vực tính sẵn trong lưới; nếu điểm nằm ngoài lưới thì
+        # tìm 5 căn gần nhất (haversine) qua chỉ mục không gian của snapshot:
+        # ưu tiên cùng số phòng ngủ, rồi ±1 phòng, cuối cùng bất kể số phòng ngủ
+        profile = None
+        if snapshot.grid is not None:
+            profile = snapshot.grid.lookup(data.latitude, data.longitude, data.bedrooms)
+            stages.mark("grid_lookup")
+        if profile is None:
+            nearest_positions, _ = snapshot.spatial_index.nearest(
+                data.latitude, data.longitude, data.bedrooms, k=5
             )
+            stages.mark("neighbour_search")
+            columns = snapshot.columns
+            profile = columns.profile_at(columns.aggregate(nearest_positions), 0)
+            stages.mark("aggregate")
         
-        # Tính khoảng cách đến tất cả các điểm trong dataset
-        df['distance'] = df.apply(lambda row: calculate_distance(
-            data.latitude, data.longitude, row['latitude'], row['longitude']
-        ), axis=1)
-        
-        # Lọc các bất động sản có cùng số phòng ngủ hoặc gần số phòng ngủ yêu cầu
-        # Ưu tiên cùng số phòng ngủ, nếu không có thì lấy ±1 phòng
-        same_bedrooms = df[df['bedrooms'] == data.bedrooms]
-        if len(same_bedrooms) >= 5:
-            nearest_df = same_bedrooms.nsmallest(5, 'distance')
-        else:
-            # Nếu không đủ 5 căn cùng số phòng ngủ, lấy thêm căn ±1 phòng
-            similar_bedrooms = df[df['bedrooms'].isin([data.bedrooms-1, data.bedrooms, data.bedrooms+1])]
-            nearest_df = similar_bedrooms.nsmallest(5, 'distance')
-        
-        # Nếu vẫn không đủ 5 căn, lấy 5 căn gần nhất bất kể số phòng ngủ
-        if len(nearest_df) < 5:
-            nearest_df = df.nsmallest(5, 'distance')
-        
-        # Tính trung bình các thông số từ 5 điểm gần nhất
-        avg_area = nearest_df['area'].mean()
-        avg_bathrooms = int(round(nearest_df['bathrooms'].mean()))
-        most_common_type = nearest_df['type'].mode()[0]
-        avg_year_built = int(round(nearest_df['year_built'].mean()))
-        avg_floor = int(round(nearest_df['floor'].mean()))
-        avg_total_floors = int(round(nearest_df['total_floors'].mean()))
-        avg_parking = int(round(nearest_df['parking'].mean()))
-        most_common_facing = nearest_df['facing_direction'].mode()[0]
-        avg_distance_to_center = nearest_df['distance_to_center_km'].mean()
-        avg_distance_to_metro = nearest_df['distance_to_metro_km'].mean()
-        avg_distance_to_school = nearest_df['distance_to_school_km'].mean()
-        avg_distance_to_hospital = nearest_df['distance_to_hospital_km'].mean()
-        avg_distance_to_mall = nearest_df['distance_to_mall_km'].mean()
-        avg_nearby_price_per_m2 = nearest_df['nearby_avg_price_per_m2'].mean()
-        avg_nearby_price_count = int(round(nearest_df['nearby_price_count'].mean()))
-        avg_condition_score = nearest_df['condition_score'].mean()
-        
-        # Encode các thông số cần thiết
-        try:
-            type_encoded = le_type.transform([most_common_type])[0]
-            facing_encoded = le_facing.transform([most_common_facing])[0]
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"Giá trị không hợp lệ: {str(e)}")
-        
-        # Tính toán các thông số phái sinh
-        current_year = 2024
-        building_age = current_year - avg_year_built
-        floor_ratio = avg_floor / avg_total_floors if avg_total_floors > 0 else 0
-        avg_distance_to_amenities = (
-            avg_distance_to_metro + 
-            avg_distance_to_school + 
-            avg_distance_to_hospital + 
-            avg_distance_to_mall
-        ) / 4
-        area_density = avg_nearby_price_count / (avg_distance_to_center + 1)
-        price_vs_nearby_ratio = 1.0  # Tạm thời set = 1
-        
-        # Tạo array features theo đúng thứ tự
-        features = np.array([[
-            data.latitude,
-            data.longitude, 
-            data.bedrooms,
-            avg_bathrooms,
-            avg_area,
-            district_encoded,
-            type_encoded,
-            facing_encoded,
-            building_age,
-            avg_floor,
-            avg_total_floors,
-            floor_ratio,
-            avg_parking,
-            avg_condition_score,
-            avg_distance_to_center,
-            avg_distance_to_metro,
-            avg_distance_to_school,
-            avg_distance_to_hospital,
-            avg_distance_to_mall,
-            avg_distance_to_amenities,
-            area_density,
-            avg_nearby_price_per_m2,
-            avg_nearby_price_count,
-            price_vs_nearby_ratio
-        ]])
-        
-        # Scale features
-        features_scaled = scaler.transform(features)
-        
-        # Predict
-        predicted_price_per_m2 = model.predict(features_scaled)[0]
-        
-        # Tính tổng giá
-        total_estimated_price = predicted_price_per_m2 * avg_area
-        
-        return {
-            "estimated_price_per_m2": float(predicted_price_per_m2),
-            "total_estimated_price": float(total_estimated_price),
+        # Các thông số trung bình từ 5 điểm gần nhất, cộng vị trí và số phòng ngủ của request
+        columns = {**profile, **data.model_dump()}
+        features, invalid = bundle.pipeline.transform(columns)
+        errors = encoding_errors(bundle, columns, invalid)
+        if errors:
+            raise HTTPException(status_code=400, detail=errors[0])
+        stages.mark("features")
+        return features, profile
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi dự đoán: {str(e)}")
+
+def simple_predict_result(data: SimplePredictRequest, bundle, predicted_price_per_m2, profile):
+    # Tính tổng giá
+    avg_area = profile['area']
+    total_estimated_price = predicted_price_per_m2 * avg_area
+
+    return {
+        "estimated_price_per_m2": float(predicted_price_per_m2),
+        "total_estimated_price": float(total_estimated_price),
+        "area": float(avg_area),
+        "normalized_district": normalize_district_name(data.district),
+        "model_version": bundle.version,
+        "nearest_properties_used": profile['count'],
+        "average_parameters_used": {
             "area": float(avg_area),
-            "normalized_district": normalized_district,
-            "nearest_properties_used": len(nearest_df),
-            "average_parameters_used": {
-                "area": float(avg_area),
-                "bathrooms": avg_bathrooms,
-                "type": most_common_type,
-                "year_built": avg_year_built,
-                "floor": avg_floor,
-                "total_floors": avg_total_floors,
-                "parking": avg_parking,
-                "facing_direction": most_common_facing,
-                "condition_score": float(avg_condition_score)
-            }
+            "bathrooms": profile['bathrooms'],
+            "type": profile['type'],
+            "year_built": profile['year_built'],
+            "floor": profile['floor'],
+            "total_floors": profile['total_floors'],
+            "parking": profile['parking'],
+            "facing_direction": profile['facing_direction'],
+            "condition_score": float(profile['condition_score'])
         }
-        
+    }
+
+def render_heatmap(bounds, rows: int, cols: int, bedrooms: int, key: str):
+    """Dự đoán giá/m2 cho lưới rows x cols điểm phủ bounds, có cache trên đĩa"""
+    bundle = current_bundle()
+    try:
+        snapshot = dataset_store.get()
+        if snapshot is None:
+            raise HTTPException(status_code=500, detail="Không thể load dữ liệu bất động sản")
+
+        values = tile_cache.get(bundle.version, snapshot.version, key)
+        cached = values is not None
+        if values is None:
+            stages = StageTimer("heatmap")
+            latitude, longitude = grid_points(*bounds, rows, cols)
+            profile, district = neighbourhood_profiles(snapshot, latitude, longitude, bedrooms)
+            stages.mark("profiles")
+
+            # Dựng feature và predict một lần cho toàn bộ lưới
+            features, invalid = bundle.pipeline.transform({
+                **profile, "latitude": latitude, "longitude": longitude,
+                "bedrooms": bedrooms, "district": district,
+            })
+            valid = ~(invalid["district"] | invalid["type"] | invalid["facing"])
+            stages.mark("features")
+            predictions = predict_features(bundle, features, stages)
+            values = np.where(valid, predictions, np.nan).astype(np.float32).reshape(rows, cols)
+            tile_cache.put(bundle.version, snapshot.version, key, values)
+
+        min_lat, min_lon, max_lat, max_lon = bounds
+        return {
+            "bounds": {"min_lat": min_lat, "min_lon": min_lon, "max_lat": max_lat, "max_lon": max_lon},
+            "rows": rows,
+            "cols": cols,
+            "bedrooms": bedrooms,
+            "model_version": bundle.version,
+            "dataset_version": snapshot.version,
+            "cached": cached,
+            # Giá/m2 làm tròn theo hàng (hàng đầu ở phía bắc), null nếu không dự đoán được
+            "values": np.where(np.isnan(values), None, np.round(values)).tolist(),
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Lỗi khi dự đoán: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Lỗi khi tạo bản đồ nhiệt: {str(e)}")
+
+@app.get("/heatmap/{z}/{x}/{y}")
+async def get_heatmap_tile(z: int, x: int, y: int, bedrooms: int = 2, size: int = HEATMAP_TILE_SIZE):
+    """Bản đồ nhiệt giá/m2 cho tile z/x/y với size x size điểm"""
+    if not 0 <= z <= 22 or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        raise HTTPException(status_code=400, detail=f"Tile {z}/{x}/{y} không hợp lệ")
+    if not 1 <= size <= HEATMAP_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"size phải từ 1 đến {HEATMAP_MAX_SIZE}")
+    key = f"tile_{z}_{x}_{y}_{size}_b{bedrooms}"
+    return await run_inference(render_heatmap, tile_bounds(z, x, y), size, size, bedrooms, key)
+
+@app.get("/heatmap")
+async def get_heatmap_bbox(bbox: str, resolution: float = 0.005, bedrooms: int = 2):
+    """Bản đồ nhiệt giá/m2 cho bbox=min_lon,min_lat,max_lon,max_lat với bước resolution (độ)"""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox phải có dạng min_lon,min_lat,max_lon,max_lat")
+    if min_lon >= max_lon or min_lat >= max_lat or resolution <= 0:
+        raise HTTPException(status_code=400, detail="bbox hoặc resolution không hợp lệ")
+
+    rows = math.ceil((max_lat - min_lat) / resolution)
+    cols = math.ceil((max_lon - min_lon) / resolution)
+    if rows * cols > HEATMAP_MAX_SIZE ** 2:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Lưới {rows}x{cols} quá lớn, tối đa {HEATMAP_MAX_SIZE ** 2} điểm"
+        )
+    key = f"bbox_{min_lon:.6f}_{min_lat:.6f}_{max_lon:.6f}_{max_lat:.6f}_{resolution:g}_b{bedrooms}"
+    return await run_inference(render_heatmap, (min_lat, min_lon, max_lat, max_lon), rows, cols, bedrooms, key)
+
+@app.get("/stats/batching")
+async def get_batching_stats():
+    """Thống kê micro-batching (phân bố kích thước batch)"""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+def collect_metrics():
+    """Cập nhật các metric lấy từ thống kê sẵn có, gọi mỗi lần scrape /metrics"""
+    if result_cache is not None:
+        stats = result_cache.stats()
+        for event in ("hits", "misses", "coalesced", "evictions", "expirations", "invalidations"):
+            CACHE_EVENTS.set(stats[event], event=event)
+        CACHE_ENTRIES.set(stats["entries"])
+    if batcher is not None:
+        BATCH_SIZE.load(batcher.stats()["batch_size_histogram"])
+    stats = inference.stats()
+    for event in ("completed", "failed", "rejected", "timed_out", "expired_in_queue"):
+        EXECUTOR_EVENTS.set(stats[event], event=event)
+    EXECUTOR_JOBS.set(stats["running"], state="running")
+    EXECUTOR_JOBS.set(stats["queued"], state="queued")
+
+    MODEL_INFO.clear()
+    bundle = model_manager.current()
+    if bundle is not None:
+        MODEL_INFO.set(1, version=bundle.version, backend=bundle.backend)
+    DATASET_INFO.clear()
+    snapshot = dataset_store.get()
+    if snapshot is not None:
+        DATASET_INFO.set(1, version=snapshot.version)
+
+REGISTRY.add_collector(collect_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Metrics dạng Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/executor")
+async def get_executor_stats():
+    """Thống kê inference executor (đang chạy, đang chờ, bị từ chối, quá hạn)"""
+    return inference.stats()
+
+@app.get("/stats/cache")
+async def get_cache_stats():
+    """Thống kê cache kết quả dự đoán (hit/miss/eviction)"""
+    if result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **result_cache.stats()}
+
+@app.get("/model")
+async def get_model_info():
+    """Thông tin model bundle đang phục vụ"""
+    bundle = current_bundle()
+    return {
+        "model_version": bundle.version,
+        "created_at": bundle.manifest.get("created_at"),
+        "metrics": bundle.manifest.get("metrics"),
+        "inference_backend": bundle.backend,
+    }
+
+@app.post("/admin/reload-model")
+def reload_model(version: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """Load lại model (mặc định bundle trong models/LATEST) và thay vào không downtime"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoint admin bị tắt (chưa đặt BDS_ADMIN_TOKEN)")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Sai admin token")
+    previous = model_manager.current()
+    try:
+        bundle = model_manager.reload(version)
+    except ModelBundleError as e:
+        raise HTTPException(status_code=409, detail=f"Không thể load model: {str(e)}")
+    return {
+        "model_version": bundle.version,
+        "previous_version": previous.version if previous is not None else None,
+    }
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "API dự đoán giá bất động sản TP.HCM"}
 
 @app.get("/districts")
-def get_available_districts():
+async def get_available_districts():
     """Trả về danh sách các quận có sẵn"""
     try:
-        districts = list(le_district.classes_)
+        districts = list(model_manager.current().encoders["district"].classes_)
         return {"available_districts": districts}
     except:
         return {"error": "Không thể load danh sách districts"}
 
 @app.get("/property-types")
-def get_property_types():
+async def get_property_types():
     """Trả về danh sách loại bất động sản có sẵn"""
     try:
-        types = list(le_type.classes_)
+        types = list(model_manager.current().encoders["type"].classes_)
         return {"available_types": types}
     except:
         return {"error": "Không thể load danh sách property types"}
 
 @app.get("/facing-directions")
-def get_facing_directions():
+async def get_facing_directions():
     """Trả về danh sách hướng nhà có sẵn"""
     try:
-        facings = list(le_facing.classes_)
+        facings = list(model_manager.current().encoders["facing"].classes_)
         return {"available_facings": facings}
     except:
         return {"error": "Không thể load danh sách facing directions"}
@@ -0,0 +1,131 @@
+"""Gom các request dự đoán đơn lẻ đồng thời thành micro-batch
+
+Handler async gửi một dòng feature và chờ Future kết quả trên event loop
+(`asyncio.wrap_future`), không giữ thread nào trong lúc chờ. Thread nền lấy dòng đầu tiên trong hàng đợi, tiếp tục gom thêm cho đến
+khi đủ `max_batch_size` dòng hoặc hết `max_wait_ms`, rồi gọi hàm predict
+vector hóa một lần cho cả batch và trả kết quả về từng request.
+
+Mỗi dòng đi kèm model dùng để dự đoán nó; khi đang đổi model, batch được
+tách theo model để request không bị dự đoán bằng version khác.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        predict_fn: Callable[[Any, np.ndarray], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        """
+        Args:
+            predict_fn: Hàm nhận (model, ma trận feature (n, m)) và trả về n dự đoán
+            max_batch_size: Số dòng tối đa trong một batch
+            max_wait_ms: Thời gian tối đa (ms) chờ gom thêm sau dòng đầu tiên
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Dict[int, int] = {}
+        self._items = 0
+
+    def start(self):
+        if self._worker is not None:
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        if self._worker is None:
+            return
+        self._stop_event.set()
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+        self._worker = None
+
+    def submit(self, model: Any, features: np.ndarray) -> Future:
+        """Gửi một dòng feature (1 chiều) cùng model dùng để dự đoán, trả về Future"""
+        future: Future = Future()
+        self._queue.put((model, np.asarray(features, dtype=float).ravel(), future))
+        return future
+
+    def predict(self, model: Any, features: np.ndarray, timeout: Optional[float] = None) -> float:
+        """Gửi một dòng feature và chờ kết quả"""
+        return self.submit(model, features).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        """Phân bố kích thước batch đã chạy"""
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": batches,
+                "items": self._items,
+                "avg_batch_size": self._items / batches if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            }
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            first = self._queue.get()
+            if first is None:
+                continue
+            batch = self._collect(first)
+            groups: Dict[int, list] = {}
+            for item in batch:
+                # Bỏ dòng mà request đã thôi chờ (hết deadline); sau bước này future không hủy được nữa
+                if item[2].set_running_or_notify_cancel():
+                    groups.setdefault(id(item[0]), []).append(item)
+
+            for group in groups.values():
+                futures = [future for _, _, future in group]
+                try:
+                    predictions = self.predict_fn(group[0][0], np.vstack([row for _, row, _ in group]))
+                    for future, prediction in zip(futures, predictions):
+                        future.set_result(prediction)
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+
+            with self._stats_lock:
+                self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+                self._items += len(batch)
+
+        # Không để request nào treo khi dừng
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[2].set_running_or_notify_cancel():
+                item[2].set_exception(RuntimeError("Micro-batcher đã dừng"))
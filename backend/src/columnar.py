@@ -0,0 +1,277 @@
+"""Snapshot dữ liệu dạng cột thay cho việc parse CSV mỗi lần load
+
+CSV chỉ còn là định dạng nhập: `convert_csv` đọc CSV một lần rồi ghi mỗi cột
+thành một file .npy có kiểu cố định vào `<root>/<version>/`, trỏ file
+`<root>/CURRENT` tới version đó (giống src/shared_store.py):
+
+- cột chuỗi (district, type, ward, facing_direction...) được mã hóa từ điển:
+  mã int8/int16/int32 + danh sách giá trị trong meta.json
+- cột số nguyên dùng kiểu nhỏ nhất chứa được giá trị
+- cột số thực lưu float32 nếu làm tròn lại theo số chữ số thập phân của cột
+  vẫn ra đúng giá trị gốc, khi đọc được khôi phục về float64 y hệt CSV
+
+`read_dataset` nhận cả file CSV lẫn thư mục snapshot nên trainer, API và
+các script khác chỉ cần trỏ BDS_DATASET_PATH tới thư mục snapshot.
+
+    python -m src.columnar real_estate_data.csv real_estate_data.cols
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+# Số chữ số thập phân tối đa xét khi thử lưu float32
+MAX_DECIMALS = 6
+
+
+def is_snapshot(path: str) -> bool:
+    """`path` có phải thư mục snapshot dạng cột không"""
+    return os.path.isfile(os.path.join(path, CURRENT_FILE))
+
+
+def current_path(root: str) -> str:
+    return os.path.join(root, CURRENT_FILE)
+
+
+def current_version(root: str) -> Optional[str]:
+    """Version mà CURRENT đang trỏ tới (None nếu chưa có)"""
+    try:
+        with open(current_path(root)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _smallest_int(values: np.ndarray) -> np.dtype:
+    if len(values) == 0:
+        return np.dtype(np.int8)
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _float_encoding(values: np.ndarray):
+    """(dtype, số chữ số thập phân) để lưu cột số thực không mất giá trị"""
+    for decimals in range(MAX_DECIMALS + 1):
+        if np.array_equal(np.round(values, decimals), values, equal_nan=True):
+            restored = np.round(values.astype(np.float32).astype(np.float64), decimals)
+            if np.array_equal(restored, values, equal_nan=True):
+                return np.dtype(np.float32), decimals
+            break
+    return np.dtype(np.float64), None
+
+
+def encode_column(series: pd.Series):
+    """
+    Mã hóa một cột thành (array lưu xuống đĩa, mô tả cột trong meta.json).
+
+    Returns:
+        (values, spec) với spec có `kind` là "category", "int" hoặc "float"
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.int8), {"kind": "bool"}
+    if pd.api.types.is_integer_dtype(series):
+        values = series.to_numpy()
+        return values.astype(_smallest_int(values)), {"kind": "int"}
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=np.float64)
+        dtype, decimals = _float_encoding(values)
+        return values.astype(dtype), {"kind": "float", "decimals": decimals}
+    # Chuỗi: mã hóa từ điển theo thứ tự từ điển, -1 là giá trị thiếu
+    codes, uniques = pd.factorize(series.astype("string"), sort=True)
+    vocab = [str(value) for value in uniques]
+    return codes.astype(_smallest_int(np.array([-1, len(vocab)]))), {"kind": "category", "vocab": vocab}
+
+
+def decode_column(values: np.ndarray, spec: dict):
+    """Ngược lại của `encode_column`"""
+    kind = spec["kind"]
+    if kind == "category":
+        return pd.Categorical.from_codes(values, categories=spec["vocab"])
+    if kind == "bool":
+        return values.astype(bool)
+    if kind == "float":
+        values = values.astype(np.float64)
+        if spec.get("decimals") is not None:
+            values = np.round(values, spec["decimals"])
+        return values
+    return values
+
+
+def write_snapshot(frame: pd.DataFrame, root: str, version: Optional[str] = None, keep: int = 2) -> str:
+    """
+    Ghi frame thành snapshot dạng cột và trỏ CURRENT tới nó.
+
+    Args:
+        frame: Dữ liệu cần ghi
+        root: Thư mục snapshot
+        version: Version của dữ liệu (mặc định: hash nội dung các cột)
+        keep: Số version giữ lại (process khác có thể vẫn đang đọc version trước)
+
+    Returns:
+        Version đã ghi
+    """
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".snapshot-", dir=root)
+    try:
+        digest = hashlib.sha256()
+        columns = {}
+        for i, name in enumerate(frame.columns):
+            values, spec = encode_column(frame[name])
+            file_name = f"{i:03d}.npy"
+            np.save(os.path.join(staging, file_name), values, allow_pickle=False)
+            spec.update({"file": file_name, "dtype": values.dtype.str})
+            columns[str(name)] = spec
+            digest.update(json.dumps([str(name), spec], ensure_ascii=False).encode())
+            digest.update(np.ascontiguousarray(values).data)
+        version = version or digest.hexdigest()[:16]
+        meta = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "rows": len(frame),
+            "columns": columns,
+            "written_at": time.time(),
+        }
+        with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        target = os.path.join(root, version)
+        if os.path.exists(target):
+            shutil.rmtree(staging)
+        else:
+            os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Đổi CURRENT bằng rename để người đọc không thấy file dở dang
+    current_tmp = os.path.join(root, f".{CURRENT_FILE}.tmp")
+    with open(current_tmp, "w") as f:
+        f.write(version)
+    os.replace(current_tmp, current_path(root))
+
+    versions = [
+        entry for entry in os.listdir(root)
+        if not entry.startswith(".") and os.path.isdir(os.path.join(root, entry))
+    ]
+    versions.sort(key=lambda entry: os.path.getmtime(os.path.join(root, entry)), reverse=True)
+    for entry in versions[keep:]:
+        if entry != version:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return version
+
+
+def read_snapshot(root: str, version: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Đọc snapshot dạng cột thành DataFrame (cột chuỗi thành pandas Categorical).
+
+    Args:
+        root: Thư mục snapshot
+        version: Version cần đọc (mặc định: CURRENT)
+        columns: Chỉ đọc các cột này (mặc định: tất cả)
+
+    Raises:
+        FileNotFoundError: Nếu chưa có snapshot nào
+    """
+    version = version or current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"Không có snapshot trong {root}")
+    directory = os.path.join(root, version)
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Snapshot {directory} có format {meta.get('format')}, cần {FORMAT_VERSION}")
+
+    names = columns if columns is not None else list(meta["columns"])
+    data = {}
+    for name in names:
+        spec = meta["columns"][name]
+        data[name] = decode_column(np.load(os.path.join(directory, spec["file"])), spec)
+    return pd.DataFrame(data, columns=names)
+
+
+def read_dataset(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Đọc dữ liệu từ thư mục snapshot dạng cột hoặc file CSV"""
+    if is_snapshot(path):
+        return read_snapshot(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_dataset(path: str, chunk_rows: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Đọc dữ liệu theo từng khối tối đa `chunk_rows` dòng, không load cả file vào bộ nhớ.
+
+    Với snapshot dạng cột, các cột được memory-map và chỉ khối đang đọc được
+    giải mã; version được cố định khi bắt đầu đọc.
+    """
+    if not is_snapshot(path):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+        return
+
+    version = current_version(path)
+    directory = os.path.join(path, version)
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    names = columns if columns is not None else list(meta["columns"])
+    arrays = {
+        name: np.load(os.path.join(directory, meta["columns"][name]["file"]), mmap_mode="r")
+        for name in names
+    }
+    for start in range(0, meta["rows"], chunk_rows):
+        yield pd.DataFrame(
+            {
+                name: decode_column(np.asarray(arrays[name][start:start + chunk_rows]), meta["columns"][name])
+                for name in names
+            },
+            index=pd.RangeIndex(start, min(start + chunk_rows, meta["rows"])),
+            columns=names,
+        )
+
+
+def convert_csv(csv_path: str, root: str, keep: int = 2) -> str:
+    """
+    Chuyển file CSV thành snapshot dạng cột.
+
+    Version là sha256 nội dung file CSV (giống DatasetStore), nên lưới hồ sơ
+    khu vực đã dựng từ CSV vẫn dùng lại được với snapshot.
+
+    Returns:
+        Version đã ghi
+    """
+    with open(csv_path, "rb") as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:16]
+    return write_snapshot(pd.read_csv(csv_path), root, version=version, keep=keep)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chuyển CSV dữ liệu bất động sản thành snapshot dạng cột")
+    parser.add_argument("csv", help="File CSV đầu vào")
+    parser.add_argument("output", help="Thư mục snapshot đầu ra")
+    parser.add_argument("--keep", type=int, default=2, help="Số version giữ lại")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    version = convert_csv(args.csv, args.output, keep=args.keep)
+    directory = os.path.join(args.output, version)
+    size_mb = sum(entry.stat().st_size for entry in os.scandir(directory)) / 1e6
+    print(
+        f"✅ Đã ghi snapshot {version} ({size_mb:.1f} MB) vào {args.output} "
+        f"trong {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
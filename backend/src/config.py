@@ -0,0 +1,81 @@
+"""Cấu hình backend, đọc từ biến môi trường (tiền tố BDS_)"""
+import os
+
+
+def env_str(name: str, default: str) -> str:
+    return os.getenv(f"BDS_{name}", default)
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(f"BDS_{name}", default))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(os.getenv(f"BDS_{name}", default))
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(f"BDS_{name}")
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Thư mục chứa các model bundle (xem src/model_bundle.py)
+MODEL_DIR = env_str("MODEL_DIR", "models")
+# Chu kỳ (giây) kiểm tra models/LATEST để load lại model, <= 0 để tắt
+MODEL_WATCH_INTERVAL = env_float("MODEL_WATCH_INTERVAL", 5.0)
+# Token cho các endpoint /admin (header X-Admin-Token); để trống = tắt các endpoint /admin
+ADMIN_TOKEN = env_str("ADMIN_TOKEN", "")
+# Cách chạy model: "xgboost" (predict của XGBoost) hoặc "compiled" (src/tree_compiler.py)
+INFERENCE_BACKEND = env_str("INFERENCE_BACKEND", "xgboost")
+# Với backend "compiled", batch lớn hơn số dòng này vẫn chạy bằng XGBoost (nhanh hơn khi batch lớn)
+INFERENCE_COMPILED_MAX_ROWS = env_int("INFERENCE_COMPILED_MAX_ROWS", 32)
+
+# Dữ liệu tham chiếu cho /simple-predict-price: file CSV hoặc thư mục snapshot dạng cột (src/columnar.py)
+DATASET_PATH = env_str("DATASET_PATH", "real_estate_data.csv")
+# Cache ma trận feature cho trainer (xem src/feature_cache.py), để trống = không cache
+FEATURE_CACHE_DIR = env_str("FEATURE_CACHE_DIR", "feature_cache")
+# Số mục cache giữ lại (mỗi mục ứng với một version dữ liệu)
+FEATURE_CACHE_KEEP = env_int("FEATURE_CACHE_KEEP", 3)
+# Số dòng mỗi khối khi train out-of-core (src/streaming_train.py), quyết định bộ nhớ tối đa
+TRAIN_CHUNK_ROWS = env_int("TRAIN_CHUNK_ROWS", 250_000)
+# Chu kỳ (giây) kiểm tra file dữ liệu thay đổi, <= 0 để tắt theo dõi
+DATASET_WATCH_INTERVAL = env_float("DATASET_WATCH_INTERVAL", 5.0)
+# Thư mục dữ liệu dùng chung giữa các worker (xem src/shared_store.py);
+# src/serve.py tự đặt biến này, để trống = mỗi process tự load dữ liệu
+SHARED_DIR = env_str("SHARED_DIR", "")
+
+# Lưới hồ sơ khu vực tính trước (xem src/neighbourhood_grid.py)
+GRID_ENABLED = env_bool("GRID_ENABLED", True)
+GRID_PATH = env_str("GRID_PATH", "neighbourhood_grid.npz")
+# Kích thước ô lưới (độ), 0.005 độ ~ 550 m
+GRID_RESOLUTION = env_float("GRID_RESOLUTION", 0.005)
+GRID_MAX_CELLS = env_int("GRID_MAX_CELLS", 1_000_000)
+
+# Số bất động sản tối đa trong một request /predict-price/batch
+BATCH_MAX_ITEMS = env_int("BATCH_MAX_ITEMS", 100_000)
+
+# Executor riêng cho dự đoán (xem src/executor.py)
+INFERENCE_WORKERS = env_int("INFERENCE_WORKERS", 4)
+# Số request tối đa chờ khi mọi thread đang bận, vượt quá thì trả 429
+INFERENCE_QUEUE_SIZE = env_int("INFERENCE_QUEUE_SIZE", 64)
+# Deadline (giây) của một request dự đoán, tính cả thời gian chờ; quá thì trả 503
+INFERENCE_TIMEOUT = env_float("INFERENCE_TIMEOUT", 5.0)
+
+# Micro-batching các request dự đoán đơn lẻ (xem src/batching.py)
+MICRO_BATCH_ENABLED = env_bool("MICRO_BATCH_ENABLED", False)
+MICRO_BATCH_MAX_SIZE = env_int("MICRO_BATCH_MAX_SIZE", 32)
+MICRO_BATCH_MAX_WAIT_MS = env_float("MICRO_BATCH_MAX_WAIT_MS", 2.0)
+
+# Bản đồ nhiệt giá theo tile (xem src/heatmap.py)
+HEATMAP_CACHE_DIR = env_str("HEATMAP_CACHE_DIR", "tile_cache")
+HEATMAP_TILE_SIZE = env_int("HEATMAP_TILE_SIZE", 32)
+HEATMAP_MAX_SIZE = env_int("HEATMAP_MAX_SIZE", 256)
+
+# Cache kết quả dự đoán (xem src/result_cache.py)
+RESULT_CACHE_ENABLED = env_bool("RESULT_CACHE_ENABLED", True)
+RESULT_CACHE_MAX_ENTRIES = env_int("RESULT_CACHE_MAX_ENTRIES", 10000)
+RESULT_CACHE_TTL = env_float("RESULT_CACHE_TTL", 300.0)
+# Số chữ số thập phân giữ lại của tọa độ trong khóa cache (4 ~ 11 m)
+RESULT_CACHE_COORD_PRECISION = env_int("RESULT_CACHE_COORD_PRECISION", 4)
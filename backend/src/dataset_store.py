@@ -0,0 +1,210 @@
+"""Kho dữ liệu bất động sản dùng chung trong process (chỉ đọc)
+
+Dữ liệu được load một lần khi khởi động và giữ trong bộ nhớ. Một thread nền
+theo dõi mtime/kích thước file, chỉ khi nội dung (sha256) thực sự đổi mới
+load lại. Snapshot mới được dựng xong hoàn toàn rồi mới thay thế snapshot cũ
+bằng một phép gán tham chiếu, nên request đang chạy luôn thấy một snapshot
+trọn vẹn.
+
+Mỗi snapshot mang theo các cấu trúc dựng sẵn từ frame: chỉ mục không gian,
+các cột dạng numpy array và (nếu bật) lưới hồ sơ khu vực. Lưới được cập nhật
+tăng dần từ snapshot trước hoặc từ file lưới đã dựng offline.
+
+`path` có thể là file CSV hoặc thư mục snapshot dạng cột (src/columnar.py);
+với thư mục, store theo dõi file CURRENT và version chính là version snapshot.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+from src.columnar import current_path, is_snapshot, read_snapshot
+from src.neighbourhood_grid import ListingColumns, NeighbourhoodGrid, build_grid, update_grid
+from src.spatial_index import SpatialIndex
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """
+    Một phiên bản dữ liệu đã load. Không được sửa `frame` tại chỗ.
+
+    `frame` là None khi snapshot được gắn từ thư mục chia sẻ (src/shared_store.py):
+    worker chỉ dùng các cấu trúc dựng sẵn.
+    """
+
+    frame: Optional[pd.DataFrame]
+    spatial_index: SpatialIndex
+    columns: ListingColumns
+    grid: Optional[NeighbourhoodGrid]
+    version: str
+    mtime: float
+    size: int
+    loaded_at: float
+
+
+class DatasetStore:
+    def __init__(
+        self,
+        path: str,
+        watch_interval: float = 5.0,
+        grid_resolution: Optional[float] = None,
+        grid_path: Optional[str] = None,
+        grid_max_cells: int = 1_000_000,
+    ):
+        """
+        Args:
+            path: File CSV hoặc thư mục snapshot dạng cột
+            watch_interval: Chu kỳ (giây) kiểm tra file thay đổi
+            grid_resolution: Kích thước ô lưới hồ sơ khu vực (None = không dựng lưới)
+            grid_path: File .npz lưu lưới giữa các lần khởi động
+            grid_max_cells: Số ô tối đa của lưới
+        """
+        self.path = path
+        self.watch_interval = watch_interval
+        self.grid_resolution = grid_resolution
+        self.grid_path = grid_path
+        self.grid_max_cells = grid_max_cells
+        self._snapshot: Optional[DatasetSnapshot] = None
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[DatasetSnapshot], None]] = []
+
+    def add_listener(self, callback: Callable[[DatasetSnapshot], None]):
+        """Đăng ký hàm được gọi sau mỗi lần snapshot mới được thay vào"""
+        self._listeners.append(callback)
+
+    def get(self) -> Optional[DatasetSnapshot]:
+        """Trả về snapshot hiện tại (None nếu chưa load được)"""
+        return self._snapshot
+
+    def load(self) -> Optional[DatasetSnapshot]:
+        """Load dữ liệu lần đầu, lỗi chỉ được in ra để server vẫn khởi động"""
+        try:
+            self.reload_if_changed()
+        except Exception as e:
+            print(f"Lỗi khi load dữ liệu: {e}")
+        return self._snapshot
+
+    def reload_if_changed(self) -> bool:
+        """Load lại nếu file đã đổi. Trả về True nếu snapshot được thay thế."""
+        with self._reload_lock:
+            columnar = is_snapshot(self.path)
+            stat = os.stat(current_path(self.path) if columnar else self.path)
+            current = self._snapshot
+            if (
+                current is not None
+                and current.mtime == stat.st_mtime
+                and current.size == stat.st_size
+            ):
+                return False
+
+            if columnar:
+                with open(current_path(self.path)) as f:
+                    version = f.read().strip()
+            else:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                version = hashlib.sha256(raw).hexdigest()[:16]
+
+            if current is not None and current.version == version:
+                # Chỉ mtime đổi (touch, copy lại cùng nội dung): giữ nguyên frame
+                self._snapshot = replace(current, mtime=stat.st_mtime, size=stat.st_size)
+                return False
+
+            frame = read_snapshot(self.path, version) if columnar else pd.read_csv(io.BytesIO(raw))
+            snapshot = self._build_snapshot(frame, version, stat, current)
+            self._snapshot = snapshot
+            print(f"Đã load dữ liệu {self.path}: {len(snapshot.frame)} dòng, version {version}")
+            for callback in self._listeners:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    print(f"Lỗi khi xử lý sự kiện load dữ liệu: {e}")
+            return True
+
+    def _build_snapshot(
+        self,
+        frame: pd.DataFrame,
+        version: str,
+        stat: os.stat_result,
+        previous: Optional[DatasetSnapshot],
+    ) -> DatasetSnapshot:
+        # Dựng chỉ mục không gian và lưới trước khi swap để request không phải chờ
+        spatial_index = SpatialIndex.from_frame(frame)
+        columns = ListingColumns(frame)
+        grid = self._build_grid(frame, spatial_index, columns, version, previous)
+        return DatasetSnapshot(
+            frame=frame,
+            spatial_index=spatial_index,
+            columns=columns,
+            grid=grid,
+            version=version,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            loaded_at=time.time(),
+        )
+
+    def _build_grid(
+        self,
+        frame: pd.DataFrame,
+        spatial_index: SpatialIndex,
+        columns: ListingColumns,
+        version: str,
+        previous: Optional[DatasetSnapshot],
+    ) -> Optional[NeighbourhoodGrid]:
+        if self.grid_resolution is None:
+            return None
+        try:
+            base = previous.grid if previous is not None else None
+            if base is None and self.grid_path and os.path.exists(self.grid_path):
+                base = NeighbourhoodGrid.load(self.grid_path)
+            if base is not None and base.cell_deg != self.grid_resolution:
+                base = None
+
+            if base is not None and base.dataset_version == version:
+                return base
+            if base is not None:
+                grid = update_grid(base, frame, spatial_index, version, columns=columns)
+            else:
+                grid = build_grid(
+                    frame, spatial_index, self.grid_resolution, version,
+                    columns=columns, max_cells=self.grid_max_cells,
+                )
+            if self.grid_path:
+                grid.save(self.grid_path)
+            return grid
+        except Exception as e:
+            # Không có lưới thì endpoint vẫn tính trực tiếp từ láng giềng gần nhất
+            print(f"Lỗi khi dựng lưới hồ sơ khu vực: {e}")
+            return None
+
+    def start_watching(self):
+        """Chạy thread nền theo dõi file dữ liệu"""
+        if self.watch_interval <= 0 or self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, name="dataset-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+        self._stop_event.set()
+        self._watcher.join(timeout=self.watch_interval + 1)
+        self._watcher = None
+
+    def _watch_loop(self):
+        while not self._stop_event.wait(self.watch_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # Giữ snapshot cũ nếu file mới lỗi hoặc đang được ghi dở
+                print(f"Lỗi khi load lại dữ liệu: {e}")
@@ -0,0 +1,120 @@
+"""Executor riêng cho việc dự đoán, có hàng đợi giới hạn và từ chối sớm
+
+Handler dự đoán (async) gửi phần tính toán nặng vào một thread pool riêng
+thay vì threadpool mặc định của FastAPI, nên các endpoint nhẹ (/districts,
+/property-types...) không phải xếp hàng sau model. Tổng số việc đang chạy
+và đang chờ bị giới hạn ở `max_workers + max_queue`:
+
+- hàng đợi đầy: từ chối ngay bằng `ExecutorSaturated` (HTTP 429)
+- quá deadline của request: `DeadlineExceeded` (HTTP 503); việc chưa bắt
+  đầu thì bị hủy, việc đang chạy vẫn giữ chỗ đến khi xong
+
+numpy/XGBoost/BallTree nhả GIL trong phần tính toán chính nên thread pool
+đủ để chạy song song trong một process; muốn nhiều process hơn thì dùng
+nhiều worker (src/serve.py).
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class ExecutorSaturated(Exception):
+    """Hàng đợi dự đoán đã đầy"""
+
+
+class DeadlineExceeded(Exception):
+    """Request không hoàn thành trước deadline"""
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers: int = 4, max_queue: int = 64, timeout: float = 5.0):
+        """
+        Args:
+            max_workers: Số thread chạy dự đoán
+            max_queue: Số việc tối đa được chờ khi mọi thread đang bận
+            timeout: Deadline mặc định (giây) của một request, tính cả thời gian chờ
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._counters = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "expired_in_queue": 0}
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._counters["rejected"] += 1
+                raise ExecutorSaturated(
+                    f"Hàng đợi dự đoán đã đầy ({self.max_workers} đang chạy, {self.max_queue} đang chờ)"
+                )
+            self._pending += 1
+
+    def _release(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is None:
+                self._counters["completed"] += 1
+            elif not isinstance(future.exception(), DeadlineExceeded):
+                self._counters["failed"] += 1
+
+    def _call(self, deadline: float, fn: Callable, args: tuple) -> Any:
+        # Hết hạn khi còn trong hàng đợi: bỏ luôn, không tốn thời gian tính
+        if time.monotonic() >= deadline:
+            with self._lock:
+                self._counters["expired_in_queue"] += 1
+            raise DeadlineExceeded("Request hết hạn khi đang chờ trong hàng đợi")
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """
+        Chạy `fn(*args)` trong pool và chờ kết quả.
+
+        Raises:
+            ExecutorSaturated: nếu hàng đợi đầy
+            DeadlineExceeded: nếu quá `timeout` (mặc định `self.timeout`) giây
+        """
+        timeout = self.timeout if timeout is None else timeout
+        self._acquire()
+        deadline = time.monotonic() + timeout
+        try:
+            future = self._pool.submit(self._call, deadline, fn, args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._counters["timed_out"] += 1
+            raise DeadlineExceeded(f"Dự đoán không xong trong {timeout:g} giây")
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                **self._counters,
+            }
@@ -0,0 +1,239 @@
+"""Cache ma trận feature đã tính cho trainer, đánh địa chỉ theo nội dung
+
+Đọc dữ liệu, bỏ dòng thiếu, mã hóa categorical, tính feature phái sinh và
+scale giống hệt nhau giữa các lần train khi dữ liệu không đổi (chỉ đổi
+hyperparameter). Kết quả được lưu vào `<cache_dir>/<key>/` với key là hash của:
+
+- version dữ liệu (sha256 file CSV, hoặc version snapshot dạng cột - trùng với
+  sha256 của CSV gốc nên CSV và snapshot của nó dùng chung cache)
+- FEATURE_PIPELINE_VERSION, thứ tự feature và năm tính tuổi nhà
+
+Mỗi mục cache gồm các file .npy thuần (feature chưa scale, feature đã scale,
+target, hash dòng, từ điển categorical, tham số scaler) và được memory-map khi
+dùng lại, nên lần train sau bỏ qua hoàn toàn bước tiền xử lý.
+
+    data = load_features()
+    model.fit(data.scaled[train_rows], data.target[train_rows])
+"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from src.columnar import current_version, is_snapshot, read_dataset
+from src.config import DATASET_PATH, FEATURE_CACHE_DIR, FEATURE_CACHE_KEEP
+from src.features import (
+    CATEGORICAL_COLUMNS, FEATURE_COLUMNS, FEATURE_PIPELINE_VERSION, INPUT_COLUMNS, FeaturePipeline, category_tables,
+)
+from src.model_bundle import StandardScaling
+
+META_FILE = "meta.json"
+ARRAYS = ("features", "scaled", "target", "row_hashes", "scaler_mean", "scaler_scale")
+
+
+def prepare_training_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Bỏ dòng thiếu và tính giá mỗi m2 (dùng cho cả toàn bộ dữ liệu lẫn từng khối)"""
+    df = df.dropna()
+    df['price_per_m2'] = df['price'] / df['area']
+    return df
+
+
+def load_training_data(path: str = DATASET_PATH) -> pd.DataFrame:
+    """Đọc dữ liệu (CSV hoặc snapshot dạng cột), bỏ dòng thiếu và tính giá mỗi m2"""
+    return prepare_training_frame(read_dataset(path))
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash (uint64) nội dung từng dòng, giống nhau dù đọc từ CSV hay snapshot dạng cột"""
+    categorical = set(CATEGORICAL_COLUMNS.values())
+    canonical = pd.DataFrame({
+        name: df[name].astype(str) if name in categorical else df[name].astype(np.float64)
+        for name in INPUT_COLUMNS + ('price',)
+    })
+    return pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+
+
+def dataset_version(path: str) -> str:
+    """Version nội dung của dữ liệu: version snapshot, hoặc sha256 file CSV (giống DatasetStore)"""
+    if is_snapshot(path):
+        return current_version(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def cache_key(version: str, reference_year: int) -> str:
+    payload = {
+        "dataset": version,
+        "pipeline": FEATURE_PIPELINE_VERSION,
+        "features": list(FEATURE_COLUMNS),
+        "reference_year": reference_year,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class FeatureSet:
+    """Ma trận feature của toàn bộ dữ liệu training (mảng có thể là memory-map)"""
+
+    def __init__(
+        self,
+        key: str,
+        features: np.ndarray,
+        scaled: np.ndarray,
+        target: np.ndarray,
+        row_hashes: np.ndarray,
+        pipeline: FeaturePipeline,
+        scaler: StandardScaling,
+        cached: bool,
+    ):
+        self.key = key
+        self.features = features
+        self.scaled = scaled
+        self.target = target
+        self.row_hashes = row_hashes
+        self.pipeline = pipeline
+        self.scaler = scaler
+        self.cached = cached
+
+    def __len__(self) -> int:
+        return len(self.target)
+
+
+def _compute(path: str, key: str, reference_year: int) -> FeatureSet:
+    df = load_training_data(path)
+    pipeline = FeaturePipeline.fit(df, reference_year)
+    features, _ = pipeline.transform(df)
+    scaler = StandardScaler()
+    scaled = scaler.fit_transform(features)
+    return FeatureSet(
+        key,
+        features,
+        scaled,
+        df['price_per_m2'].to_numpy(dtype=np.float64),
+        row_hashes(df),
+        pipeline,
+        StandardScaling(scaler.mean_, scaler.scale_),
+        cached=False,
+    )
+
+
+def _write(data: FeatureSet, cache_dir: str):
+    """Ghi mục cache vào thư mục tạm rồi rename, process khác không thấy mục dở dang"""
+    os.makedirs(cache_dir, exist_ok=True)
+    target = os.path.join(cache_dir, data.key)
+    if os.path.exists(target):
+        return
+    staging = tempfile.mkdtemp(prefix=".features-", dir=cache_dir)
+    try:
+        arrays = {
+            "features": data.features,
+            "scaled": data.scaled,
+            "target": data.target,
+            "row_hashes": data.row_hashes,
+            "scaler_mean": data.scaler.mean_,
+            "scaler_scale": data.scaler.scale_,
+        }
+        for name, table in data.pipeline.tables.items():
+            arrays[f"vocab_{name}"] = np.asarray(table.classes_, dtype=str)
+        for name, values in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), values, allow_pickle=False)
+        meta = {
+            "key": data.key,
+            "rows": len(data),
+            "reference_year": data.pipeline.reference_year,
+            "pipeline_version": FEATURE_PIPELINE_VERSION,
+            "encoders": sorted(data.pipeline.tables),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def _read(directory: str, key: str) -> FeatureSet:
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    def array(name):
+        return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+
+    values: Dict[str, np.ndarray] = {name: array(name) for name in ARRAYS}
+    pipeline = FeaturePipeline(
+        category_tables({name: array(f"vocab_{name}") for name in meta["encoders"]}),
+        meta["reference_year"],
+    )
+    return FeatureSet(
+        key,
+        values["features"],
+        values["scaled"],
+        values["target"],
+        values["row_hashes"],
+        pipeline,
+        StandardScaling(values["scaler_mean"], values["scaler_scale"]),
+        cached=True,
+    )
+
+
+def _prune(cache_dir: str, keep: int):
+    """Chỉ giữ `keep` mục được dùng gần nhất"""
+    entries = [
+        entry for entry in os.scandir(cache_dir)
+        if entry.is_dir() and not entry.name.startswith(".")
+    ]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def load_features(
+    path: str = DATASET_PATH,
+    cache_dir: Optional[str] = FEATURE_CACHE_DIR,
+    reference_year: Optional[int] = None,
+) -> FeatureSet:
+    """
+    Ma trận feature của dữ liệu `path`, lấy từ cache nếu đã tính với cùng dữ liệu và pipeline.
+
+    Args:
+        path: File CSV hoặc thư mục snapshot dạng cột
+        cache_dir: Thư mục cache (rỗng/None = không dùng cache)
+        reference_year: Năm tính tuổi nhà (mặc định năm hiện tại)
+
+    Returns:
+        FeatureSet; `cached` cho biết có lấy từ cache không
+    """
+    reference_year = reference_year or datetime.date.today().year
+    key = cache_key(dataset_version(path), reference_year)
+    if not cache_dir:
+        return _compute(path, key, reference_year)
+
+    directory = os.path.join(cache_dir, key)
+    if os.path.isfile(os.path.join(directory, META_FILE)):
+        try:
+            data = _read(directory, key)
+            # Đánh dấu vừa dùng để _prune giữ lại
+            os.utime(directory)
+            return data
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Lỗi khi đọc cache feature {key}, tính lại: {e}")
+            shutil.rmtree(directory, ignore_errors=True)
+
+    data = _compute(path, key, reference_year)
+    try:
+        _write(data, cache_dir)
+        _prune(cache_dir, FEATURE_CACHE_KEEP)
+    except OSError as e:
+        print(f"Lỗi khi ghi cache feature {key}: {e}")
+    return data
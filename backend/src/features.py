@@ -0,0 +1,249 @@
+"""Pipeline feature dùng chung cho train và serve
+
+Trainer, /predict-price, /predict-price/batch, /simple-predict-price và bản đồ
+nhiệt đều dựng ma trận feature qua `FeaturePipeline.transform`, nên thứ tự
+feature và cách tính các feature phái sinh chỉ được viết một lần.
+
+Mỗi biến categorical được biên dịch thành một bảng tra dict chuỗi -> mã
+(`CategoryTable`), bảng của quận có sẵn cả tên có dấu ("Quận 1" -> mã của
+"Quan 1"). Năm dùng để tính tuổi nhà được lưu trong bundle lúc train.
+
+    pipeline = FeaturePipeline.fit(df)
+    features, invalid = pipeline.transform(df)          # N dòng
+    features, invalid = pipeline.transform(item_dict)   # 1 dòng, giá trị scalar
+"""
+import datetime
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Tăng khi cách tính feature thay đổi (làm mất hiệu lực cache của src/feature_cache.py)
+FEATURE_PIPELINE_VERSION = 1
+
+FEATURE_COLUMNS = (
+    'latitude', 'longitude', 'bedrooms', 'bathrooms', 'area',
+    'district_encoded', 'type_encoded', 'facing_encoded',
+    'building_age', 'floor', 'total_floors', 'floor_ratio',
+    'parking', 'condition_score',
+    'distance_to_center_km', 'distance_to_metro_km',
+    'distance_to_school_km', 'distance_to_hospital_km', 'distance_to_mall_km',
+    'avg_distance_to_amenities', 'area_density',
+    'nearby_avg_price_per_m2', 'nearby_price_count', 'price_vs_nearby_ratio',
+)
+# Các cột số được đưa thẳng vào feature
+NUMERIC_COLUMNS = (
+    'latitude', 'longitude', 'bedrooms', 'bathrooms', 'area',
+    'floor', 'total_floors', 'parking', 'condition_score',
+    'distance_to_center_km', 'distance_to_metro_km',
+    'distance_to_school_km', 'distance_to_hospital_km', 'distance_to_mall_km',
+    'nearby_avg_price_per_m2', 'nearby_price_count',
+)
+# Tên encoder trong bundle -> cột dữ liệu gốc
+CATEGORICAL_COLUMNS = {'district': 'district', 'type': 'type', 'facing': 'facing_direction'}
+INPUT_COLUMNS = NUMERIC_COLUMNS + ('year_built',) + tuple(CATEGORICAL_COLUMNS.values())
+
+# Năm tính tuổi nhà của các bundle cũ (chưa lưu reference_year)
+DEFAULT_REFERENCE_YEAR = 2024
+
+# Tên quận có dấu -> tên trong dữ liệu training
+DISTRICT_ALIASES = {
+    "Quận 1": "Quan 1",
+    "Quận 2": "Quan 2",
+    "Quận 3": "Quan 3",
+    "Quận 4": "Quan 4",
+    "Quận 5": "Quan 5",
+    "Quận 6": "Quan 6",
+    "Quận 7": "Quan 7",
+    "Quận 8": "Quan 8",
+    "Quận 9": "Quan 9",
+    "Quận 10": "Quan 10",
+    "Quận 11": "Quan 11",
+    "Quận 12": "Quan 12",
+    "Quận Bình Thạnh": "Quan Binh Thanh",
+    "Quận Phú Nhuận": "Quan Phu Nhuan",
+    "Quận Tân Bình": "Quan Tan Binh",
+    "Quận Tân Phú": "Quan Tan Phu",
+    "Quận Gò Vấp": "Quan Go Vap",
+    "Thành phố Thủ Đức": "Thu Duc",
+    "Thủ Đức": "Thu Duc",
+}
+
+
+def normalize_district_name(district: str) -> str:
+    """Chuẩn hóa tên quận về format trong dữ liệu training (không có trong bảng thì giữ nguyên)"""
+    return DISTRICT_ALIASES.get(district, district)
+
+
+class CategoryTable:
+    """
+    Bảng tra chuỗi -> mã của một biến categorical, `classes_` theo thứ tự mã.
+
+    Bảng dựng bằng `fit` sắp xếp như LabelEncoder; `extend` chỉ thêm giá trị
+    mới vào cuối nên mã đã có không bao giờ đổi.
+    """
+
+    def __init__(self, classes, aliases: Optional[Mapping[str, str]] = None):
+        self.classes_ = np.asarray(classes, dtype=str)
+        self.aliases = dict(aliases or {})
+        self._codes = {value: code for code, value in enumerate(self.classes_.tolist())}
+        for alias, target in (aliases or {}).items():
+            if target in self._codes:
+                self._codes.setdefault(alias, self._codes[target])
+
+    @classmethod
+    def fit(cls, values, aliases: Optional[Mapping[str, str]] = None) -> "CategoryTable":
+        values = pd.unique(np.asarray(values, dtype=object))
+        if aliases:
+            values = [aliases.get(value, value) for value in values]
+        return cls(np.unique(np.asarray(values, dtype=str)), aliases)
+
+    def extend(self, values) -> "CategoryTable":
+        """Bảng mới giữ nguyên mã cũ, các giá trị chưa có được thêm vào cuối (theo thứ tự từ điển)"""
+        values = pd.unique(np.asarray(values, dtype=object))
+        unseen = {self.aliases.get(value, value) for value in values} - set(self._codes)
+        return CategoryTable(np.concatenate([self.classes_, sorted(str(value) for value in unseen)]), self.aliases)
+
+    def code(self, value: str) -> int:
+        """Mã của một giá trị (-1 nếu không có trong bảng)"""
+        return self._codes.get(value, -1)
+
+    def lookup(self, values) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tra mã cho một mảng giá trị.
+
+        Returns:
+            (codes, valid): mã int64 (-1 nếu không có trong bảng) và mask hợp lệ
+        """
+        values = np.asarray(values, dtype=object).ravel()
+        if len(values) == 1:
+            codes = np.array([self._codes.get(values[0], -1)], dtype=np.int64)
+        else:
+            # Chỉ tra các giá trị khác nhau; phần tử cuối (-1) dành cho giá trị thiếu
+            positions, uniques = pd.factorize(values)
+            table = np.array([self._codes.get(value, -1) for value in uniques] + [-1], dtype=np.int64)
+            codes = table[positions]
+        return codes, codes >= 0
+
+    def transform(self, values) -> np.ndarray:
+        """Giống LabelEncoder.transform: lỗi nếu có giá trị chưa gặp"""
+        codes, valid = self.lookup(values)
+        if not valid.all():
+            unseen = np.asarray(values, dtype=object).ravel()[~valid]
+            raise ValueError(f"y contains previously unseen labels: {unseen.tolist()}")
+        return codes
+
+
+def category_tables(vocabularies: Mapping[str, np.ndarray]) -> Dict[str, CategoryTable]:
+    """Bảng tra cho từng encoder từ vocab đã lưu (bảng quận kèm tên có dấu)"""
+    return {
+        name: CategoryTable(classes, DISTRICT_ALIASES if name == 'district' else None)
+        for name, classes in vocabularies.items()
+    }
+
+
+class FeaturePipeline:
+    def __init__(self, tables: Mapping[str, CategoryTable], reference_year: int = DEFAULT_REFERENCE_YEAR):
+        """
+        Args:
+            tables: Tên encoder (district, type, facing) -> bảng tra
+            reference_year: Năm dùng để tính tuổi nhà
+        """
+        self.tables = dict(tables)
+        self.reference_year = int(reference_year)
+
+    @classmethod
+    def fit(cls, frame: pd.DataFrame, reference_year: Optional[int] = None) -> "FeaturePipeline":
+        """Dựng bảng tra từ dữ liệu training; mặc định tính tuổi nhà theo năm hiện tại"""
+        tables = {
+            name: CategoryTable.fit(frame[column], DISTRICT_ALIASES if name == 'district' else None)
+            for name, column in CATEGORICAL_COLUMNS.items()
+        }
+        return cls(tables, reference_year or datetime.date.today().year)
+
+    def extend(self, frame: pd.DataFrame) -> "FeaturePipeline":
+        """Pipeline mới có thêm các giá trị categorical của `frame`, mã cũ giữ nguyên"""
+        tables = {
+            name: self.tables[name].extend(frame[column])
+            for name, column in CATEGORICAL_COLUMNS.items()
+        }
+        return FeaturePipeline(tables, self.reference_year)
+
+    def transform(self, columns) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Dựng ma trận feature theo thứ tự FEATURE_COLUMNS.
+
+        Args:
+            columns: DataFrame hoặc dict tên cột -> giá trị; giá trị là scalar
+                (dùng chung cho mọi dòng) hoặc array cùng độ dài
+
+        Returns:
+            (features, invalid): ma trận float64 (n, 24) và dict tên encoder ->
+            mask các dòng có giá trị categorical không có trong bảng (feature
+            mã hóa của các dòng đó là NaN)
+        """
+        if isinstance(columns, pd.DataFrame):
+            n = len(columns)
+        else:
+            n = max(_length(columns[name]) for name in INPUT_COLUMNS)
+
+        if n == 1:
+            # Một dòng (request đơn lẻ): tính trên float Python, tránh chi phí của từng phép numpy
+            values = {name: _scalar(columns[name]) for name in NUMERIC_COLUMNS + ('year_built',)}
+            invalid = {}
+            for name, source in CATEGORICAL_COLUMNS.items():
+                code = self.tables[name].code(_scalar(columns[source], str))
+                values[f'{name}_encoded'] = float(code) if code >= 0 else np.nan
+                invalid[name] = np.array([code < 0])
+            self._derive(values)
+            return np.array([[values[name] for name in FEATURE_COLUMNS]], dtype=np.float64), invalid
+
+        values = {name: np.asarray(columns[name], dtype=np.float64) for name in NUMERIC_COLUMNS + ('year_built',)}
+        invalid = {}
+        for name, source in CATEGORICAL_COLUMNS.items():
+            codes, valid = self.tables[name].lookup(columns[source])
+            values[f'{name}_encoded'] = np.where(valid, codes, np.nan)
+            invalid[name] = np.broadcast_to(~valid, (n,))
+        self._derive(values)
+
+        # Ghi vào từng cột của ma trận kết quả, scalar tự broadcast khi gán
+        features = np.empty((n, len(FEATURE_COLUMNS)))
+        for i, name in enumerate(FEATURE_COLUMNS):
+            features[:, i] = values[name]
+        return features, invalid
+
+    def _derive(self, values: dict):
+        """Các feature phái sinh, dùng chung cho float (1 dòng) và array (N dòng)"""
+        values['building_age'] = self.reference_year - values['year_built']
+        values['floor_ratio'] = _ratio(values['floor'], values['total_floors'])
+        values['avg_distance_to_amenities'] = (
+            values['distance_to_metro_km'] +
+            values['distance_to_school_km'] +
+            values['distance_to_hospital_km'] +
+            values['distance_to_mall_km']
+        ) / 4
+        values['area_density'] = values['nearby_price_count'] / (values['distance_to_center_km'] + 1)
+        # Giá thật không có khi serve nên feature này luôn = 1 (cả lúc train)
+        values['price_vs_nearby_ratio'] = 1.0
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator, bằng 0 khi mẫu số <= 0"""
+    if np.ndim(numerator) == 0 and np.ndim(denominator) == 0:
+        return numerator / denominator if denominator > 0 else 0.0
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    return np.divide(numerator, denominator, out=np.zeros(numerator.shape), where=denominator > 0)
+
+
+def _length(value) -> int:
+    """Số dòng của một giá trị đầu vào (scalar là 1)"""
+    if isinstance(value, (str, bytes, int, float, np.generic)) or np.ndim(value) == 0:
+        return 1
+    return len(value)
+
+
+def _scalar(value, kind=float):
+    """Giá trị duy nhất của một đầu vào 1 dòng (scalar hoặc array 1 phần tử)"""
+    if not isinstance(value, (str, int, float, np.generic)):
+        value = np.asarray(value, dtype=object).ravel()[0]
+    return kind(value)
@@ -0,0 +1,141 @@
+"""Bản đồ nhiệt giá theo tile
+
+Sinh lưới điểm lat/lon cho một tile (z/x/y, chuẩn slippy map) hoặc một
+bbox, lấy hồ sơ khu vực cho tất cả các điểm cùng lúc (tra lưới tính sẵn,
+điểm ngoài lưới thì tìm láng giềng gần nhất) để dựng ma trận feature và
+dự đoán một lần. Tile đã render được lưu trên đĩa theo version model và
+version dữ liệu.
+"""
+import math
+import os
+import shutil
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.neighbourhood_grid import MODE_ATTRIBUTES, NEIGHBOUR_COUNT
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Bbox (min_lat, min_lon, max_lat, max_lon) của tile z/x/y"""
+    n = 2 ** z
+
+    def lat_of(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return lat_of(y + 1), x / n * 360 - 180, lat_of(y), (x + 1) / n * 360 - 180
+
+
+def grid_points(min_lat: float, min_lon: float, max_lat: float, max_lon: float, rows: int, cols: int):
+    """
+    Tọa độ tâm các ô của lưới rows x cols phủ bbox, hàng đầu tiên ở phía bắc.
+
+    Returns:
+        (latitude, longitude) dạng array đã làm phẳng theo thứ tự hàng
+    """
+    lat = max_lat - (np.arange(rows) + 0.5) * (max_lat - min_lat) / rows
+    lon = min_lon + (np.arange(cols) + 0.5) * (max_lon - min_lon) / cols
+    lat_grid, lon_grid = np.meshgrid(lat, lon, indexing="ij")
+    return lat_grid.ravel(), lon_grid.ravel()
+
+
+def neighbourhood_profiles(snapshot, latitude: np.ndarray, longitude: np.ndarray, bedrooms: int):
+    """
+    Hồ sơ khu vực cho nhiều điểm cùng số phòng ngủ.
+
+    Returns:
+        (profile, district): profile là dict tên thông số -> array (thông số
+        mode là chuỗi), district là quận của căn gần nhất với từng điểm
+    """
+    columns = snapshot.columns
+    n_points = len(latitude)
+    profile: Dict[str, np.ndarray] = {}
+    missing = np.ones(n_points, dtype=bool)
+
+    if snapshot.grid is not None:
+        grid_profile, found = snapshot.grid.lookup_many(latitude, longitude, bedrooms)
+        for name, values in grid_profile.items():
+            if name in MODE_ATTRIBUTES:
+                values = snapshot.grid.vocab[name][values]
+            profile[name] = values
+        missing = ~found
+
+    if missing.any():
+        positions, _ = snapshot.spatial_index.nearest(
+            latitude[missing], longitude[missing], bedrooms, k=NEIGHBOUR_COUNT
+        )
+        computed = columns.aggregate(positions)
+        for name, values in computed.items():
+            if name in MODE_ATTRIBUTES:
+                values = columns.vocab[name][values]
+            if name not in profile:
+                profile[name] = np.empty(n_points, dtype=values.dtype)
+            elif profile[name].dtype != values.dtype:
+                profile[name] = profile[name].astype(np.result_type(profile[name], values))
+            profile[name][missing] = values
+
+    nearest, _ = snapshot.spatial_index.query(latitude, longitude, 1)
+    district = columns.district_of(nearest[:, 0])
+    return profile, district
+
+
+class TileCache:
+    """
+    Cache tile đã render trên đĩa: <dir>/<model_version>/<dataset_version>/<key>.npy
+
+    Tile của version cũ không bao giờ được đọc lại, `prune` xóa chúng khi model
+    hoặc dữ liệu được thay.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, model_version: str, dataset_version: str, key: str) -> str:
+        return os.path.join(self.directory, model_version, dataset_version, f"{key}.npy")
+
+    def get(self, model_version: str, dataset_version: str, key: str) -> Optional[np.ndarray]:
+        try:
+            return np.load(self._path(model_version, dataset_version, key))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, model_version: str, dataset_version: str, key: str, values: np.ndarray):
+        path = self._path(model_version, dataset_version, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Ghi file tạm rồi đổi tên để request khác không đọc phải tile dở dang
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, values)
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            # Thư mục vừa bị `prune` xóa (version đã bị thay): bỏ qua, tile này không cần lưu
+            pass
+
+    def prune(self, model_version: str, dataset_version: str) -> int:
+        """
+        Xóa thư mục tile của mọi cặp version khác cặp đang phục vụ.
+
+        Returns:
+            Số thư mục đã xóa
+        """
+        removed = 0
+        for model_entry in _subdirectories(self.directory):
+            model_dir = os.path.join(self.directory, model_entry)
+            if model_entry != model_version:
+                shutil.rmtree(model_dir, ignore_errors=True)
+                removed += 1
+                continue
+            for dataset_entry in _subdirectories(model_dir):
+                if dataset_entry != dataset_version:
+                    shutil.rmtree(os.path.join(model_dir, dataset_entry), ignore_errors=True)
+                    removed += 1
+        return removed
+
+
+def _subdirectories(directory: str):
+    try:
+        return [entry for entry in os.listdir(directory) if os.path.isdir(os.path.join(directory, entry))]
+    except FileNotFoundError:
+        return []
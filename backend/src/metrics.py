@@ -0,0 +1,270 @@
+"""Metrics dạng Prometheus (counter, gauge, histogram) không cần thư viện ngoài
+
+Mỗi metric giữ giá trị theo bộ nhãn trong dict, cập nhật dưới một lock nên
+chi phí mỗi lần ghi chỉ khoảng micro giây, đủ nhẹ để bật thường xuyên.
+`REGISTRY.render()` trả về text format 0.0.4 cho endpoint /metrics; các nguồn
+đã có thống kê riêng (cache, micro-batcher, executor) được đăng ký qua
+`add_collector` và chỉ được đọc khi scrape.
+
+    with STAGE_SECONDS.time(endpoint="simple-predict-price", stage="predict"):
+        ...
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Bucket (giây) cho độ trễ từ 50 µs tới 10 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class CollectedCounter(Gauge):
+    """Counter lấy nguyên giá trị từ thống kê sẵn có (chỉ cập nhật khi scrape)"""
+
+    kind = "counter"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Bộ nhãn -> [số đếm theo bucket (không cộng dồn, phần tử cuối là +Inf), tổng, số lần]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def load(self, value_counts: Dict[float, int], **labels):
+        """Thay toàn bộ dữ liệu của một bộ nhãn bằng phân bố giá trị -> số lần có sẵn"""
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for value, count in value_counts.items():
+            counts[bisect.bisect_left(self.buckets, value)] += count
+            total += value * count
+        with self._lock:
+            self._values[self._key(labels)] = [counts, total, sum(counts)]
+
+    @contextmanager
+    def time(self, **labels):
+        """Đo thời gian (giây) của khối lệnh, ghi cả khi khối lệnh lỗi"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            items = [(key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if math.isinf(bound) else f'le="{bound}"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Đăng ký hàm cập nhật metric từ nguồn khác, được gọi mỗi lần scrape"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Lỗi khi thu thập metrics: {e}")
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "bds_requests_total", "Số request HTTP theo route và mã trạng thái", ("method", "route", "status"),
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "bds_request_duration_seconds", "Thời gian xử lý request HTTP", ("method", "route"),
+))
+ERRORS_TOTAL = REGISTRY.register(Counter(
+    "bds_errors_total", "Số request lỗi theo nguyên nhân", ("route", "cause"),
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "bds_stage_duration_seconds", "Thời gian từng bước khi dự đoán", ("endpoint", "stage"),
+))
+CACHE_EVENTS = REGISTRY.register(CollectedCounter(
+    "bds_result_cache_events_total", "Sự kiện của cache kết quả (hit, miss, coalesced...)", ("event",),
+))
+CACHE_ENTRIES = REGISTRY.register(Gauge(
+    "bds_result_cache_entries", "Số kết quả đang có trong cache",
+))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "bds_micro_batch_size", "Kích thước các micro-batch đã chạy",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+))
+EXECUTOR_EVENTS = REGISTRY.register(CollectedCounter(
+    "bds_inference_executor_events_total", "Việc của inference executor theo kết quả", ("event",),
+))
+EXECUTOR_JOBS = REGISTRY.register(Gauge(
+    "bds_inference_executor_jobs", "Số việc đang chạy/đang chờ trong inference executor", ("state",),
+))
+MODEL_INFO = REGISTRY.register(Gauge(
+    "bds_model_info", "Model bundle đang phục vụ", ("version", "backend"),
+))
+DATASET_INFO = REGISTRY.register(Gauge(
+    "bds_dataset_info", "Phiên bản dữ liệu tham chiếu đang dùng", ("version",),
+))
+
+class StageTimer:
+    """Đo liên tiếp các bước của một request: `mark(stage)` ghi thời gian kể từ lần mark trước"""
+
+    def __init__(self, endpoint: str, histogram: Histogram = STAGE_SECONDS):
+        self.endpoint = endpoint
+        self.histogram = histogram
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.histogram.observe(now - self._last, endpoint=self.endpoint, stage=stage)
+        self._last = now
+
+
+# Nguyên nhân lỗi theo mã trạng thái HTTP
+ERROR_CAUSES = {
+    400: "invalid_input",
+    403: "forbidden",
+    404: "not_found",
+    409: "model_rejected",
+    413: "too_large",
+    422: "validation",
+    429: "saturated",
+    500: "internal",
+    503: "unavailable",
+}
+
+
+class MetricsMiddleware:
+    """ASGI middleware đếm request, lỗi và đo thời gian theo route (không theo URL thật)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # FastAPI ghi route khớp vào scope; URL không khớp gom chung để tránh bùng nhãn
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, route=route)
+            REQUESTS_TOTAL.inc(method=method, route=route, status=status)
+            if status >= 400:
+                ERRORS_TOTAL.inc(route=route, cause=ERROR_CAUSES.get(status, str(status)))
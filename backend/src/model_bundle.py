@@ -0,0 +1,272 @@
+"""Gói model có version (model bundle)
+
+Một bundle là một thư mục `<root>/<version>/` gồm:
+    model.ubj               booster XGBoost ở định dạng native (UBJSON)
+    scaler_mean.npy         tham số StandardScaler
+    scaler_scale.npy
+    vocab_<name>.npy        từ điển của từng biến categorical (district, type, facing)
+    smoke_features.npy      (tùy chọn) vài dòng feature chưa scale và dự đoán
+    smoke_predictions.npy   tương ứng lúc train, dùng để kiểm tra khi load lại
+    trained_rows.npy        (tùy chọn) hash các dòng dữ liệu model đã được train, để
+                            train tăng dần chỉ dùng các dòng mới
+    manifest.json           version, thứ tự feature, năm tính tuổi nhà, sha256 của từng file
+
+File `<root>/LATEST` chứa version của bundle mới nhất. Tất cả các mảng là
+.npy thuần (không pickle) nên có thể memory-map, và bundle chỉ được dùng
+khi mọi file khớp checksum trong manifest.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import xgboost as xgb
+
+from src.features import (
+    DEFAULT_REFERENCE_YEAR, FEATURE_COLUMNS, CategoryTable, FeaturePipeline, category_tables,
+)
+from src.tree_compiler import CompiledForest
+
+BUNDLE_FORMAT_VERSION = 1
+MODEL_FILE = "model.ubj"
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+ENCODER_NAMES = ("district", "type", "facing")
+# Version là 16 ký tự hex đầu của hash nội dung (xem save_bundle)
+VERSION_PATTERN = re.compile(r"[0-9a-f]{16}")
+
+
+class ModelBundleError(Exception):
+    """Bundle không tồn tại, thiếu file hoặc không hợp lệ"""
+
+
+class StandardScaling:
+    """Phần transform của StandardScaler, tham số lưu dạng array"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, features) -> np.ndarray:
+        return (np.asarray(features, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class ModelBundle:
+    def __init__(
+        self,
+        version: str,
+        model: xgb.XGBRegressor,
+        scaler: StandardScaling,
+        encoders: Dict[str, CategoryTable],
+        feature_columns: List[str],
+        manifest: dict,
+        path: str,
+        smoke_features: Optional[np.ndarray] = None,
+        smoke_predictions: Optional[np.ndarray] = None,
+        trained_rows: Optional[np.ndarray] = None,
+    ):
+        self.version = version
+        self.model = model
+        self.scaler = scaler
+        self.encoders = encoders
+        self.feature_columns = feature_columns
+        self.manifest = manifest
+        self.path = path
+        self.smoke_features = smoke_features
+        self.smoke_predictions = smoke_predictions
+        self.trained_rows = trained_rows
+        self.pipeline = FeaturePipeline(encoders, manifest.get("reference_year", DEFAULT_REFERENCE_YEAR))
+        self.forest: Optional[CompiledForest] = None
+        self.compiled_max_rows = 0
+
+    @property
+    def backend(self) -> str:
+        return "compiled" if self.forest is not None else "xgboost"
+
+    def use_compiled(self, max_rows: int = 32):
+        """
+        Biên dịch booster để các lần predict nhỏ không đi qua XGBoost.
+
+        Args:
+            max_rows: Số dòng tối đa dùng cây biên dịch; batch lớn hơn vẫn dùng XGBoost
+        """
+        self.forest = CompiledForest.from_booster(self.model.get_booster())
+        self.compiled_max_rows = max_rows
+
+    def predict(self, features) -> np.ndarray:
+        """Scale và predict một ma trận feature"""
+        return self.predict_scaled(self.scaler.transform(features))
+
+    def predict_scaled(self, scaled: np.ndarray) -> np.ndarray:
+        """Predict một ma trận feature đã scale"""
+        if self.forest is not None and len(scaled) <= self.compiled_max_rows:
+            return self.forest.predict(scaled)
+        return self.model.predict(scaled)
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_bundle(
+    root: str,
+    model: xgb.XGBRegressor,
+    scaler,
+    encoders: Dict[str, object],
+    feature_columns: List[str],
+    metadata: Optional[dict] = None,
+    smoke_features: Optional[np.ndarray] = None,
+    trained_rows: Optional[np.ndarray] = None,
+) -> str:
+    """
+    Ghi một bundle mới vào `root` và trỏ LATEST tới nó.
+
+    Args:
+        root: Thư mục chứa các bundle
+        model: XGBRegressor đã train
+        scaler: StandardScaler đã fit (dùng mean_ và scale_)
+        encoders: Tên -> CategoryTable hoặc LabelEncoder đã fit (dùng classes_)
+        feature_columns: Thứ tự feature
+        metadata: Thông tin thêm ghi vào manifest (metrics, số dòng train...)
+        smoke_features: Vài dòng feature chưa scale để kiểm tra bundle khi load lại
+        trained_rows: Hash (uint64) các dòng dữ liệu đã dùng để train
+
+    Returns:
+        Version của bundle
+    """
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".bundle-", dir=root)
+    try:
+        model.get_booster().save_model(os.path.join(staging, MODEL_FILE))
+        np.save(os.path.join(staging, "scaler_mean.npy"), np.asarray(scaler.mean_, dtype=np.float64))
+        np.save(os.path.join(staging, "scaler_scale.npy"), np.asarray(scaler.scale_, dtype=np.float64))
+        for name, encoder in encoders.items():
+            np.save(os.path.join(staging, f"vocab_{name}.npy"), np.asarray(encoder.classes_, dtype=str))
+        if smoke_features is not None:
+            smoke_features = np.asarray(smoke_features, dtype=np.float64)
+            np.save(os.path.join(staging, "smoke_features.npy"), smoke_features)
+            np.save(
+                os.path.join(staging, "smoke_predictions.npy"),
+                np.asarray(model.predict(scaler.transform(smoke_features))),
+            )
+        if trained_rows is not None:
+            np.save(os.path.join(staging, "trained_rows.npy"), np.unique(np.asarray(trained_rows, dtype=np.uint64)))
+
+        files = {name: _sha256_file(os.path.join(staging, name)) for name in sorted(os.listdir(staging))}
+        version = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()[:16]
+        manifest = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "xgboost_version": xgb.__version__,
+            "feature_columns": list(feature_columns),
+            "encoders": sorted(encoders),
+            "files": files,
+            **(metadata or {}),
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        target = os.path.join(root, version)
+        if os.path.exists(target):
+            shutil.rmtree(staging)
+        else:
+            os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Đổi LATEST bằng rename để process đang đọc không thấy file dở dang
+    latest_tmp = os.path.join(root, f".{LATEST_FILE}.tmp")
+    with open(latest_tmp, "w") as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(root, LATEST_FILE))
+    return version
+
+
+def latest_version(root: str) -> str:
+    try:
+        with open(os.path.join(root, LATEST_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        raise ModelBundleError(f"Không tìm thấy {os.path.join(root, LATEST_FILE)}, hãy chạy train trước")
+
+
+def load_bundle(root: str, version: Optional[str] = None) -> ModelBundle:
+    """
+    Load và kiểm tra một bundle (mặc định bundle trong LATEST).
+
+    Raises:
+        ModelBundleError: nếu bundle thiếu file, sai checksum hoặc không nhất quán
+    """
+    version = version or latest_version(root)
+    if not VERSION_PATTERN.fullmatch(version):
+        raise ModelBundleError(f"Version bundle không hợp lệ: {version!r}")
+    path = os.path.join(root, version)
+    real_root = os.path.realpath(root)
+    if os.path.dirname(os.path.realpath(path)) != real_root:
+        raise ModelBundleError(f"Bundle {version} nằm ngoài thư mục {root}")
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ModelBundleError(f"Không đọc được manifest của bundle {version}: {e}")
+
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ModelBundleError(f"Định dạng bundle không hỗ trợ: {manifest.get('format_version')}")
+    if manifest.get("version") != version:
+        raise ModelBundleError(f"Manifest ghi version {manifest.get('version')}, thư mục là {version}")
+
+    # Mọi file được đọc phải có checksum trong manifest
+    required = [MODEL_FILE, "scaler_mean.npy", "scaler_scale.npy"]
+    required += [f"vocab_{name}.npy" for name in manifest.get("encoders", [])]
+    unlisted = [name for name in required if name not in manifest["files"]]
+    if unlisted:
+        raise ModelBundleError(f"Manifest của bundle {version} thiếu checksum của {unlisted}")
+
+    for name, expected in manifest["files"].items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            raise ModelBundleError(f"Bundle {version} thiếu file {name}")
+        if _sha256_file(file_path) != expected:
+            raise ModelBundleError(f"Checksum của {name} trong bundle {version} không khớp")
+
+    # XGBoost parse file thành cây trong bộ nhớ của chính nó (không chia sẻ trang với file),
+    # đọc theo đường dẫn để khỏi giữ thêm một bản sao bytes của file
+    model = xgb.XGBRegressor()
+    model.load_model(os.path.join(path, MODEL_FILE))
+
+    def array(name):
+        return np.load(os.path.join(path, name), mmap_mode="r", allow_pickle=False)
+
+    scaler = StandardScaling(array("scaler_mean.npy"), array("scaler_scale.npy"))
+    encoders = category_tables({name: array(f"vocab_{name}.npy") for name in manifest["encoders"]})
+    feature_columns = manifest["feature_columns"]
+    if feature_columns != list(FEATURE_COLUMNS):
+        raise ModelBundleError(f"Thứ tự feature của bundle {version} không khớp src/features.py")
+
+    n_features = model.get_booster().num_features()
+    if not (len(feature_columns) == len(scaler.mean_) == len(scaler.scale_) == n_features):
+        raise ModelBundleError(
+            f"Bundle {version} không nhất quán: {len(feature_columns)} feature, "
+            f"scaler {len(scaler.mean_)}, model {n_features}"
+        )
+    missing = set(ENCODER_NAMES) - set(encoders)
+    if missing:
+        raise ModelBundleError(f"Bundle {version} thiếu encoder: {sorted(missing)}")
+
+    optional = {}
+    for name in ("smoke_features", "smoke_predictions", "trained_rows"):
+        if f"{name}.npy" in manifest["files"]:
+            optional[name] = array(f"{name}.npy")
+
+    return ModelBundle(version, model, scaler, encoders, feature_columns, manifest, path, **optional)
@@ -0,0 +1,140 @@
+"""Quản lý model đang phục vụ, hỗ trợ load lại không downtime
+
+Model mới (bundle trong `<root>/LATEST` hoặc một version chỉ định) được load,
+chạy thử trên smoke set lưu kèm bundle (vừa để warm-up vừa để kiểm tra dự
+đoán khớp lúc train) rồi mới thay thế bundle hiện tại bằng một phép gán
+tham chiếu. Request đang chạy giữ tham chiếu tới bundle cũ nên hoàn thành
+trên version cũ. Một thread nền theo dõi file LATEST để tự load lại.
+"""
+import os
+import threading
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from src.model_bundle import LATEST_FILE, ModelBundle, ModelBundleError, latest_version, load_bundle
+
+
+class ModelManager:
+    def __init__(
+        self,
+        root: str,
+        watch_interval: float = 5.0,
+        smoke_rtol: float = 1e-4,
+        backend: str = "xgboost",
+        compiled_max_rows: int = 32,
+    ):
+        """
+        Args:
+            root: Thư mục chứa các model bundle
+            watch_interval: Chu kỳ (giây) kiểm tra LATEST, <= 0 để tắt
+            smoke_rtol: Sai số tương đối cho phép khi so với dự đoán lúc train
+            backend: "xgboost" hoặc "compiled" (cây được biên dịch khi load bundle)
+            compiled_max_rows: Batch tối đa bao nhiêu dòng thì dùng cây biên dịch
+        """
+        if backend not in ("xgboost", "compiled"):
+            raise ValueError(f"Inference backend không hợp lệ: {backend}")
+        self.root = root
+        self.backend = backend
+        self.compiled_max_rows = compiled_max_rows
+        self.watch_interval = watch_interval
+        self.smoke_rtol = smoke_rtol
+        self._bundle: Optional[ModelBundle] = None
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[ModelBundle], None]] = []
+
+    def current(self) -> Optional[ModelBundle]:
+        """Bundle đang phục vụ (None nếu chưa load được)"""
+        return self._bundle
+
+    def add_listener(self, callback: Callable[[ModelBundle], None]):
+        """Đăng ký hàm được gọi sau mỗi lần bundle mới được thay vào"""
+        self._listeners.append(callback)
+
+    def load(self) -> Optional[ModelBundle]:
+        """Load bundle lần đầu, lỗi chỉ được in ra để server vẫn khởi động"""
+        try:
+            self.reload()
+        except Exception as e:
+            print(f"Lỗi khi load model: {e}")
+        return self._bundle
+
+    def reload(self, version: Optional[str] = None) -> ModelBundle:
+        """
+        Load, kiểm tra và thay bundle (mặc định bundle trong LATEST).
+
+        Raises:
+            ModelBundleError: nếu bundle không hợp lệ; bundle hiện tại được giữ nguyên
+        """
+        with self._reload_lock:
+            version = version or latest_version(self.root)
+            current = self._bundle
+            if current is not None and current.version == version:
+                return current
+
+            bundle = load_bundle(self.root, version)
+            if self.backend == "compiled":
+                try:
+                    bundle.use_compiled(self.compiled_max_rows)
+                except ValueError as e:
+                    raise ModelBundleError(f"Không biên dịch được bundle {version}: {e}")
+            # Smoke set cũng kiểm tra cây biên dịch cho kết quả khớp XGBoost
+            self._validate(bundle)
+            self._bundle = bundle
+            print(f"Đã load model bundle {bundle.version}")
+
+        for callback in self._listeners:
+            try:
+                callback(bundle)
+            except Exception as e:
+                print(f"Lỗi khi xử lý sự kiện load model: {e}")
+        return bundle
+
+    def _validate(self, bundle: ModelBundle):
+        """Chạy smoke set: warm-up model và so với dự đoán lúc train"""
+        if bundle.smoke_features is None:
+            features = np.zeros((1, len(bundle.feature_columns)))
+            expected = None
+        else:
+            features, expected = bundle.smoke_features, bundle.smoke_predictions
+
+        predictions = np.asarray(bundle.predict(features))
+        if predictions.shape != (len(features),) or not np.isfinite(predictions).all():
+            raise ModelBundleError(f"Bundle {bundle.version} trả về dự đoán không hợp lệ trên smoke set")
+        if expected is not None and not np.allclose(predictions, expected, rtol=self.smoke_rtol):
+            raise ModelBundleError(f"Dự đoán của bundle {bundle.version} không khớp smoke set lúc train")
+
+    def start_watching(self):
+        """Chạy thread nền theo dõi file LATEST"""
+        if self.watch_interval <= 0 or self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+        self._stop_event.set()
+        self._watcher.join(timeout=self.watch_interval + 1)
+        self._watcher = None
+
+    def _watch_loop(self):
+        latest_path = os.path.join(self.root, LATEST_FILE)
+        last_mtime = None
+        while not self._stop_event.wait(self.watch_interval):
+            try:
+                mtime = os.stat(latest_path).st_mtime
+                current = self._bundle
+                if mtime == last_mtime and current is not None:
+                    continue
+                last_mtime = mtime
+                if current is None or latest_version(self.root) != current.version:
+                    self.reload()
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                # Giữ model cũ nếu bundle mới lỗi
+                print(f"Lỗi khi load lại model: {e}")
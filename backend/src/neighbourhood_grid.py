@@ -0,0 +1,465 @@
+"""Lưới hồ sơ khu vực (neighbourhood profile) tính trước cho /simple-predict-price
+
+Mỗi ô lưới (kích thước `cell_deg` độ, kiểu geohash) lưu sẵn các thông số
+trung bình của 5 căn gần tâm ô nhất cho từng số phòng ngủ, để endpoint chỉ
+cần tra ô thay vì tìm láng giềng và tính trung bình mỗi request. Bảng được
+lưu dạng các numpy array (float64/int32) trong một file .npz.
+
+Khi dữ liệu đổi, `update_grid` chỉ tính lại những ô mà dòng thêm/bớt nằm
+trong bán kính láng giềng thứ k của ô đó.
+
+Chạy offline:
+    python -m src.neighbourhood_grid --resolution 0.005
+"""
+import argparse
+import os
+import warnings
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+from src.spatial_index import EARTH_RADIUS_KM, SpatialIndex
+
+NEIGHBOUR_COUNT = 5
+
+# Thông số lấy trung bình
+MEAN_ATTRIBUTES = [
+    'area', 'condition_score',
+    'distance_to_center_km', 'distance_to_metro_km', 'distance_to_school_km',
+    'distance_to_hospital_km', 'distance_to_mall_km', 'nearby_avg_price_per_m2',
+]
+# Thông số lấy trung bình rồi làm tròn về số nguyên
+ROUNDED_ATTRIBUTES = [
+    'bathrooms', 'year_built', 'floor', 'total_floors', 'parking', 'nearby_price_count',
+]
+# Thông số lấy giá trị xuất hiện nhiều nhất
+MODE_ATTRIBUTES = ['type', 'facing_direction']
+
+GRID_FORMAT_VERSION = 1
+
+
+class ListingColumns:
+    """Các cột dữ liệu dạng numpy array dùng để tổng hợp hồ sơ khu vực"""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.numeric = {
+            name: frame[name].to_numpy(dtype=np.float64)
+            for name in MEAN_ATTRIBUTES + ROUNDED_ATTRIBUTES
+        }
+        # Mã hóa theo thứ tự từ điển để hòa thì chọn giá trị nhỏ nhất, giống pandas .mode()[0]
+        self.codes = {}
+        self.vocab = {}
+        for name in MODE_ATTRIBUTES:
+            codes, uniques = pd.factorize(frame[name], sort=True)
+            self.codes[name] = codes.astype(np.int32)
+            self.vocab[name] = np.asarray(uniques, dtype=str)
+        # Quận của từng dòng, để không phải giữ cả frame khi chỉ cần tra quận
+        codes, uniques = pd.factorize(frame['district'], sort=True)
+        self.district_codes = codes.astype(np.int32)
+        self.district_vocab = np.asarray(uniques, dtype=str)
+
+    def aggregate(self, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Tổng hợp hồ sơ cho từng hàng của `positions` (n_points, k).
+
+        Returns:
+            Dict tên thông số -> array (n_points,); thông số mode trả về mã
+        """
+        profile = {}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            for name in MEAN_ATTRIBUTES:
+                profile[name] = np.nanmean(self.numeric[name][positions], axis=1)
+            for name in ROUNDED_ATTRIBUTES:
+                profile[name] = np.rint(np.nanmean(self.numeric[name][positions], axis=1))
+        for name in MODE_ATTRIBUTES:
+            codes = self.codes[name][positions]
+            counts = (codes[:, :, None] == np.arange(len(self.vocab[name]))).sum(axis=1)
+            profile[name] = counts.argmax(axis=1)
+        profile['count'] = np.full(len(positions), positions.shape[1])
+        return profile
+
+    def district_of(self, positions: np.ndarray) -> np.ndarray:
+        """Tên quận của các dòng ở `positions` ('' nếu thiếu)"""
+        codes = self.district_codes[positions]
+        if len(self.district_vocab) == 0:
+            return np.full(codes.shape, '', dtype=str)
+        return np.where(codes >= 0, self.district_vocab[codes], '')
+
+    def profile_at(self, profile: Dict[str, np.ndarray], i: int) -> dict:
+        """Chuyển hàng i của kết quả `aggregate` thành dict giá trị Python"""
+        return profile_to_dict(profile, i, self.vocab)
+
+
+def profile_to_dict(profile: Dict[str, np.ndarray], i, vocab: Dict[str, np.ndarray]) -> dict:
+    result = {name: np.float64(profile[name][i]) for name in MEAN_ATTRIBUTES}
+    result.update({name: int(profile[name][i]) for name in ROUNDED_ATTRIBUTES})
+    result.update({name: str(vocab[name][profile[name][i]]) for name in MODE_ATTRIBUTES})
+    result['count'] = int(profile['count'][i])
+    return result
+
+
+def _row_hashes(frame: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _branch(counts: Dict[int, int], bedrooms: Optional[int], k: int) -> str:
+    """Nhánh tìm láng giềng mà SpatialIndex.nearest sẽ chọn cho số phòng ngủ này"""
+    if bedrooms is None:
+        return 'any'
+    if counts.get(bedrooms, 0) >= k:
+        return 'same'
+    if sum(counts.get(b, 0) for b in (bedrooms - 1, bedrooms, bedrooms + 1)) >= k:
+        return 'near'
+    return 'any'
+
+
+def _relevant(branch: str, bedrooms: Optional[int], values: np.ndarray) -> np.ndarray:
+    """Mask các dòng có thể làm thay đổi láng giềng của một slot"""
+    if branch == 'same':
+        return values == bedrooms
+    if branch == 'near':
+        return np.abs(values - bedrooms) <= 1
+    return np.ones(len(values), dtype=bool)
+
+
+class NeighbourhoodGrid:
+    def __init__(
+        self,
+        cell_deg: float,
+        origin_lat: float,
+        origin_lon: float,
+        shape: tuple,
+        bedroom_slots: np.ndarray,
+        values: Dict[str, np.ndarray],
+        vocab: Dict[str, np.ndarray],
+        source: Dict[str, np.ndarray],
+        dataset_version: str,
+        k: int = NEIGHBOUR_COUNT,
+    ):
+        """
+        Args:
+            cell_deg: Kích thước ô (độ)
+            origin_lat, origin_lon: Góc dưới trái của lưới
+            shape: (n_rows, n_cols)
+            bedroom_slots: Các số phòng ngủ có slot riêng; slot cuối là "bất kể số phòng"
+            values: Tên thông số -> array (n_slots, n_rows, n_cols)
+            vocab: Từ điển giá trị cho các thông số mode
+            source: Hash/tọa độ/số phòng ngủ của các dòng đã dùng để dựng lưới
+            dataset_version: Version dữ liệu tương ứng
+        """
+        self.cell_deg = cell_deg
+        self.origin_lat = origin_lat
+        self.origin_lon = origin_lon
+        self.shape = tuple(int(n) for n in shape)
+        self.bedroom_slots = np.asarray(bedroom_slots, dtype=np.int64)
+        self.values = values
+        self.vocab = vocab
+        self.source = source
+        self.dataset_version = dataset_version
+        self.k = k
+
+    @property
+    def n_slots(self) -> int:
+        return len(self.bedroom_slots) + 1
+
+    def cell_centers(self):
+        """Tọa độ tâm của tất cả các ô, đã làm phẳng theo thứ tự (row, col)"""
+        rows, cols = np.indices(self.shape)
+        lat = self.origin_lat + (rows.ravel() + 0.5) * self.cell_deg
+        lon = self.origin_lon + (cols.ravel() + 0.5) * self.cell_deg
+        return lat, lon
+
+    def cell_of(self, latitude, longitude):
+        """Trả về (row, col, inside) cho một hoặc nhiều điểm"""
+        row = np.floor((np.asarray(latitude) - self.origin_lat) / self.cell_deg).astype(np.int64)
+        col = np.floor((np.asarray(longitude) - self.origin_lon) / self.cell_deg).astype(np.int64)
+        inside = (row >= 0) & (row < self.shape[0]) & (col >= 0) & (col < self.shape[1])
+        return np.where(inside, row, 0), np.where(inside, col, 0), inside
+
+    def slot_of(self, bedrooms):
+        """Slot tương ứng với số phòng ngủ (slot cuối nếu ngoài dải đã tính)"""
+        bedrooms = np.asarray(bedrooms)
+        slot = np.searchsorted(self.bedroom_slots, bedrooms)
+        slot = np.minimum(slot, len(self.bedroom_slots))
+        found = np.take(self.bedroom_slots, np.minimum(slot, len(self.bedroom_slots) - 1)) == bedrooms
+        return np.where(found, slot, len(self.bedroom_slots))
+
+    def lookup(self, latitude: float, longitude: float, bedrooms: int) -> Optional[dict]:
+        """Tra hồ sơ khu vực của một điểm; None nếu điểm nằm ngoài lưới"""
+        row, col, inside = self.cell_of(latitude, longitude)
+        if not inside:
+            return None
+        slot = self.slot_of(bedrooms)
+        profile = {name: array[slot, row, col][None] for name, array in self.values.items()}
+        if profile['count'][0] == 0:
+            return None
+        return profile_to_dict(profile, 0, self.vocab)
+
+    def lookup_many(self, latitude, longitude, bedrooms: int):
+        """
+        Tra hồ sơ khu vực cho nhiều điểm cùng số phòng ngủ.
+
+        Returns:
+            (profile, found): profile là dict tên thông số -> array, thông số
+            mode trả về mã trong `self.vocab`; found đánh dấu điểm có hồ sơ
+        """
+        row, col, inside = self.cell_of(latitude, longitude)
+        slot = self.slot_of(bedrooms)
+        profile = {name: array[slot, row, col] for name, array in self.values.items()}
+        return profile, inside & (profile['count'] > 0)
+
+    def save(self, path: str):
+        """Ghi lưới ra file .npz (ghi file tạm rồi đổi tên để tránh file dở dang)"""
+        arrays = {
+            'meta_format': np.array(GRID_FORMAT_VERSION),
+            'meta_geometry': np.array([self.cell_deg, self.origin_lat, self.origin_lon]),
+            'meta_shape': np.array(self.shape),
+            'meta_k': np.array(self.k),
+            'meta_dataset_version': np.array(self.dataset_version),
+            'bedroom_slots': self.bedroom_slots,
+        }
+        arrays.update({f'value_{name}': array for name, array in self.values.items()})
+        arrays.update({f'vocab_{name}': array for name, array in self.vocab.items()})
+        arrays.update({f'source_{name}': array for name, array in self.source.items()})
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NeighbourhoodGrid":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['meta_format']) != GRID_FORMAT_VERSION:
+                raise ValueError(f"Định dạng lưới không hỗ trợ: {int(data['meta_format'])}")
+            cell_deg, origin_lat, origin_lon = data['meta_geometry'].tolist()
+
+            def group(prefix):
+                return {key[len(prefix):]: data[key] for key in data.files if key.startswith(prefix)}
+
+            return cls(
+                cell_deg=cell_deg,
+                origin_lat=origin_lat,
+                origin_lon=origin_lon,
+                shape=tuple(data['meta_shape'].tolist()),
+                bedroom_slots=data['bedroom_slots'],
+                values=group('value_'),
+                vocab=group('vocab_'),
+                source=group('source_'),
+                dataset_version=str(data['meta_dataset_version']),
+                k=int(data['meta_k']),
+            )
+
+
+def _compute_cells(grid, columns, index, slot, cells, lat, lon):
+    """Tính lại hồ sơ của các ô `cells` (chỉ số phẳng) trong một slot"""
+    if len(cells) == 0:
+        return
+    if slot < len(grid.bedroom_slots):
+        positions, distances = index.nearest(lat[cells], lon[cells], int(grid.bedroom_slots[slot]), k=grid.k)
+    else:
+        positions, distances = index.query(lat[cells], lon[cells], grid.k)
+    if positions.shape[1] == 0:
+        return
+
+    profile = columns.aggregate(positions)
+    if positions.shape[1] >= grid.k:
+        profile['radius_km'] = distances[:, -1]
+    else:
+        # Chưa đủ k căn: bất kỳ dòng mới nào cũng có thể thay đổi ô này
+        profile['radius_km'] = np.full(len(cells), np.inf)
+
+    rows, cols = np.unravel_index(cells, grid.shape)
+    for name, array in grid.values.items():
+        array[slot, rows, cols] = profile[name]
+
+
+def _empty_values(n_slots: int, shape: tuple) -> Dict[str, np.ndarray]:
+    values = {name: np.full((n_slots, *shape), np.nan, dtype=np.float64) for name in MEAN_ATTRIBUTES}
+    values.update({name: np.zeros((n_slots, *shape), dtype=np.int32) for name in ROUNDED_ATTRIBUTES})
+    values.update({name: np.zeros((n_slots, *shape), dtype=np.int32) for name in MODE_ATTRIBUTES})
+    values['count'] = np.zeros((n_slots, *shape), dtype=np.int32)
+    values['radius_km'] = np.full((n_slots, *shape), np.inf, dtype=np.float64)
+    return values
+
+
+def _source(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return {
+        'hash': _row_hashes(frame),
+        'latitude': frame['latitude'].to_numpy(dtype=np.float64),
+        'longitude': frame['longitude'].to_numpy(dtype=np.float64),
+        'bedrooms': frame['bedrooms'].to_numpy(dtype=np.int64),
+    }
+
+
+def build_grid(
+    frame: pd.DataFrame,
+    index: SpatialIndex,
+    cell_deg: float,
+    dataset_version: str,
+    columns: Optional[ListingColumns] = None,
+    max_cells: int = 1_000_000,
+    k: int = NEIGHBOUR_COUNT,
+) -> NeighbourhoodGrid:
+    """Dựng toàn bộ lưới phủ bounding box của dữ liệu"""
+    columns = columns or ListingColumns(frame)
+    latitude = frame['latitude'].to_numpy(dtype=np.float64)
+    longitude = frame['longitude'].to_numpy(dtype=np.float64)
+    bedrooms = frame['bedrooms'].to_numpy(dtype=np.int64)
+
+    origin_lat = np.floor(np.nanmin(latitude) / cell_deg) * cell_deg
+    origin_lon = np.floor(np.nanmin(longitude) / cell_deg) * cell_deg
+    shape = (
+        int((np.nanmax(latitude) - origin_lat) // cell_deg) + 1,
+        int((np.nanmax(longitude) - origin_lon) // cell_deg) + 1,
+    )
+    if shape[0] * shape[1] > max_cells:
+        raise ValueError(
+            f"Lưới {shape[0]}x{shape[1]} vượt quá {max_cells} ô, hãy tăng resolution"
+        )
+
+    # Slot cho mọi số phòng ngủ trong dữ liệu và ±1 (nhánh fallback), slot cuối cho phần còn lại
+    bedroom_slots = np.arange(bedrooms.min() - 1, bedrooms.max() + 2)
+    grid = NeighbourhoodGrid(
+        cell_deg=cell_deg,
+        origin_lat=origin_lat,
+        origin_lon=origin_lon,
+        shape=shape,
+        bedroom_slots=bedroom_slots,
+        values=_empty_values(len(bedroom_slots) + 1, shape),
+        vocab=columns.vocab,
+        source=_source(frame),
+        dataset_version=dataset_version,
+        k=k,
+    )
+    lat, lon = grid.cell_centers()
+    all_cells = np.arange(shape[0] * shape[1])
+    for slot in range(grid.n_slots):
+        _compute_cells(grid, columns, index, slot, all_cells, lat, lon)
+    return grid
+
+
+def update_grid(
+    grid: NeighbourhoodGrid,
+    frame: pd.DataFrame,
+    index: SpatialIndex,
+    dataset_version: str,
+    columns: Optional[ListingColumns] = None,
+) -> NeighbourhoodGrid:
+    """
+    Cập nhật lưới theo dữ liệu mới, chỉ tính lại các ô bị ảnh hưởng.
+
+    Dựng lại toàn bộ nếu dữ liệu mới vượt ra ngoài lưới, có số phòng ngủ
+    ngoài dải slot hoặc từ điển type/facing thay đổi. Lưới cũ không bị sửa.
+    """
+    columns = columns or ListingColumns(frame)
+    source = _source(frame)
+    latitude, longitude, bedrooms = source['latitude'], source['longitude'], source['bedrooms']
+
+    _, _, inside = grid.cell_of(latitude, longitude)
+    same_vocab = all(
+        np.array_equal(grid.vocab[name], columns.vocab[name]) for name in MODE_ATTRIBUTES
+    )
+    if (
+        not inside.all()
+        or bedrooms.min() < grid.bedroom_slots[0] + 1
+        or bedrooms.max() > grid.bedroom_slots[-1] - 1
+        or not same_vocab
+    ):
+        return build_grid(frame, index, grid.cell_deg, dataset_version, columns=columns, k=grid.k)
+
+    # Các hash có số lần xuất hiện khác nhau giữa dữ liệu cũ và mới là dòng thêm/bớt
+    old, new = grid.source, source
+    hashes, counts_old = np.unique(old['hash'], return_counts=True)
+    new_hashes, counts_new = np.unique(new['hash'], return_counts=True)
+    merged = pd.Series(counts_old, index=hashes).subtract(
+        pd.Series(counts_new, index=new_hashes), fill_value=0
+    )
+    changed_hashes = merged.index[merged != 0].to_numpy()
+    old_changed = np.isin(old['hash'], changed_hashes)
+    new_changed = np.isin(new['hash'], changed_hashes)
+    changed_lat = np.concatenate([old['latitude'][old_changed], latitude[new_changed]])
+    changed_lon = np.concatenate([old['longitude'][old_changed], longitude[new_changed]])
+    changed_bedrooms = np.concatenate([old['bedrooms'][old_changed], bedrooms[new_changed]])
+
+    updated = NeighbourhoodGrid(
+        cell_deg=grid.cell_deg,
+        origin_lat=grid.origin_lat,
+        origin_lon=grid.origin_lon,
+        shape=grid.shape,
+        bedroom_slots=grid.bedroom_slots,
+        values={name: array.copy() for name, array in grid.values.items()},
+        vocab=grid.vocab,
+        source=source,
+        dataset_version=dataset_version,
+        k=grid.k,
+    )
+    if len(changed_lat) == 0:
+        return updated
+
+    old_counts = dict(zip(*np.unique(old['bedrooms'], return_counts=True)))
+    new_counts = dict(zip(*np.unique(bedrooms, return_counts=True)))
+    lat, lon = grid.cell_centers()
+    all_cells = np.arange(len(lat))
+    centers = np.radians(np.column_stack([lat, lon]))
+
+    for slot in range(grid.n_slots):
+        slot_bedrooms = int(grid.bedroom_slots[slot]) if slot < len(grid.bedroom_slots) else None
+        branch = _branch(new_counts, slot_bedrooms, grid.k)
+        if branch != _branch(old_counts, slot_bedrooms, grid.k):
+            _compute_cells(updated, columns, index, slot, all_cells, lat, lon)
+            continue
+
+        relevant = _relevant(branch, slot_bedrooms, changed_bedrooms)
+        if not relevant.any():
+            continue
+        tree = BallTree(
+            np.radians(np.column_stack([changed_lat[relevant], changed_lon[relevant]])),
+            metric='haversine',
+        )
+        # Nới bán kính một chút để dòng bị xóa nằm đúng ở láng giềng thứ k không bị sót
+        radius = np.minimum(grid.values['radius_km'][slot].ravel() / EARTH_RADIUS_KM * (1 + 1e-9), np.pi)
+        affected = tree.query_radius(centers, r=radius, count_only=True) > 0
+        _compute_cells(updated, columns, index, slot, all_cells[affected], lat, lon)
+    return updated
+
+
+def main():
+    """Dựng lưới hồ sơ khu vực offline từ file dữ liệu"""
+    from src.config import DATASET_PATH, GRID_MAX_CELLS, GRID_PATH, GRID_RESOLUTION
+
+    parser = argparse.ArgumentParser(description="Dựng lưới hồ sơ khu vực cho /simple-predict-price")
+    parser.add_argument("--data", default=DATASET_PATH, help="File CSV hoặc thư mục snapshot dạng cột")
+    parser.add_argument("--output", default=GRID_PATH, help="File .npz đầu ra")
+    parser.add_argument("--resolution", type=float, default=GRID_RESOLUTION, help="Kích thước ô (độ)")
+    parser.add_argument("--full", action="store_true", help="Dựng lại toàn bộ thay vì cập nhật")
+    args = parser.parse_args()
+
+    from src.dataset_store import DatasetStore
+
+    store = DatasetStore(args.data, watch_interval=0)
+    snapshot = store.load()
+    if snapshot is None:
+        raise SystemExit(1)
+
+    previous = None
+    if not args.full and os.path.exists(args.output):
+        previous = NeighbourhoodGrid.load(args.output)
+        if previous.cell_deg != args.resolution:
+            previous = None
+
+    if previous is not None:
+        grid = update_grid(previous, snapshot.frame, snapshot.spatial_index, snapshot.version, snapshot.columns)
+    else:
+        grid = build_grid(
+            snapshot.frame, snapshot.spatial_index, args.resolution, snapshot.version,
+            columns=snapshot.columns, max_cells=GRID_MAX_CELLS,
+        )
+    grid.save(args.output)
+    print(f"Đã lưu lưới {grid.shape[0]}x{grid.shape[1]} ({grid.n_slots} slot) vào {args.output}")
+
+
+if __name__ == "__main__":
+    main()
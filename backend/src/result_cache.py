@@ -0,0 +1,134 @@
+"""Cache kết quả dự đoán (LRU + TTL) có gộp request trùng đang chạy
+
+Khóa cache do handler tạo từ request đã chuẩn hóa (tọa độ làm tròn theo
+`quantize_coordinate`). Nếu nhiều request cùng khóa đến khi kết quả chưa
+có, chỉ request đầu tiên tính toán, các request còn lại chờ kết quả đó
+(single-flight). `invalidate()` xóa toàn bộ cache khi model hoặc dữ liệu
+được load lại; kết quả đang tính dở từ trước khi invalidate sẽ không được
+ghi vào cache.
+
+`get_or_compute` dành cho code đồng bộ. Handler async dùng `claim` rồi chờ
+Future trên event loop (`asyncio.wrap_future`), request chờ kết quả của
+request khác không chiếm thread nào.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def quantize_coordinate(value: float, precision: int) -> float:
+    """Làm tròn tọa độ về `precision` chữ số thập phân (4 ~ 11 m)"""
+    return round(value, precision)
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        """
+        Args:
+            max_entries: Số kết quả tối đa giữ trong cache (LRU)
+            ttl_seconds: Thời gian sống của một kết quả (giây)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Kết quả còn hạn trong cache hoặc None (không tính, không chờ)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[0]
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        Future chứa kết quả của khóa, không tính gì.
+
+        Returns:
+            (future, leader): cache hit thì future đã có kết quả; leader=True nghĩa là
+            chưa ai tính khóa này, người gọi phải tính rồi gọi `resolve` hoặc `reject`
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    future = Future()
+                    future.set_result(value)
+                    return future, False
+                del self._entries[key]
+                self._counters["expirations"] += 1
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self._counters["misses"] += 1
+            return future, True
+
+    def resolve(self, key: Hashable, future: Future, value: Any):
+        """Leader đã tính xong: lưu kết quả (nếu không bị invalidate từ lúc claim) và trả cho người chờ"""
+        with self._lock:
+            # invalidate() xóa _inflight, nên future còn được đăng ký nghĩa là kết quả chưa cũ
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counters["evictions"] += 1
+        future.set_result(value)
+
+    def reject(self, key: Hashable, future: Future, error: BaseException):
+        """Leader bị lỗi: không lưu gì, người chờ nhận cùng lỗi"""
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        future.set_exception(error)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Trả về kết quả trong cache hoặc tính bằng `compute` (một lần cho mỗi khóa)"""
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        try:
+            value = compute()
+        except BaseException as e:
+            self.reject(key, future, e)
+            raise
+        self.resolve(key, future, value)
+        return value
+
+    def invalidate(self):
+        """Xóa toàn bộ kết quả (gọi khi model hoặc dữ liệu được load lại)"""
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                **self._counters,
+            }
@@ -0,0 +1,67 @@
+"""Chạy API với nhiều worker dùng chung dữ liệu tham chiếu
+
+Process cha load dữ liệu (và dựng lưới) một lần, publish vào thư mục chia
+sẻ rồi khởi động uvicorn với `--workers`; các worker gắn dữ liệu đó bằng
+memory-map chỉ đọc (xem src/shared_store.py). Process cha tiếp tục theo
+dõi file dữ liệu và publish version mới, worker tự gắn lại.
+
+Model không được chia sẻ: mỗi worker load bundle như bình thường. Chỉ các
+array .npy (scaler, từ điển) được memory-map; XGBoost parse model.ubj vào
+bộ nhớ riêng của từng process (và cây biên dịch nếu dùng backend
+"compiled" cũng vậy), nên bộ nhớ cho model tăng theo số worker. Với model
+hiện tại phần này cỡ vài MB mỗi worker, nhỏ so với dữ liệu tham chiếu.
+
+    python -m src.serve --workers 4
+"""
+import argparse
+import os
+
+import uvicorn
+
+from src.config import (
+    DATASET_PATH, DATASET_WATCH_INTERVAL,
+    GRID_ENABLED, GRID_MAX_CELLS, GRID_PATH, GRID_RESOLUTION,
+)
+from src.dataset_store import DatasetStore
+from src.shared_store import publish_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chạy API với nhiều worker dùng chung dữ liệu")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shared-dir", default="shared_data", help="Thư mục chứa dữ liệu dùng chung")
+    args = parser.parse_args()
+
+    shared_dir = os.path.abspath(args.shared_dir)
+    store = DatasetStore(
+        DATASET_PATH,
+        watch_interval=DATASET_WATCH_INTERVAL,
+        grid_resolution=GRID_RESOLUTION if GRID_ENABLED else None,
+        grid_path=GRID_PATH,
+        grid_max_cells=GRID_MAX_CELLS,
+    )
+    snapshot = store.load()
+    if snapshot is None:
+        raise SystemExit(1)
+    publish_snapshot(snapshot, shared_dir)
+    print(f"Đã publish dữ liệu {snapshot.version} vào {shared_dir}")
+
+    def republish(snapshot):
+        publish_snapshot(snapshot, shared_dir)
+        print(f"Đã publish dữ liệu {snapshot.version} vào {shared_dir}")
+
+    store.add_listener(republish)
+    store.start_watching()
+
+    # Worker đọc biến này khi import src.app
+    os.environ["BDS_SHARED_DIR"] = shared_dir
+    try:
+        uvicorn.run("src.app:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        store.stop_watching()
+
+
+if __name__ == "__main__":
+    main()
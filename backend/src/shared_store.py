@@ -0,0 +1,177 @@
+"""Dữ liệu tham chiếu dùng chung giữa các worker uvicorn
+
+Khi chạy nhiều worker, process cha (src/serve.py) load dữ liệu một lần rồi
+`publish_snapshot` ghi các cấu trúc dựng sẵn (cột numpy, BallTree, lưới hồ
+sơ khu vực) vào `<root>/<dataset_version>/` bằng joblib và trỏ file
+`<root>/CURRENT` tới version đó. Worker dùng `SharedDatasetStore` để gắn
+snapshot bằng `joblib.load(mmap_mode='r')`: mọi array được memory-map chỉ
+đọc nên các worker dùng chung page cache thay vì mỗi worker một bản sao,
+bộ nhớ riêng của worker gần như không phụ thuộc kích thước dữ liệu.
+
+Worker không giữ DataFrame (`snapshot.frame` là None).
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional
+
+import joblib
+
+from src.dataset_store import DatasetSnapshot
+
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+PARTS = ("columns", "spatial_index", "grid")
+
+
+def publish_snapshot(snapshot: DatasetSnapshot, root: str, keep: int = 2) -> str:
+    """
+    Ghi snapshot vào thư mục chia sẻ và trỏ CURRENT tới nó.
+
+    Args:
+        snapshot: Snapshot đã dựng đầy đủ (trong process cha)
+        root: Thư mục chia sẻ
+        keep: Số version giữ lại (worker có thể vẫn đang dùng version trước)
+
+    Returns:
+        Đường dẫn thư mục của snapshot
+    """
+    os.makedirs(root, exist_ok=True)
+    target = os.path.join(root, snapshot.version)
+    if not os.path.exists(target):
+        staging = tempfile.mkdtemp(prefix=".snapshot-", dir=root)
+        try:
+            for name in PARTS:
+                joblib.dump(getattr(snapshot, name), os.path.join(staging, f"{name}.joblib"))
+            meta = {
+                "version": snapshot.version,
+                "mtime": snapshot.mtime,
+                "size": snapshot.size,
+                "rows": len(snapshot.columns.district_codes),
+                "published_at": time.time(),
+            }
+            with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.rename(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    # Đổi CURRENT bằng rename để worker không đọc phải file dở dang
+    current_tmp = os.path.join(root, f".{CURRENT_FILE}.tmp")
+    with open(current_tmp, "w") as f:
+        f.write(snapshot.version)
+    os.replace(current_tmp, os.path.join(root, CURRENT_FILE))
+
+    # Xóa version cũ; worker đang map file cũ vẫn đọc được cho đến khi đóng
+    versions = [
+        entry for entry in os.listdir(root)
+        if not entry.startswith(".") and os.path.isdir(os.path.join(root, entry))
+    ]
+    versions.sort(key=lambda entry: os.path.getmtime(os.path.join(root, entry)), reverse=True)
+    for entry in versions[keep:]:
+        if entry != snapshot.version:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return target
+
+
+def current_version(root: str) -> str:
+    with open(os.path.join(root, CURRENT_FILE)) as f:
+        return f.read().strip()
+
+
+def attach_snapshot(root: str, version: Optional[str] = None) -> DatasetSnapshot:
+    """Gắn (memory-map chỉ đọc) một snapshot đã publish, mặc định version trong CURRENT"""
+    version = version or current_version(root)
+    path = os.path.join(root, version)
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    parts = {name: joblib.load(os.path.join(path, f"{name}.joblib"), mmap_mode="r") for name in PARTS}
+    return DatasetSnapshot(
+        frame=None,
+        version=meta["version"],
+        mtime=meta["mtime"],
+        size=meta["size"],
+        loaded_at=time.time(),
+        **parts,
+    )
+
+
+class SharedDatasetStore:
+    """Cùng giao diện với DatasetStore nhưng gắn snapshot do process cha publish"""
+
+    def __init__(self, root: str, watch_interval: float = 5.0):
+        """
+        Args:
+            root: Thư mục chia sẻ
+            watch_interval: Chu kỳ (giây) kiểm tra CURRENT, <= 0 để tắt
+        """
+        self.root = root
+        self.watch_interval = watch_interval
+        self._snapshot: Optional[DatasetSnapshot] = None
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[DatasetSnapshot], None]] = []
+
+    def add_listener(self, callback: Callable[[DatasetSnapshot], None]):
+        """Đăng ký hàm được gọi sau mỗi lần snapshot mới được thay vào"""
+        self._listeners.append(callback)
+
+    def get(self) -> Optional[DatasetSnapshot]:
+        """Trả về snapshot hiện tại (None nếu chưa gắn được)"""
+        return self._snapshot
+
+    def load(self) -> Optional[DatasetSnapshot]:
+        """Gắn snapshot lần đầu, lỗi chỉ được in ra để server vẫn khởi động"""
+        try:
+            self.reload_if_changed()
+        except Exception as e:
+            print(f"Lỗi khi gắn dữ liệu dùng chung: {e}")
+        return self._snapshot
+
+    def reload_if_changed(self) -> bool:
+        """Gắn lại nếu CURRENT trỏ tới version khác. Trả về True nếu snapshot được thay thế."""
+        with self._reload_lock:
+            version = current_version(self.root)
+            current = self._snapshot
+            if current is not None and current.version == version:
+                return False
+
+            snapshot = attach_snapshot(self.root, version)
+            self._snapshot = snapshot
+            print(f"Đã gắn dữ liệu dùng chung {self.root}: version {version}")
+            for callback in self._listeners:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    print(f"Lỗi khi xử lý sự kiện load dữ liệu: {e}")
+            return True
+
+    def start_watching(self):
+        """Chạy thread nền theo dõi file CURRENT"""
+        if self.watch_interval <= 0 or self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, name="shared-dataset-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+        self._stop_event.set()
+        self._watcher.join(timeout=self.watch_interval + 1)
+        self._watcher = None
+
+    def _watch_loop(self):
+        while not self._stop_event.wait(self.watch_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # Giữ snapshot cũ nếu version mới chưa gắn được
+                print(f"Lỗi khi gắn lại dữ liệu dùng chung: {e}")
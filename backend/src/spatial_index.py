@@ -0,0 +1,117 @@
+"""Chỉ mục không gian cho tìm kiếm bất động sản gần nhất
+
+Dùng BallTree (sklearn) với metric haversine trên tọa độ radian, dựng một cây
+cho toàn bộ dữ liệu và một cây riêng cho từng số phòng ngủ. Nhờ vậy truy vấn
+k căn gần nhất có lọc theo số phòng ngủ (và fallback ±1 phòng) không phải
+quét lại toàn bộ dataset.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Khoảng cách haversine (km) giữa 2 điểm, hỗ trợ numpy array"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    def __init__(self, latitude, longitude, bedrooms, leaf_size: int = 40):
+        """
+        Args:
+            latitude, longitude: Tọa độ (độ) của từng dòng dữ liệu
+            bedrooms: Số phòng ngủ của từng dòng
+            leaf_size: Kích thước lá của BallTree
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        bedrooms = np.asarray(bedrooms)
+
+        # Bỏ các dòng thiếu tọa độ; vị trí trả về luôn là vị trí dòng (iloc) gốc
+        valid = np.isfinite(latitude) & np.isfinite(longitude)
+        self.positions = np.flatnonzero(valid)
+        coords = np.radians(np.column_stack([latitude[valid], longitude[valid]]))
+        self.size = len(self.positions)
+
+        self._tree = BallTree(coords, leaf_size=leaf_size, metric="haversine") if self.size else None
+        self._by_bedrooms: Dict[int, Tuple[BallTree, np.ndarray]] = {}
+        valid_bedrooms = bedrooms[valid]
+        for value in np.unique(valid_bedrooms):
+            members = np.flatnonzero(valid_bedrooms == value)
+            tree = BallTree(coords[members], leaf_size=leaf_size, metric="haversine")
+            self._by_bedrooms[int(value)] = (tree, self.positions[members])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SpatialIndex":
+        return cls(df["latitude"], df["longitude"], df["bedrooms"])
+
+    def bedroom_count(self, bedrooms: int) -> int:
+        """Số căn có đúng số phòng ngủ này"""
+        entry = self._by_bedrooms.get(int(bedrooms))
+        return len(entry[1]) if entry else 0
+
+    def query(self, latitude, longitude, k: int, bedrooms=None):
+        """
+        Tìm k căn gần nhất cho một hoặc nhiều điểm.
+
+        Args:
+            latitude, longitude: Tọa độ (độ), scalar hoặc array cùng độ dài
+            k: Số căn cần lấy
+            bedrooms: Giới hạn trong một số phòng ngủ (None = toàn bộ)
+
+        Returns:
+            (positions, distances_km) dạng array (n_points, k'), k' <= k
+        """
+        points = np.radians(
+            np.column_stack([np.atleast_1d(latitude), np.atleast_1d(longitude)]).astype(np.float64)
+        )
+        if bedrooms is None:
+            tree, members = self._tree, self.positions
+        else:
+            tree, members = self._by_bedrooms.get(int(bedrooms), (None, None))
+
+        if tree is None or len(members) == 0:
+            empty = np.empty((len(points), 0))
+            return empty.astype(np.int64), empty
+        k = min(k, len(members))
+        distances, idx = tree.query(points, k=k)
+        return members[idx], distances * EARTH_RADIUS_KM
+
+    def nearest(self, latitude, longitude, bedrooms: int, k: int = 5):
+        """
+        Tìm k căn gần nhất ưu tiên cùng số phòng ngủ.
+
+        Nếu không đủ k căn cùng số phòng ngủ thì lấy trong ±1 phòng, nếu vẫn
+        không đủ thì lấy k căn gần nhất bất kể số phòng ngủ. Việc chọn nhánh
+        chỉ phụ thuộc số lượng căn theo phòng ngủ nên áp dụng chung cho cả
+        một mảng điểm.
+
+        Returns:
+            (positions, distances_km) dạng array (n_points, k')
+        """
+        if self.bedroom_count(bedrooms) >= k:
+            return self.query(latitude, longitude, k, bedrooms=bedrooms)
+
+        candidates = [
+            self.query(latitude, longitude, k, bedrooms=value)
+            for value in (bedrooms - 1, bedrooms, bedrooms + 1)
+        ]
+        positions = np.concatenate([c[0] for c in candidates], axis=1)
+        distances = np.concatenate([c[1] for c in candidates], axis=1)
+        if positions.shape[1] >= k:
+            order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+            return (
+                np.take_along_axis(positions, order, axis=1),
+                np.take_along_axis(distances, order, axis=1),
+            )
+
+        return self.query(latitude, longitude, k)
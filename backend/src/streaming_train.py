@@ -0,0 +1,252 @@
+"""Train out-of-core cho dữ liệu lớn hơn RAM
+
+`train_model` đọc toàn bộ dữ liệu vào pandas rồi tạo thêm vài bản copy
+(dropna, các cột phái sinh, ma trận đã scale). Ở đây dữ liệu được đọc theo
+khối `chunk_rows` dòng (`columnar.iter_dataset`) qua ba lượt:
+
+1. Thống kê: từ điển categorical và mean/variance của từng feature (cho
+   scaler) được gộp dần qua từng khối, không giữ lại khối nào.
+2. Train: XGBoost đọc các khối đã scale qua `xgb.DataIter` và lưu ma trận
+   đã lượng tử hóa ra đĩa (external memory), rồi train `hist` trên đó.
+3. Đánh giá: R² train/test tính dần theo khối.
+
+Bộ nhớ tối đa vì vậy phụ thuộc `chunk_rows` chứ không phụ thuộc số dòng,
+ngoại trừ hash các dòng đã train (8 byte/dòng) được lưu vào bundle cho train
+tăng dần. Tập test là các dòng có hash chia hết cho 5 (~20%), nên dòng trùng
+nhau luôn cùng một phía.
+
+    python -m src.train_model --streaming --chunk-rows 250000
+"""
+import datetime
+import os
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import xgboost as xgb
+
+from src.columnar import iter_dataset
+from src.config import DATASET_PATH, MODEL_DIR, TRAIN_CHUNK_ROWS
+from src.feature_cache import prepare_training_frame, row_hashes
+from src.features import CATEGORICAL_COLUMNS, DISTRICT_ALIASES, FEATURE_COLUMNS, CategoryTable, FeaturePipeline
+from src.model_bundle import StandardScaling, save_bundle
+from src.train_model import MODEL_PARAMS
+
+# Mẫu số của phép chia train/test theo hash dòng (1/5 dòng vào tập test)
+TEST_FRACTION_DENOMINATOR = 5
+
+
+class RunningMoments:
+    """Mean và variance từng cột, gộp dần qua các khối (thuật toán Chan)"""
+
+    def __init__(self, width: int):
+        self.count = 0
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def update(self, values: np.ndarray):
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self.m2 / max(self.count, 1)
+
+
+class R2Accumulator:
+    """R² tính dần qua các khối"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.residual = 0.0
+
+    def update(self, y: np.ndarray, predictions: np.ndarray):
+        self.count += len(y)
+        self.sum += float(y.sum())
+        self.sum_squares += float((y ** 2).sum())
+        self.residual += float(((y - predictions) ** 2).sum())
+
+    def score(self) -> float:
+        if self.count < 2:
+            return float("nan")
+        total = self.sum_squares - self.sum ** 2 / self.count
+        return 1.0 - self.residual / total
+
+
+class TrainingChunks(xgb.DataIter):
+    """Các khối train đã scale cho XGBoost; mỗi lần reset đọc lại dữ liệu từ đầu"""
+
+    def __init__(self, batches, cache_prefix: str):
+        """
+        Args:
+            batches: Hàm trả về iterator mới của các (X đã scale, y)
+            cache_prefix: Tiền tố file cache external memory của XGBoost
+        """
+        super().__init__(cache_prefix=cache_prefix)
+        self._batches = batches
+        self._iterator = None
+
+    def next(self, input_data) -> bool:
+        if self._iterator is None:
+            self._iterator = self._batches()
+        batch = next(self._iterator, None)
+        if batch is None:
+            return False
+        input_data(data=batch[0], label=batch[1])
+        return True
+
+    def reset(self):
+        self._iterator = None
+
+
+def booster_params(params: dict) -> dict:
+    """Tham số XGBRegressor -> tham số xgb.train (n_estimators trả về riêng)"""
+    params = dict(params)
+    params.pop("n_estimators", None)
+    if "random_state" in params:
+        params["seed"] = params.pop("random_state")
+    return {"objective": "reg:squarederror", "tree_method": "hist", **params}
+
+
+def _chunks(path: str, chunk_rows: int, pipeline: FeaturePipeline, with_hashes: bool = True) -> Iterator:
+    """(frame, features chưa scale, y, hash dòng) của từng khối đã bỏ dòng thiếu"""
+    for frame in iter_dataset(path, chunk_rows):
+        frame = prepare_training_frame(frame)
+        if frame.empty:
+            continue
+        features, _ = pipeline.transform(frame)
+        hashes = row_hashes(frame) if with_hashes else None
+        yield frame, features, frame['price_per_m2'].to_numpy(), hashes
+
+
+def is_test_row(hashes: np.ndarray) -> np.ndarray:
+    return hashes % TEST_FRACTION_DENOMINATOR == 0
+
+
+def fit_statistics(path: str, chunk_rows: int):
+    """
+    Lượt 1: dựng pipeline (từ điển categorical) và scaler trong một lần đọc.
+
+    Mã categorical chỉ biết được sau khi có đủ từ điển, nên lượt này đếm số lần
+    xuất hiện của từng giá trị rồi suy ra mean/variance của cột mã hóa ở cuối.
+
+    Returns:
+        (pipeline, scaler, số dòng)
+
+    Raises:
+        ValueError: nếu không có dòng dữ liệu hợp lệ nào
+    """
+    reference_year = datetime.date.today().year
+    empty = FeaturePipeline({name: CategoryTable([]) for name in CATEGORICAL_COLUMNS}, reference_year)
+    moments = RunningMoments(len(FEATURE_COLUMNS))
+    counts: Dict[str, Counter] = {name: Counter() for name in CATEGORICAL_COLUMNS}
+
+    for frame, features, _, _ in _chunks(path, chunk_rows, empty, with_hashes=False):
+        moments.update(features)
+        for name, column in CATEGORICAL_COLUMNS.items():
+            for value, count in frame[column].astype(str).value_counts().items():
+                counts[name][value] += int(count)
+    if moments.count == 0:
+        raise ValueError(f"Không có dòng dữ liệu hợp lệ nào trong {path} (file rỗng hoặc mọi dòng thiếu giá trị)")
+
+    tables = {
+        name: CategoryTable.fit(list(counts[name]), DISTRICT_ALIASES if name == 'district' else None)
+        for name in CATEGORICAL_COLUMNS
+    }
+    pipeline = FeaturePipeline(tables, reference_year)
+
+    mean, variance = moments.mean.copy(), moments.variance.copy()
+    for name, table in tables.items():
+        index = FEATURE_COLUMNS.index(f'{name}_encoded')
+        codes = np.array([table.code(value) for value in counts[name]], dtype=np.float64)
+        weights = np.array(list(counts[name].values()), dtype=np.float64)
+        mean[index] = np.average(codes, weights=weights)
+        variance[index] = np.average((codes - mean[index]) ** 2, weights=weights)
+
+    # Giống StandardScaler: cột hằng số giữ nguyên scale 1
+    scale = np.sqrt(variance)
+    scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+    return pipeline, StandardScaling(mean, scale), moments.count
+
+
+def train_streaming(chunk_rows: int = TRAIN_CHUNK_ROWS, cache_dir: Optional[str] = None) -> str:
+    """
+    Train model trên dữ liệu đọc theo khối, bộ nhớ tối đa phụ thuộc `chunk_rows`.
+
+    Args:
+        chunk_rows: Số dòng mỗi khối
+        cache_dir: Thư mục cho file cache external memory (mặc định thư mục tạm)
+
+    Returns:
+        Version của bundle đã lưu
+    """
+    start = time.perf_counter()
+    pipeline, scaler, rows = fit_statistics(DATASET_PATH, chunk_rows)
+    print(f"Lượt thống kê: {rows:,} dòng, {time.perf_counter() - start:.1f}s")
+
+    def train_batches():
+        for _, features, y, hashes in _chunks(DATASET_PATH, chunk_rows, pipeline):
+            train = ~is_test_row(hashes)
+            if train.any():
+                yield scaler.transform(features[train]), y[train]
+
+    with tempfile.TemporaryDirectory(prefix="bds-xgb-cache-", dir=cache_dir) as cache:
+        chunks = TrainingChunks(train_batches, os.path.join(cache, "train"))
+        # XGBoost 3 có DMatrix external memory riêng cho hist; bản cũ dùng DMatrix với iterator
+        matrix_type = getattr(xgb, "ExtMemQuantileDMatrix", xgb.DMatrix)
+        dtrain = matrix_type(chunks)
+        booster = xgb.train(booster_params(MODEL_PARAMS), dtrain, num_boost_round=MODEL_PARAMS["n_estimators"])
+        del dtrain
+    print(f"Train: {time.perf_counter() - start:.1f}s")
+
+    # Lượt đánh giá: R² theo khối, gom hash dòng đã train và vài dòng test cho smoke check
+    scores = {"train": R2Accumulator(), "test": R2Accumulator()}
+    trained_rows = []
+    smoke_features = []
+    for _, features, y, hashes in _chunks(DATASET_PATH, chunk_rows, pipeline):
+        test = is_test_row(hashes)
+        predictions = booster.inplace_predict(scaler.transform(features))
+        scores["train"].update(y[~test], predictions[~test])
+        scores["test"].update(y[test], predictions[test])
+        trained_rows.append(np.unique(hashes[~test]))
+        if sum(map(len, smoke_features)) < 32:
+            smoke_features.append(features[test][:32])
+
+    train_score, test_score = scores["train"].score(), scores["test"].score()
+    seconds = time.perf_counter() - start
+    print(f"Train R² Score: {train_score:.4f}")
+    print(f"Test R² Score: {test_score:.4f}")
+
+    model = xgb.XGBRegressor()
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    version = save_bundle(
+        MODEL_DIR,
+        model,
+        scaler,
+        pipeline.tables,
+        FEATURE_COLUMNS,
+        metadata={
+            "metrics": {"train_r2": train_score, "test_r2": test_score},
+            "training_rows": int(rows),
+            "reference_year": pipeline.reference_year,
+            "params": MODEL_PARAMS,
+            "streaming": {"chunk_rows": chunk_rows, "seconds": seconds},
+        },
+        smoke_features=np.concatenate(smoke_features)[:32],
+        trained_rows=np.concatenate(trained_rows),
+    )
+
+    print(f"\nModel bundle {version} đã được lưu thành công vào {MODEL_DIR}/{version}/ ({seconds:.1f}s)")
+    return version
@@ -1,81 +1,92 @@
+import argparse
+import time
+from typing import List, Optional
+
 import pandas as pd
+from sklearn.metrics import r2_score
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.ensemble import RandomForestRegressor
 import xgboost as xgb
-import joblib
 import numpy as np
 
-def main():
-    """Hàm chính để train model dự đoán giá bất động sản"""
-    # Đọc dữ liệu
-    df = pd.read_csv('real_estate_data.csv')
-    df = df.dropna()
-
-    # Tính giá mỗi m2
-    df['price_per_m2'] = df['price'] / df['area']
-
-    # Tính tuổi nhà
-    current_year = 2024
-    df['building_age'] = current_year - df['year_built']
-
-    # Mã hóa các biến categorical
-    le_district = LabelEncoder()
-    le_type = LabelEncoder()
-    le_facing = LabelEncoder()
-
-    df['district_encoded'] = le_district.fit_transform(df['district'])
-    df['type_encoded'] = le_type.fit_transform(df['type'])
-    df['facing_encoded'] = le_facing.fit_transform(df['facing_direction'])
-
-    # Tạo feature tỷ lệ floor
-    df['floor_ratio'] = df['floor'] / df['total_floors']
-
-    # Tạo feature density (mật độ dân số khu vực)
-    df['area_density'] = df['nearby_price_count'] / (df['distance_to_center_km'] + 1)
-
-    # Tạo feature tổng hợp về khoảng cách đến các tiện ích
-    df['avg_distance_to_amenities'] = (
-        df['distance_to_metro_km'] + 
-        df['distance_to_school_km'] + 
-        df['distance_to_hospital_km'] + 
-        df['distance_to_mall_km']
-    ) / 4
-
-    # Tạo feature về tỷ lệ giá so với khu vực
-    df['price_vs_nearby_ratio'] = df['price_per_m2'] / (df['nearby_avg_price_per_m2'] + 1)
-
-    # Chọn features để train
-    feature_columns = [
-        'latitude', 'longitude', 'bedrooms', 'bathrooms', 'area',
-        'district_encoded', 'type_encoded', 'facing_encoded',
-        'building_age', 'floor', 'total_floors', 'floor_ratio',
-        'parking', 'condition_score',
-        'distance_to_center_km', 'distance_to_metro_km', 
-        'distance_to_school_km', 'distance_to_hospital_km', 'distance_to_mall_km',
-        'avg_distance_to_amenities', 'area_density',
-        'nearby_avg_price_per_m2', 'nearby_price_count', 'price_vs_nearby_ratio'
-    ]
-
-    X = df[feature_columns]
-    y = df['price_per_m2']
-
-    # Chuẩn hóa dữ liệu
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+from src.config import DATASET_PATH, FEATURE_CACHE_DIR, MODEL_DIR, TRAIN_CHUNK_ROWS
+from src.feature_cache import load_features, load_training_data, row_hashes
+from src.features import FEATURE_COLUMNS
+from src.model_bundle import ModelBundleError, load_bundle, save_bundle
+
+# Hyperparameters XGBoost mặc định (được ghi vào manifest để train tăng dần dùng lại)
+MODEL_PARAMS = {
+    "n_estimators": 200,
+    "max_depth": 8,
+    "learning_rate": 0.05,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "random_state": 42,
+}
+# Số dòng đã train lấy mẫu để kiểm tra model không "quên" dữ liệu cũ khi train tăng dần
+HISTORY_SAMPLE_ROWS = 10_000
+
+
+def holdout_r2(model, X: np.ndarray, y) -> float:
+    """R² trên tập kiểm tra (NaN nếu quá ít dòng)"""
+    if len(X) < 2:
+        return float("nan")
+    return float(r2_score(y, model.predict(X)))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Train model dự đoán giá bất động sản")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Train tiếp từ bundle mới nhất, chỉ trên các dòng dữ liệu mới",
+    )
+    parser.add_argument("--rounds", type=int, default=50, help="Số cây thêm khi train tăng dần")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Tỷ lệ dòng mới giữ lại để đánh giá")
+    parser.add_argument(
+        "--streaming", action="store_true",
+        help="Đọc dữ liệu theo khối và train bằng external memory (dữ liệu lớn hơn RAM)",
+    )
+    parser.add_argument("--chunk-rows", type=int, default=TRAIN_CHUNK_ROWS, help="Số dòng mỗi khối khi --streaming")
+    parser.add_argument("--cache-dir", default=None, help="Thư mục cache external memory khi --streaming")
+    parser.add_argument(
+        "--no-feature-cache", action="store_true",
+        help="Luôn tiền xử lý lại dữ liệu, không dùng/ghi cache feature",
+    )
+    args = parser.parse_args(argv)
+
+    if args.streaming:
+        # Import muộn: src.streaming_train dùng lại các hàm của module này
+        from src.streaming_train import train_streaming
+        train_streaming(args.chunk_rows, args.cache_dir)
+    elif args.incremental:
+        train_incremental(args.rounds, args.holdout)
+    else:
+        train_full(use_cache=not args.no_feature_cache)
+
+
+def train_full(use_cache: bool = True):
+    """
+    Train model dự đoán giá bất động sản từ đầu trên toàn bộ dữ liệu
+
+    Args:
+        use_cache: Dùng lại ma trận feature đã tính nếu dữ liệu không đổi (src/feature_cache.py)
+    """
+    # Đọc dữ liệu, mã hóa categorical, tính feature phái sinh và chuẩn hóa
+    # (pipeline dùng chung với API), hoặc lấy từ cache
+    start = time.perf_counter()
+    data = load_features(DATASET_PATH, cache_dir=FEATURE_CACHE_DIR if use_cache else None)
+    source = f"cache {data.key}" if data.cached else "tiền xử lý"
+    print(f"Feature ({source}): {len(data):,} dòng, {time.perf_counter() - start:.1f}s")
+    pipeline, scaler = data.pipeline, data.scaler
+    feature_columns = list(FEATURE_COLUMNS)
 
     # Chia dữ liệu train/test
-    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test, train_rows, test_rows = train_test_split(
+        data.scaled, data.target, np.arange(len(data)), test_size=0.2, random_state=42
+    )
 
     # Huấn luyện model XGBoost với hyperparameters tốt hơn
-    model = xgb.XGBRegressor(
-        n_estimators=200,
-        max_depth=8,
-        learning_rate=0.05,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        random_state=42
-    )
+    model = xgb.XGBRegressor(**MODEL_PARAMS)
 
     model.fit(X_train, y_train)
 
@@ -95,24 +106,131 @@ def main():
     print("\nTop 10 Feature Importance:")
     print(feature_importance.head(10))
 
-    # Lưu model và các encoder
-    joblib.dump(model, "xgb_model.pkl")
-    joblib.dump(scaler, "scaler.pkl")
-    joblib.dump(le_district, "label_encoder_district.pkl")
-    joblib.dump(le_type, "label_encoder_type.pkl")
-    joblib.dump(le_facing, "label_encoder_facing.pkl")
-
-    # Lưu danh sách features để sử dụng khi predict
-    joblib.dump(feature_columns, "feature_columns.pkl")
-
-    print("\nModel và encoders đã được lưu thành công!")
-    print("Các file được tạo:")
-    print("- xgb_model.pkl")
-    print("- scaler.pkl") 
-    print("- label_encoder_district.pkl")
-    print("- label_encoder_type.pkl")
-    print("- label_encoder_facing.pkl")
-    print("- feature_columns.pkl")
+    # Lưu model, scaler, encoders và thứ tự features thành một bundle có version
+    version = save_bundle(
+        MODEL_DIR,
+        model,
+        scaler,
+        pipeline.tables,
+        feature_columns,
+        metadata={
+            "metrics": {"train_r2": float(train_score), "test_r2": float(test_score)},
+            "training_rows": int(len(data)),
+            "reference_year": pipeline.reference_year,
+            "params": MODEL_PARAMS,
+        },
+        # Vài dòng test (chưa scale) để server kiểm tra bundle trước khi dùng
+        smoke_features=data.features[test_rows[:32]],
+        # Dòng test không được đánh dấu nên lần train tăng dần sau sẽ dùng chúng
+        trained_rows=data.row_hashes[train_rows],
+    )
+
+    print(f"\nModel bundle {version} đã được lưu thành công vào {MODEL_DIR}/{version}/")
+    return version
+
+
+def train_incremental(rounds: int = 50, holdout: float = 0.2) -> Optional[str]:
+    """
+    Train tiếp booster của bundle mới nhất trên các dòng chưa từng được train.
+
+    Scaler và mã categorical cũ được giữ nguyên (giá trị mới chỉ được thêm vào
+    cuối từ điển) để các cây đã có vẫn nhận đúng đầu vào, nên thời gian train
+    tỷ lệ với số dòng mới chứ không phải toàn bộ lịch sử.
+
+    Args:
+        rounds: Số cây thêm vào
+        holdout: Tỷ lệ dòng mới giữ lại để đánh giá (chưa được đánh dấu là đã train)
+
+    Returns:
+        Version của bundle mới, None nếu không có dòng mới
+    """
+    try:
+        previous = load_bundle(MODEL_DIR)
+    except ModelBundleError as e:
+        raise SystemExit(f"Lỗi khi load bundle trước đó: {e}")
+    if previous.trained_rows is None:
+        raise SystemExit(
+            f"Bundle {previous.version} không lưu các dòng đã train, hãy train đầy đủ một lần trước"
+        )
+
+    start = time.perf_counter()
+    df = load_training_data()
+    hashes = row_hashes(df)
+    is_new = ~np.isin(hashes, previous.trained_rows)
+    new_rows = np.flatnonzero(is_new)
+    print(f"Bundle {previous.version}: {len(df):,} dòng dữ liệu, {len(new_rows):,} dòng mới")
+    if len(new_rows) < 2:
+        print("Không có đủ dòng mới để train tăng dần")
+        return None
+
+    # Mã cũ giữ nguyên, quận/loại nhà/hướng mới được thêm vào cuối
+    pipeline = previous.pipeline.extend(df.iloc[new_rows])
+    for name, table in pipeline.tables.items():
+        added = table.classes_[len(previous.encoders[name].classes_):]
+        if len(added):
+            print(f"Thêm vào từ điển {name}: {added.tolist()}")
+
+    train_rows, test_rows = train_test_split(new_rows, test_size=holdout, random_state=42)
+    history_rows = np.flatnonzero(~is_new)
+    if len(history_rows) > HISTORY_SAMPLE_ROWS:
+        history_rows = np.random.default_rng(42).choice(history_rows, HISTORY_SAMPLE_ROWS, replace=False)
+
+    target = df['price_per_m2'].to_numpy()
+
+    def features_of(rows):
+        features, _ = pipeline.transform(df.iloc[rows])
+        return features, previous.scaler.transform(features), target[rows]
+
+    _, X_train, y_train = features_of(train_rows)
+    test_features, X_test, y_test = features_of(test_rows)
+    _, X_history, y_history = features_of(history_rows)
+
+    before = {
+        "new_holdout_r2": holdout_r2(previous.model, X_test, y_test),
+        "history_r2": holdout_r2(previous.model, X_history, y_history),
+    }
+
+    params = {**MODEL_PARAMS, **previous.manifest.get("params", {}), "n_estimators": rounds}
+    model = xgb.XGBRegressor(**params)
+    model.fit(X_train, y_train, xgb_model=previous.model.get_booster())
+
+    after = {
+        "new_holdout_r2": holdout_r2(model, X_test, y_test),
+        "history_r2": holdout_r2(model, X_history, y_history),
+    }
+    seconds = time.perf_counter() - start
+
+    print(f"\nTrain tăng dần {len(train_rows):,} dòng, thêm {rounds} cây trong {seconds:.1f}s")
+    print(f"{'':<16} {'trước':>8} {'sau':>8}")
+    for name in before:
+        print(f"{name:<16} {before[name]:>8.4f} {after[name]:>8.4f}")
+
+    version = save_bundle(
+        MODEL_DIR,
+        model,
+        previous.scaler,
+        pipeline.tables,
+        FEATURE_COLUMNS,
+        metadata={
+            "metrics": {"before": before, "after": after},
+            "training_rows": int(len(df)),
+            "reference_year": pipeline.reference_year,
+            "params": {**params, "n_estimators": model.get_booster().num_boosted_rounds()},
+            "incremental": {
+                "parent_version": previous.version,
+                "new_rows": int(len(new_rows)),
+                "trained_rows": int(len(train_rows)),
+                "rounds": rounds,
+                "seconds": seconds,
+            },
+        },
+        smoke_features=test_features[:32],
+        trained_rows=np.concatenate([previous.trained_rows, hashes[train_rows]]),
+    )
+
+    print(f"\nModel bundle {version} đã được lưu thành công vào {MODEL_DIR}/{version}/")
+    return version
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,157 @@
+"""Biên dịch booster XGBoost thành các mảng numpy phẳng để dự đoán nhanh
+
+Với request một dòng, `XGBRegressor.predict` tốn phần lớn thời gian cho
+DMatrix và lớp wrapper chứ không phải duyệt cây. `CompiledForest` đọc JSON
+của booster và đặt mỗi cây vào một cây nhị phân đầy đủ độ sâu D (node i có
+con 2i+1 và 2i+2), lá nông hơn D được kéo dài bằng các node luôn đi trái.
+Nhờ vậy việc duyệt tất cả các cây cho tất cả các dòng chỉ là D bước gather
+và so sánh trên mảng (dòng x cây).
+
+Chỉ hỗ trợ gbtree với objective hồi quy dạng identity (reg:squarederror...).
+"""
+import json
+
+import numpy as np
+import xgboost as xgb
+
+# Objective có hàm link identity: dự đoán = base_score + tổng giá trị lá
+IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror", "reg:quantileerror"}
+
+# Cây sâu hơn sẽ tốn 2^D node mỗi cây khi đặt vào cây đầy đủ
+MAX_DEPTH = 12
+
+# Số dòng xử lý mỗi lần để mảng trung gian (dòng x cây) không quá lớn
+ROW_CHUNK = 4096
+
+
+def _parse_base_score(value: str) -> float:
+    # XGBoost >= 2 có thể lưu dạng "[4.2E7]"
+    return float(value.strip("[]").split(",")[0])
+
+
+def _tree_depth(left: list, right: list) -> int:
+    depth = {0: 0}
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        if left[node] != -1:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+            stack.extend((left[node], right[node]))
+    return max(depth.values())
+
+
+class CompiledForest:
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        default_left: np.ndarray,
+        leaf_value: np.ndarray,
+        base_score: float,
+    ):
+        """
+        Args:
+            feature, threshold: Feature và ngưỡng của các node trong, dạng (số cây, 2^D - 1)
+            default_left: Đi sang trái khi giá trị thiếu (NaN), dạng (số cây, 2^D - 1)
+            leaf_value: Giá trị lá, dạng (số cây, 2^D)
+            base_score: Giá trị khởi đầu của dự đoán
+        """
+        self.n_trees, self.n_internal = feature.shape
+        self.depth = int(np.log2(self.n_internal + 1))
+        self.feature = feature.ravel()
+        self.threshold = threshold.ravel()
+        self.default_left = default_left.ravel()
+        self.leaf_value = leaf_value.ravel()
+        self.base_score = base_score
+        self._tree_offset = np.arange(self.n_trees, dtype=np.int64)[None, :] * self.n_internal
+        self._leaf_offset = np.arange(self.n_trees, dtype=np.int64)[None, :] * (self.n_internal + 1)
+
+    @classmethod
+    def from_booster(cls, booster: xgb.Booster) -> "CompiledForest":
+        """
+        Biên dịch từ JSON của booster; chỉ lấy các cây tới best_iteration nếu có.
+
+        Raises:
+            ValueError: nếu booster dùng objective, loại booster hoặc split không hỗ trợ
+        """
+        model = json.loads(booster.save_raw("json"))
+        learner = model["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Objective {objective} không được hỗ trợ")
+        gbm = learner["gradient_booster"]
+        if gbm["name"] != "gbtree":
+            raise ValueError(f"Booster {gbm['name']} không được hỗ trợ")
+
+        trees = gbm["model"]["trees"]
+        best_iteration = booster.attr("best_iteration")
+        if best_iteration is not None:
+            trees = trees[: gbm["model"]["iteration_indptr"][int(best_iteration) + 1]]
+        if any(any(tree.get("split_type", [])) for tree in trees):
+            raise ValueError("Split categorical không được hỗ trợ")
+
+        depth = max([_tree_depth(tree["left_children"], tree["right_children"]) for tree in trees] + [1])
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Cây sâu {depth} tầng, tối đa {MAX_DEPTH}")
+
+        n_internal = 2 ** depth - 1
+        feature = np.zeros((len(trees), n_internal), dtype=np.int64)
+        # Node đệm: ngưỡng +inf và mặc định trái nên luôn đi trái
+        threshold = np.full((len(trees), n_internal), np.inf, dtype=np.float32)
+        default_left = np.ones((len(trees), n_internal), dtype=bool)
+        leaf_value = np.zeros((len(trees), n_internal + 1), dtype=np.float32)
+
+        for t, tree in enumerate(trees):
+            left, right = tree["left_children"], tree["right_children"]
+            # Với node lá, split_conditions chứa giá trị lá
+            conditions = tree["split_conditions"]
+            stack = [(0, 0, 0)]
+            while stack:
+                node, position, level = stack.pop()
+                if level == depth:
+                    leaf_value[t, position - n_internal] = conditions[node]
+                elif left[node] == -1:
+                    stack.append((node, 2 * position + 1, level + 1))
+                else:
+                    feature[t, position] = tree["split_indices"][node]
+                    threshold[t, position] = conditions[node]
+                    default_left[t, position] = tree["default_left"][node]
+                    stack.append((left[node], 2 * position + 1, level + 1))
+                    stack.append((right[node], 2 * position + 2, level + 1))
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            default_left=default_left,
+            leaf_value=leaf_value,
+            base_score=_parse_base_score(learner["learner_model_param"]["base_score"]),
+        )
+
+    def predict(self, features) -> np.ndarray:
+        """Dự đoán cho ma trận feature (đã scale) dạng (n, m)"""
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        if features.ndim == 1:
+            features = features[None, :]
+        result = np.empty(len(features), dtype=np.float32)
+        for start in range(0, len(features), ROW_CHUNK):
+            chunk = features[start:start + ROW_CHUNK]
+            result[start:start + len(chunk)] = self._predict_chunk(chunk)
+        return result
+
+    def _predict_chunk(self, features: np.ndarray) -> np.ndarray:
+        n_rows, n_features = features.shape
+        flat = features.ravel()
+        row_offset = np.arange(n_rows, dtype=np.int64)[:, None] * n_features
+        has_missing = np.isnan(flat).any()
+
+        position = np.zeros((n_rows, self.n_trees), dtype=np.int64)
+        for _ in range(self.depth):
+            node = self._tree_offset + position
+            x = flat[row_offset + self.feature[node]]
+            # XGBoost đi nhánh trái khi x < ngưỡng; NaN đi theo hướng mặc định
+            go_right = ~(x < self.threshold[node])
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.default_left[node], go_right)
+            position = 2 * position + 1 + go_right
+        leaves = self.leaf_value[self._leaf_offset + position - self.n_internal]
+        return (leaves.sum(axis=1, dtype=np.float64) + self.base_score).astype(np.float32)
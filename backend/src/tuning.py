@@ -0,0 +1,284 @@
+"""Tìm hyperparameter XGBoost song song với early stopping
+
+Mỗi trial là một bộ tham số lấy ngẫu nhiên (có seed) từ không gian tìm kiếm,
+được train với `tree_method="hist"` trên tập fit và dừng sớm theo RMSE trên tập
+validation. Các trial chạy trên một process pool, mỗi trial dùng `--threads`
+thread để tổng số thread không vượt quá số core.
+
+Kết quả từng trial được ghi nối tiếp vào file JSONL ngay khi xong; chạy lại
+cùng lệnh sẽ bỏ qua các trial đã có nên một lần tìm bị ngắt giữa chừng có thể
+chạy tiếp. Cuối cùng bộ tham số tốt nhất được train lại trên fit + validation
+và lưu thành bundle như `train_model`.
+
+    python -m src.tuning --trials 40 --workers 4 --threads 2
+    python -m src.tuning --space space.json --results tuning.jsonl
+
+File không gian tìm kiếm là JSON: danh sách là các giá trị để chọn, dict
+{"low", "high", "log", "int"} là một khoảng.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from src.config import DATASET_PATH, MODEL_DIR
+from src.feature_cache import load_features
+from src.features import FEATURE_COLUMNS
+from src.model_bundle import save_bundle
+from src.train_model import MODEL_PARAMS
+
+# Không gian tìm kiếm mặc định
+SEARCH_SPACE = {
+    "max_depth": [4, 6, 8, 10],
+    "learning_rate": {"low": 0.02, "high": 0.2, "log": True},
+    "subsample": {"low": 0.6, "high": 1.0},
+    "colsample_bytree": {"low": 0.6, "high": 1.0},
+    "min_child_weight": [1, 3, 5, 10],
+    "reg_lambda": {"low": 0.5, "high": 10.0, "log": True},
+}
+# Số cây tối đa của một trial (early stopping thường dừng sớm hơn nhiều)
+MAX_ROUNDS = 2000
+
+# Dữ liệu của worker, load một lần trong initializer
+_worker_data: Dict[str, np.ndarray] = {}
+
+
+def sample_params(space: dict, seed: int, trial: int) -> dict:
+    """Bộ tham số của một trial, chỉ phụ thuộc (space, seed, trial) để chạy tiếp ra cùng kết quả"""
+    rng = np.random.default_rng([seed, trial])
+    params = {}
+    for name, spec in sorted(space.items()):
+        if isinstance(spec, list):
+            value = spec[int(rng.integers(len(spec)))]
+        elif spec.get("log"):
+            value = math.exp(rng.uniform(math.log(spec["low"]), math.log(spec["high"])))
+        else:
+            value = rng.uniform(spec["low"], spec["high"])
+        if isinstance(spec, dict):
+            value = int(round(value)) if spec.get("int") else round(float(value), 6)
+        params[name] = value
+    return params
+
+
+def load_results(path: str, search_id: str) -> Dict[int, dict]:
+    """Các trial đã xong của lần tìm `search_id` trong file JSONL (trial -> kết quả)"""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Dòng cuối có thể bị cắt nếu process bị kill khi đang ghi
+                continue
+            if record.get("search_id") == search_id:
+                results[record["trial"]] = record
+    return results
+
+
+def _init_worker(data_dir: str):
+    for name in ("X_fit", "y_fit", "X_valid", "y_valid"):
+        _worker_data[name] = np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode="r")
+
+
+def run_trial(trial: int, params: dict, threads: int, early_stopping: int) -> dict:
+    """Train một trial trên dữ liệu của worker, dừng sớm theo RMSE trên tập validation"""
+    data = _worker_data
+    start = time.perf_counter()
+    model = xgb.XGBRegressor(**{
+        **MODEL_PARAMS,
+        **params,
+        "n_estimators": MAX_ROUNDS,
+        "tree_method": "hist",
+        "n_jobs": threads,
+        "early_stopping_rounds": early_stopping,
+        "eval_metric": "rmse",
+    })
+    model.fit(data["X_fit"], data["y_fit"], eval_set=[(data["X_valid"], data["y_valid"])], verbose=False)
+    predictions = model.predict(data["X_valid"], iteration_range=(0, model.best_iteration + 1))
+    return {
+        "trial": trial,
+        "params": params,
+        "best_iteration": int(model.best_iteration),
+        "valid_rmse": float(model.best_score),
+        "valid_r2": float(r2_score(data["y_valid"], predictions)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def search(
+    trials: int,
+    workers: int,
+    threads: int,
+    results_path: str,
+    space: Optional[dict] = None,
+    seed: int = 42,
+    early_stopping: int = 50,
+    valid_size: float = 0.2,
+) -> Optional[str]:
+    """
+    Tìm hyperparameter rồi lưu bundle của bộ tham số tốt nhất.
+
+    Args:
+        trials: Tổng số trial (tính cả các trial đã có trong file kết quả)
+        workers: Số process chạy trial song song
+        threads: Số thread XGBoost của mỗi trial
+        results_path: File JSONL lưu kết quả từng trial
+        space: Không gian tìm kiếm (mặc định SEARCH_SPACE)
+        seed: Seed lấy mẫu tham số
+        early_stopping: Dừng trial khi RMSE validation không giảm sau số cây này
+        valid_size: Tỷ lệ tập train dùng làm validation
+
+    Returns:
+        Version của bundle đã lưu, None nếu không trial nào thành công
+    """
+    space = space or SEARCH_SPACE
+    # Feature chưa scale lấy từ cache (scaler được fit lại chỉ trên tập train)
+    data = load_features(DATASET_PATH)
+    pipeline, X, y = data.pipeline, data.features, data.target
+
+    # Tập test giống hệt train_model nên R² so sánh được với model train đầy đủ
+    train_rows, test_rows = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+    fit_rows, valid_rows = train_test_split(train_rows, test_size=valid_size, random_state=seed)
+    scaler = StandardScaler().fit(X[train_rows])
+    X_scaled = scaler.transform(X)
+
+    # Lần tìm được nhận diện bởi dữ liệu + cách chia + không gian tìm kiếm
+    fingerprint = hashlib.sha256()
+    fingerprint.update(json.dumps(
+        {
+            "features": data.key, "space": space, "seed": seed,
+            "valid_size": valid_size, "early_stopping": early_stopping,
+        },
+        sort_keys=True,
+    ).encode())
+    search_id = fingerprint.hexdigest()[:16]
+
+    done = load_results(results_path, search_id)
+    pending = [trial for trial in range(trials) if trial not in done]
+    print(
+        f"Lần tìm {search_id}: {len(data):,} dòng, {len(done)} trial đã có, {len(pending)} trial cần chạy "
+        f"({workers} process x {threads} thread)"
+    )
+
+    if pending:
+        with tempfile.TemporaryDirectory(prefix="bds-tuning-") as data_dir:
+            # Worker memory-map dữ liệu thay vì nhận bản copy qua pickle
+            arrays = {
+                "X_fit": X_scaled[fit_rows], "y_fit": y[fit_rows],
+                "X_valid": X_scaled[valid_rows], "y_valid": y[valid_rows],
+            }
+            for name, values in arrays.items():
+                np.save(os.path.join(data_dir, f"{name}.npy"), values)
+
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data_dir,)) as pool, \
+                    open(results_path, "a", encoding="utf-8") as results_file:
+                futures = {
+                    pool.submit(run_trial, trial, sample_params(space, seed, trial), threads, early_stopping): trial
+                    for trial in pending
+                }
+                for future in as_completed(futures):
+                    trial = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Lỗi trial {trial}: {e}")
+                        result = {"trial": trial, "params": sample_params(space, seed, trial), "error": str(e)}
+                    result["search_id"] = search_id
+                    results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    results_file.flush()
+                    done[trial] = result
+                    if "error" not in result:
+                        print(
+                            f"Trial {trial:>3}: RMSE {result['valid_rmse']:,.0f}, R² {result['valid_r2']:.4f}, "
+                            f"{result['best_iteration'] + 1} cây, {result['seconds']:.1f}s"
+                        )
+
+    finished = [result for trial, result in done.items() if trial < trials and "error" not in result]
+    if not finished:
+        print("Không có trial nào thành công")
+        return None
+    best = min(finished, key=lambda result: result["valid_rmse"])
+    print(f"\nTrial tốt nhất {best['trial']}: RMSE {best['valid_rmse']:,.0f}, tham số {best['params']}")
+
+    # Train lại trên fit + validation với số cây early stopping đã chọn
+    params = {**MODEL_PARAMS, **best["params"], "n_estimators": best["best_iteration"] + 1, "tree_method": "hist"}
+    model = xgb.XGBRegressor(**params, n_jobs=workers * threads)
+    model.fit(X_scaled[train_rows], y[train_rows])
+    train_score = model.score(X_scaled[train_rows], y[train_rows])
+    test_score = model.score(X_scaled[test_rows], y[test_rows])
+    print(f"Train R² Score: {train_score:.4f}")
+    print(f"Test R² Score: {test_score:.4f}")
+
+    version = save_bundle(
+        MODEL_DIR,
+        model,
+        scaler,
+        pipeline.tables,
+        FEATURE_COLUMNS,
+        metadata={
+            "metrics": {"train_r2": float(train_score), "test_r2": float(test_score)},
+            "training_rows": int(len(data)),
+            "reference_year": pipeline.reference_year,
+            "params": params,
+            "tuning": {
+                "search_id": search_id,
+                "trials": len(finished),
+                "best_trial": best["trial"],
+                "valid_rmse": best["valid_rmse"],
+                "space": space,
+            },
+        },
+        smoke_features=X[test_rows[:32]],
+        trained_rows=data.row_hashes[train_rows],
+    )
+    print(f"\nModel bundle {version} đã được lưu thành công vào {MODEL_DIR}/{version}/")
+    return version
+
+
+def main(argv: Optional[List[str]] = None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Tìm hyperparameter XGBoost song song")
+    parser.add_argument("--trials", type=int, default=32, help="Tổng số trial")
+    parser.add_argument("--workers", type=int, default=None, help="Số trial chạy song song")
+    parser.add_argument("--threads", type=int, default=None, help="Số thread XGBoost mỗi trial")
+    parser.add_argument("--space", default=None, help="File JSON không gian tìm kiếm (mặc định SEARCH_SPACE)")
+    parser.add_argument("--results", default=os.path.join(MODEL_DIR, "tuning.jsonl"), help="File JSONL kết quả trial")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--early-stopping", type=int, default=50, help="Số cây không cải thiện trước khi dừng")
+    parser.add_argument("--valid-size", type=float, default=0.2, help="Tỷ lệ tập train dùng làm validation")
+    args = parser.parse_args(argv)
+
+    # Chia core cho các trial: workers x threads <= số core
+    threads = args.threads or max(1, cores // (args.workers or cores))
+    workers = args.workers or max(1, cores // threads)
+    if workers * threads > cores:
+        print(f"Cảnh báo: {workers} process x {threads} thread vượt quá {cores} core")
+
+    space = None
+    if args.space:
+        with open(args.space, encoding="utf-8") as f:
+            space = json.load(f)
+
+    os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+    print(f"Dữ liệu: {DATASET_PATH}")
+    search(
+        args.trials, workers, threads, args.results, space=space, seed=args.seed,
+        early_stopping=args.early_stopping, valid_size=args.valid_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,7 @@ echo "📦 Đang kiểm tra và cài đặt dependencies..."
 poetry install
 
 # Kiểm tra xem model đã được train chưa
-if [ ! -f "xgb_model.pkl" ]; then
+if [ ! -f "models/LATEST" ]; then
     echo "🤖 Model chưa được train. Đang tiến hành training..."
     poetry run train
     echo "✅ Model đã được train thành công."
@@ -0,0 +1,70 @@
+"""
+Cấu hình chung cho test
+
+Biến môi trường BDS_ được đặt trước khi bất kỳ module src nào được import, để
+src.config (và src.app) dùng dữ liệu giả lập và model nhỏ trong thư mục tạm
+thay vì file thật trong backend/.
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+WORKDIR = tempfile.mkdtemp(prefix="bds-test-")
+ADMIN_TOKEN = "test-token"
+
+os.environ.update({
+    "BDS_DATASET_PATH": os.path.join(WORKDIR, "data.csv"),
+    "BDS_MODEL_DIR": os.path.join(WORKDIR, "models"),
+    "BDS_MODEL_WATCH_INTERVAL": "0",
+    "BDS_DATASET_WATCH_INTERVAL": "0",
+    "BDS_FEATURE_CACHE_DIR": "",
+    "BDS_GRID_PATH": os.path.join(WORKDIR, "grid.npz"),
+    "BDS_HEATMAP_CACHE_DIR": os.path.join(WORKDIR, "tile_cache"),
+    "BDS_SHARED_DIR": "",
+    "BDS_ADMIN_TOKEN": ADMIN_TOKEN,
+})
+
+from benchmarks.synthetic_data import write_dataset  # noqa: E402
+from src.feature_cache import load_features  # noqa: E402
+from src.features import FEATURE_COLUMNS  # noqa: E402
+from src.model_bundle import save_bundle  # noqa: E402
+
+
+def train_bundle(model_dir: str, data_path: str, n_estimators: int = 30) -> str:
+    """Train một model nhỏ trên `data_path` và lưu thành bundle trong `model_dir`"""
+    data = load_features(data_path, cache_dir=None)
+    model = xgb.XGBRegressor(n_estimators=n_estimators, max_depth=4, random_state=0)
+    model.fit(data.scaled, data.target)
+    return save_bundle(
+        model_dir,
+        model,
+        data.scaler,
+        data.pipeline.tables,
+        list(FEATURE_COLUMNS),
+        smoke_features=data.features[:16],
+        trained_rows=np.asarray(data.row_hashes),
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def dataset_and_model():
+    """Dữ liệu giả lập và bundle mới nhất dùng chung cho cả phiên test"""
+    write_dataset(os.environ["BDS_DATASET_PATH"], rows=3000, seed=7)
+    version = train_bundle(os.environ["BDS_MODEL_DIR"], os.environ["BDS_DATASET_PATH"])
+    yield version
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(dataset_and_model):
+    """TestClient của API (import src.app sau khi đã có dữ liệu và model)"""
+    from fastapi.testclient import TestClient
+
+    import src.app as app
+
+    with TestClient(app.app) as test_client:
+        yield test_client
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+# src.app được import qua fixture `client` (conftest.py), sau khi đã có dữ liệu và model
+
+LISTING = {
+    "latitude": 10.78, "longitude": 106.70, "area": 80, "bedrooms": 2, "bathrooms": 2,
+    "type": "apartment", "district": "Quan 1", "year_built": 2015, "floor": 5, "total_floors": 20,
+    "parking": 1, "facing_direction": "North", "distance_to_center_km": 1.0,
+    "distance_to_metro_km": 0.5, "distance_to_school_km": 0.3, "distance_to_hospital_km": 1.0,
+    "distance_to_mall_km": 0.8, "nearby_avg_price_per_m2": 80_000_000, "nearby_price_count": 10,
+    "condition_score": 8.0,
+}
+ADMIN_TOKEN = os.environ["BDS_ADMIN_TOKEN"]
+
+
+def test_batch_matches_single_predictions(client):
+    items = [LISTING, {**LISTING, "area": 120, "district": "Quan 7", "type": "house"}]
+    response = client.post("/predict-price/batch", json={"items": items})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 2 and body["failed"] == 0
+    assert [result["index"] for result in body["results"]] == [0, 1]
+
+    for item, result in zip(items, body["results"]):
+        single = client.post("/predict-price", json=item).json()
+        assert result["estimated_price_per_m2"] == pytest.approx(single["estimated_price_per_m2"], rel=1e-6)
+        assert result["total_estimated_price"] == pytest.approx(result["estimated_price_per_m2"] * item["area"])
+        assert result["normalized_district"] == single["normalized_district"]
+    assert body["model_version"] == single["model_version"]
+
+
+def test_batch_reports_errors_per_item(client):
+    items = [
+        {**LISTING, "district": "Quan Khong Co"},
+        LISTING,
+        {**LISTING, "type": "castle"},
+        {**LISTING, "facing_direction": "Up"},
+    ]
+    response = client.post("/predict-price/batch", json={"items": items})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 1 and body["failed"] == 3
+
+    results = body["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert "Quan Khong Co" in results[0]["error"] and "estimated_price_per_m2" not in results[0]
+    assert results[1]["estimated_price_per_m2"] > 0 and "error" not in results[1]
+    assert "castle" in results[2]["error"]
+    assert "Up" in results[3]["error"]
+
+
+def test_empty_batch(client):
+    body = client.post("/predict-price/batch", json={"items": []}).json()
+    assert body["results"] == [] and body["succeeded"] == 0 and body["failed"] == 0
+
+
+def test_batch_over_limit_is_rejected(client, monkeypatch):
+    import src.app as app
+
+    monkeypatch.setattr(app, "BATCH_MAX_ITEMS", 2)
+    response = client.post("/predict-price/batch", json={"items": [LISTING] * 3})
+    assert response.status_code == 413
+
+
+def test_single_prediction_with_unknown_district_is_400(client):
+    response = client.post("/predict-price", json={**LISTING, "district": "Quan Khong Co"})
+    assert response.status_code == 400
+
+
+def test_admin_reload_requires_token(client, monkeypatch):
+    import src.app as app
+
+    assert client.post("/admin/reload-model").status_code == 403
+    assert client.post("/admin/reload-model", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    response = client.post("/admin/reload-model", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 200
+    assert response.json()["model_version"] == client.get("/model").json()["model_version"]
+
+    # Không đặt BDS_ADMIN_TOKEN: endpoint bị tắt, kể cả khi gửi header rỗng
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "")
+    assert client.post("/admin/reload-model", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_admin_reload_rejects_unknown_version(client):
+    before = client.get("/model").json()["model_version"]
+    for version in ("fedcba9876543210", "../models"):
+        response = client.post(
+            "/admin/reload-model", params={"version": version}, headers={"X-Admin-Token": ADMIN_TOKEN}
+        )
+        assert response.status_code == 409
+    assert client.get("/model").json()["model_version"] == before
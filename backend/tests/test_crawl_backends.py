@@ -0,0 +1,169 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from benchmarks.bench_crawl import start_server
+from benchmarks.bench_parse import TYPES
+from crawler.backends import FetchResult, HttpBackend
+from crawler.index import NhatotRealEstateCrawler
+from crawler.pacing import AdaptivePacer
+from crawler.sinks import MemorySink
+
+ITEMS = 4
+# Trang render bằng JavaScript: HTML không có danh sách tin cũng không có __NEXT_DATA__
+SHELL_PAGE = '<html><body><div id="__next"></div></body></html>'
+CAPTCHA_PAGE = "<html><title>Just a moment...</title><body></body></html>"
+
+
+class ScriptedBackend:
+    """Backend giả: trả các response định sẵn cho từng URL, còn lại tải thật qua HTTP"""
+
+    def __init__(self, name: str, script: dict = None):
+        self.name = name
+        # url -> danh sách (status, html) trả lần lượt
+        self.script = {url: list(responses) for url, responses in (script or {}).items()}
+        self.http = HttpBackend(concurrency=4)
+        self.calls = []
+
+    async def start(self):
+        return await self.http.start()
+
+    async def fetch(self, url: str) -> FetchResult:
+        self.calls.append(url)
+        if self.script.get(url):
+            status, html = self.script[url].pop(0)
+            return FetchResult(url, html, status, 0.001, self.name)
+        result = await self.http.fetch(url)
+        result.backend = self.name
+        return result
+
+    async def close(self):
+        await self.http.close()
+
+
+@asynccontextmanager
+async def listing_server(page_format: str = "html", rate_limit: float = 0.0, stats: dict = None):
+    runner, base_url = await start_server(ITEMS, page_format, 0.0, rate_limit, stats)
+    try:
+        yield base_url
+    finally:
+        await runner.cleanup()
+
+
+def page_url(base_url: str, page_num: int) -> str:
+    return base_url if page_num == 1 else f"{base_url}?page={page_num}"
+
+
+def make_crawler(base_url: str, backends=None, **kwargs) -> NhatotRealEstateCrawler:
+    kwargs.setdefault("max_pages", 3)
+    kwargs.setdefault("concurrency", 3)
+    return NhatotRealEstateCrawler(
+        mode="http", base_url=base_url, backends=backends, sink=MemorySink(),
+        budget=AdaptivePacer(kwargs["concurrency"], min_interval=0.0, start_interval=0.01),
+        **kwargs,
+    )
+
+
+def test_html_pages_are_extracted_in_page_order():
+    async def scenario():
+        async with listing_server("html") as base_url:
+            crawler = make_crawler(base_url)
+            assert await crawler.crawl_nhatot_danang()
+            return crawler.sink.rows
+
+    rows = asyncio.run(scenario())
+
+    assert len(rows) == 3 * ITEMS
+    assert [row["page_number"] for row in rows] == [1] * ITEMS + [2] * ITEMS + [3] * ITEMS
+    assert [row["item_index"] for row in rows[:ITEMS]] == list(range(1, ITEMS + 1))
+    assert len({row["url"] for row in rows}) == len(rows)
+    first = rows[0]
+    assert first["url"] == f"https://www.nhatot.com/mua-ban-can-ho/{100000 + ITEMS}.htm"
+    assert first["title"].startswith("Bán căn hộ") and first["price"].endswith("tỷ")
+    assert first["area"].endswith("m²") and first["property_type"] == TYPES[ITEMS % len(TYPES)]
+
+
+def test_embedded_json_pages_are_extracted():
+    async def scenario():
+        async with listing_server("json") as base_url:
+            crawler = make_crawler(base_url)
+            assert await crawler.crawl_nhatot_danang()
+            return crawler.sink.rows
+
+    rows = asyncio.run(scenario())
+
+    assert len(rows) == 3 * ITEMS
+    expected_ids = [100000 + page * ITEMS + i for page in (1, 2, 3) for i in range(ITEMS)]
+    assert [row["url"] for row in rows] == [f"https://www.nhatot.com/{list_id}.htm" for list_id in expected_ids]
+    first = rows[0]
+    assert first["location"] == "Phường Thạch Thang, Quận Hải Châu"
+    assert first["image_url"] == "https://cdn.chotot.com/0.jpg"
+    assert first["property_type"] == "Nhà ở" and first["title"].startswith("Bán nhà")
+
+
+def test_page_without_listings_falls_back_to_next_backend():
+    async def scenario():
+        async with listing_server("html") as base_url:
+            first = ScriptedBackend("http", {page_url(base_url, 2): [(200, SHELL_PAGE)]})
+            second = ScriptedBackend("browser")
+            crawler = make_crawler(base_url, backends=[first, second])
+            assert await crawler.crawl_nhatot_danang()
+            return base_url, crawler, first, second
+
+    base_url, crawler, first, second = asyncio.run(scenario())
+
+    assert [row["page_number"] for row in crawler.sink.rows] == [1] * ITEMS + [2] * ITEMS + [3] * ITEMS
+    assert sorted(first.calls) == sorted(page_url(base_url, page) for page in (1, 2, 3))
+    assert second.calls == [page_url(base_url, 2)]
+    assert crawler.budget.blocked == crawler.budget.errors == 0
+
+
+def test_server_error_skips_the_page_or_falls_back():
+    async def scenario(with_fallback: bool):
+        async with listing_server("html") as base_url:
+            first = ScriptedBackend("http", {page_url(base_url, 2): [(503, "Service Unavailable")]})
+            backends = [first, ScriptedBackend("browser")] if with_fallback else [first]
+            crawler = make_crawler(base_url, backends=backends)
+            assert await crawler.crawl_nhatot_danang()
+            return crawler, first
+
+    crawler, first = asyncio.run(scenario(with_fallback=False))
+    # HTTP 5xx không được tải lại như khi bị chặn
+    assert len(first.calls) == 3
+    assert [row["page_number"] for row in crawler.sink.rows] == [1] * ITEMS + [3] * ITEMS
+    assert crawler.budget.errors == 1 and crawler.budget.blocked == 0
+
+    crawler, _ = asyncio.run(scenario(with_fallback=True))
+    assert [row["page_number"] for row in crawler.sink.rows] == [1] * ITEMS + [2] * ITEMS + [3] * ITEMS
+
+
+def test_blocked_page_is_retried_then_crawled():
+    async def scenario():
+        async with listing_server("html") as base_url:
+            url = page_url(base_url, 2)
+            first = ScriptedBackend("http", {url: [(429, "Too Many Requests"), (200, CAPTCHA_PAGE)]})
+            crawler = make_crawler(base_url, backends=[first], block_retries=2)
+            assert await crawler.crawl_nhatot_danang()
+            return url, crawler, first
+
+    url, crawler, first = asyncio.run(scenario())
+
+    assert first.calls.count(url) == 3
+    assert crawler.budget.blocked == 2
+    assert [row["page_number"] for row in crawler.sink.rows] == [1] * ITEMS + [2] * ITEMS + [3] * ITEMS
+
+
+def test_rate_limited_server_page_is_skipped_after_retries():
+    stats = {}
+
+    async def scenario():
+        # Server trả 429 từ request thứ ba trong cùng một giây
+        async with listing_server("html", rate_limit=2, stats=stats) as base_url:
+            crawler = make_crawler(base_url, concurrency=1, block_retries=0)
+            assert await crawler.crawl_nhatot_danang()
+            return crawler
+
+    crawler = asyncio.run(scenario())
+
+    assert stats == {"requests": 3, "blocked": 1}
+    assert crawler.budget.blocked == 1
+    assert [row["page_number"] for row in crawler.sink.rows] == [1] * ITEMS + [2] * ITEMS
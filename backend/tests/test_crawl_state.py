@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+
+from benchmarks.bench_crawl import start_server
+from crawler.backends import HttpBackend
+from crawler.index import NhatotRealEstateCrawler
+from crawler.pacing import PolitenessBudget
+from crawler.sinks import MemorySink
+from crawler.state import CrawlState
+
+ITEMS = 4
+
+
+class RecordingBackend(HttpBackend):
+    """HttpBackend ghi lại các trang đã tải, lỗi mạng ở các trang chỉ định"""
+
+    def __init__(self, fail_pages=()):
+        super().__init__(concurrency=4)
+        self.fail_pages = set(fail_pages)
+        self.requested = []
+
+    async def fetch(self, url):
+        page_num = int(url.rsplit("?page=", 1)[1]) if "?page=" in url else 1
+        self.requested.append(page_num)
+        if page_num in self.fail_pages:
+            raise ConnectionResetError(f"Lỗi giả lập: {url}")
+        return await super().fetch(url)
+
+
+class CrashingSink(MemorySink):
+    """Sink lỗi khi ghi trang chỉ định (như process bị dừng giữa chừng)"""
+
+    def __init__(self, crash_page: int):
+        super().__init__()
+        self.crash_page = crash_page
+
+    def _write(self, rows):
+        if rows[0]["page_number"] == self.crash_page:
+            raise OSError("Lỗi giả lập: hết dung lượng đĩa")
+        super()._write(rows)
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite"))
+    yield state
+    state.close()
+
+
+def run_crawls(state: CrawlState, *runs: dict):
+    """
+    Các lần crawl liên tiếp qua cùng một server local (cùng base_url trong state).
+
+    Mỗi lần crawl là dict tham số: max_pages, fail_pages, sink, concurrency.
+
+    Returns:
+        List (crawler, kết quả, các trang đã tải, `last_run` sau lần crawl) theo từng lần
+    """
+    async def scenario():
+        runner, base_url = await start_server(ITEMS, "html", 0.0)
+        results = []
+        try:
+            for run in runs:
+                concurrency = run.get("concurrency", 1)
+                backend = RecordingBackend(run.get("fail_pages", ()))
+                crawler = NhatotRealEstateCrawler(
+                    max_pages=run["max_pages"], concurrency=concurrency,
+                    budget=PolitenessBudget(concurrency, 0.0), backends=[backend],
+                    base_url=base_url, sink=run.get("sink") or MemorySink(), state=state,
+                )
+                ok = await crawler.crawl_nhatot_danang()
+                results.append((crawler, ok, backend.requested, last_run(state)))
+        finally:
+            await runner.cleanup()
+        return results
+
+    return asyncio.run(scenario())
+
+
+def last_run(state: CrawlState):
+    """(run_id, đã xong, last_page, max_page) của lần crawl gần nhất"""
+    run_id, finished_at, last_page, max_page = state.conn.execute(
+        "SELECT run_id, finished_at, last_page, max_page FROM runs ORDER BY run_id DESC LIMIT 1"
+    ).fetchone()
+    return run_id, finished_at is not None, last_page, max_page
+
+
+def pages_of(crawler):
+    return sorted({row["page_number"] for row in crawler.sink.rows})
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_failed_middle_page_keeps_run_resumable(state, concurrency):
+    first, second = run_crawls(
+        state,
+        {"max_pages": 5, "fail_pages": [3], "concurrency": concurrency},
+        {"max_pages": 5, "concurrency": concurrency},
+    )
+
+    crawler, ok, _, run = first
+    assert ok and crawler.failed_pages == [3]
+    assert pages_of(crawler) == [1, 2, 4, 5]
+    # Trang 3 chưa được lưu: lần crawl chưa xong, lần sau chạy tiếp từ trang 3
+    run_id, finished, last_page, max_page = run
+    assert not finished and (last_page, max_page) == (2, 5)
+
+    crawler, ok, requested, run = second
+    assert ok and crawler.failed_pages == []
+    assert sorted(requested) == [3, 4, 5]
+    assert pages_of(crawler) == [3] and crawler.new_count == ITEMS
+    assert state.listing_count() == 5 * ITEMS
+    assert run == (run_id, True, 5, 5)
+
+
+def test_interrupted_run_resumes_after_last_written_page(state):
+    first, second = run_crawls(
+        state,
+        {"max_pages": 4, "sink": CrashingSink(crash_page=3)},
+        {"max_pages": 4},
+    )
+
+    crawler, ok, _, run = first
+    assert not ok and pages_of(crawler) == [1, 2]
+    run_id, finished, last_page, max_page = run
+    assert not finished and (last_page, max_page) == (2, 2)
+
+    crawler, ok, requested, run = second
+    assert ok and requested == [3, 4]
+    assert pages_of(crawler) == [3, 4] and crawler.new_count == 2 * ITEMS
+    assert run == (run_id, True, 4, 4)
+
+
+def test_restart_abandons_unfinished_run(state):
+    run_id, _, _ = state.start_run("http://nhatot.test/mua-ban")
+    state.commit_page(run_id, 1, state.diff([{"url": "https://www.nhatot.com/1.htm", "title": "Nhà"}]))
+
+    assert state.start_run("http://nhatot.test/mua-ban") == (run_id, 2, 1)
+    new_run, start_page, resumed_until = state.start_run("http://nhatot.test/mua-ban", restart=True)
+
+    assert new_run != run_id and (start_page, resumed_until) == (1, 0)
+    finished = state.conn.execute("SELECT finished_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()[0]
+    assert finished is not None
+
+
+def test_diff_separates_new_updated_and_unchanged_listings(state):
+    rows = [
+        {"url": f"https://www.nhatot.com/{100 + i}.htm", "title": f"Nhà {i}", "price": "2 tỷ",
+         "page_number": 1, "item_index": i + 1, "scraped_at": "2024-05-01T10:00:00"}
+        for i in range(4)
+    ]
+    run_id, _, _ = state.start_run("http://nhatot.test/mua-ban")
+    first = state.diff(rows)
+    assert (first.new, first.updated, first.unchanged) == (4, 0, 0) and first.rows == rows
+    state.commit_page(run_id, 1, first)
+
+    later = [
+        # Chỉ đổi vị trí trên trang và thời điểm crawl: không tính là cập nhật
+        {**rows[0], "page_number": 2, "item_index": 3, "scraped_at": "2024-05-02T10:00:00"},
+        {**rows[1], "price": "1,8 tỷ"},
+        rows[2],
+        rows[3],
+        {"url": "https://www.nhatot.com/200.htm", "title": "Nhà mới", "price": "3 tỷ"},
+        # Tin xuất hiện hai lần trên cùng trang chỉ được tính một lần
+        {"url": "https://www.nhatot.com/200.htm", "title": "Nhà mới", "price": "3 tỷ"},
+    ]
+    delta = state.diff(later)
+    assert (delta.new, delta.updated, delta.unchanged) == (1, 1, 3)
+    assert delta.rows == [later[1], later[4]]
+
+    state.commit_page(run_id, 2, delta)
+    assert state.listing_count() == 5
+    assert state.diff(later).rows == []
+
+
+def test_new_run_stops_at_first_page_without_new_listings(state):
+    first, second = run_crawls(state, {"max_pages": 3}, {"max_pages": 3})
+
+    crawler, ok, requested, run = first
+    assert ok and requested == [1, 2, 3] and crawler.new_count == 3 * ITEMS
+    assert run[1:] == (True, 3, 3)
+
+    # Lần crawl mới: trang 1 không có tin mới nên các trang cũ hơn không được tải
+    crawler, ok, requested, run = second
+    assert requested == [1]
+    assert crawler.sink.rows == [] and crawler.new_count == 0 and crawler.failed_pages == []
+    assert run[1:] == (True, 1, 1)
+
+
+def test_resumed_pages_do_not_stop_pagination(state):
+    first, second = run_crawls(state, {"max_pages": 4, "fail_pages": [2]}, {"max_pages": 4})
+    assert first[3][1:] == (False, 1, 4)
+
+    # Trang 3 và 4 không có tin mới nhưng đã được chính lần crawl này ghi, nên không dừng sớm
+    crawler, ok, requested, run = second
+    assert ok and requested == [2, 3, 4]
+    assert crawler.new_count == ITEMS and pages_of(crawler) == [2]
+    assert run[1:] == (True, 4, 4)
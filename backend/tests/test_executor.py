@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.executor import DeadlineExceeded, ExecutorSaturated, InferenceExecutor
+
+
+async def _wait_until_running(executor, count):
+    while executor.stats()["running"] < count:
+        await asyncio.sleep(0.001)
+
+
+def test_full_queue_is_rejected_immediately():
+    executor = InferenceExecutor(max_workers=1, max_queue=1, timeout=5.0)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await _wait_until_running(executor, 1)
+        assert executor.stats()["queued"] == 1
+
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(lambda: "rejected")
+
+        release.set()
+        return await running, await queued
+
+    try:
+        assert asyncio.run(scenario()) == (True, "queued")
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_request_past_deadline_fails_and_queued_job_is_not_run():
+    executor = InferenceExecutor(max_workers=1, max_queue=4, timeout=5.0)
+    release = threading.Event()
+    calls = []
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5, timeout=0.05))
+        await _wait_until_running(executor, 1)
+        with pytest.raises(DeadlineExceeded):
+            await executor.run(calls.append, "queued", timeout=0.05)
+        with pytest.raises(DeadlineExceeded):
+            await running
+
+    try:
+        asyncio.run(scenario())
+        assert calls == []
+        assert executor.stats()["timed_out"] == 2
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_run_inference_maps_overload_to_429_and_deadline_to_503(monkeypatch):
+    import src.app as app
+
+    executor = InferenceExecutor(max_workers=1, max_queue=0, timeout=0.05)
+    monkeypatch.setattr(app, "inference", executor)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(app.run_inference(release.wait, 5))
+        await _wait_until_running(executor, 1)
+        with pytest.raises(HTTPException) as rejected:
+            await app.run_inference(lambda: None)
+        with pytest.raises(HTTPException) as expired:
+            await running
+        return rejected.value, expired.value
+
+    try:
+        rejected, expired = asyncio.run(scenario())
+        assert rejected.status_code == 429
+        assert rejected.headers == {"Retry-After": "1"}
+        assert expired.status_code == 503
+    finally:
+        release.set()
+        executor.shutdown()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import generate_chunk
+from src.feature_cache import load_features, load_training_data
+from src.features import (
+    CATEGORICAL_COLUMNS, DISTRICT_ALIASES, FEATURE_COLUMNS, FeaturePipeline, normalize_district_name,
+)
+
+REFERENCE_YEAR = 2024
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return generate_chunk(300, seed=3)
+
+
+@pytest.fixture(scope="module")
+def pipeline(frame):
+    return FeaturePipeline.fit(frame, reference_year=REFERENCE_YEAR)
+
+
+def _reference_features(frame: pd.DataFrame) -> np.ndarray:
+    """Feature tính trực tiếp bằng pandas theo định nghĩa (mã categorical theo thứ tự sắp xếp như LabelEncoder)"""
+    df = frame.copy()
+    for name, column in CATEGORICAL_COLUMNS.items():
+        classes = np.unique(df[column].astype(str))
+        df[f'{name}_encoded'] = np.searchsorted(classes, df[column].astype(str)).astype(float)
+    df['building_age'] = REFERENCE_YEAR - df['year_built']
+    df['floor_ratio'] = np.where(df['total_floors'] > 0, df['floor'] / df['total_floors'].clip(lower=1), 0.0)
+    df['avg_distance_to_amenities'] = (
+        df['distance_to_metro_km'] + df['distance_to_school_km'] +
+        df['distance_to_hospital_km'] + df['distance_to_mall_km']
+    ) / 4
+    df['area_density'] = df['nearby_price_count'] / (df['distance_to_center_km'] + 1)
+    df['price_vs_nearby_ratio'] = 1.0
+    return df[list(FEATURE_COLUMNS)].to_numpy(dtype=np.float64)
+
+
+def test_vectorized_transform_matches_definition(frame, pipeline):
+    features, invalid = pipeline.transform(frame)
+
+    assert features.shape == (len(frame), len(FEATURE_COLUMNS))
+    np.testing.assert_allclose(features, _reference_features(frame), rtol=1e-12)
+    assert not any(mask.any() for mask in invalid.values())
+
+
+def test_single_row_paths_match_vectorized(frame, pipeline):
+    batch, _ = pipeline.transform(frame)
+
+    for i in range(0, len(frame), 7):
+        row = frame.iloc[i]
+        from_dict, invalid = pipeline.transform(row.to_dict())
+        from_frame, _ = pipeline.transform(frame.iloc[[i]])
+        np.testing.assert_array_equal(from_dict, batch[[i]])
+        np.testing.assert_array_equal(from_frame, batch[[i]])
+        assert not any(mask.any() for mask in invalid.values())
+
+
+def test_scalar_columns_broadcast_like_repeated_rows(frame, pipeline):
+    # Bản đồ nhiệt: hồ sơ khu vực là array, số phòng ngủ là scalar chung
+    columns = {name: frame[name].to_numpy() for name in frame.columns}
+    columns["bedrooms"] = 3
+    features, _ = pipeline.transform(columns)
+
+    expected, _ = pipeline.transform(frame.assign(bedrooms=3))
+    np.testing.assert_array_equal(features, expected)
+
+
+def test_training_features_match_serving_transform(tmp_path):
+    path = tmp_path / "data.csv"
+    generate_chunk(400, seed=5).to_csv(path, index=False)
+    data = load_features(str(path), cache_dir=None)
+
+    # Request đơn lẻ khi serve đi qua nhánh một dòng của cùng pipeline
+    prepared = load_training_data(str(path))
+    for i in (0, 17, 399):
+        served, _ = data.pipeline.transform(prepared.iloc[i].to_dict())
+        np.testing.assert_array_equal(served[0], data.features[i])
+
+
+def test_unknown_categories_are_flagged_in_both_paths(frame, pipeline):
+    row = {**frame.iloc[0].to_dict(), "district": "Quan 99", "type": "castle"}
+    features, invalid = pipeline.transform(row)
+    district, kind, facing = (FEATURE_COLUMNS.index(f"{name}_encoded") for name in ("district", "type", "facing"))
+
+    assert invalid["district"].tolist() == [True]
+    assert invalid["type"].tolist() == [True]
+    assert invalid["facing"].tolist() == [False]
+    assert np.isnan(features[0, district]) and np.isnan(features[0, kind])
+    assert not np.isnan(features[0, facing])
+
+    mixed = frame.iloc[:4].copy()
+    mixed.loc[mixed.index[1], "district"] = "Quan 99"
+    mixed.loc[mixed.index[3], "facing_direction"] = "Up"
+    features, invalid = pipeline.transform(mixed)
+    assert invalid["district"].tolist() == [False, True, False, False]
+    assert invalid["facing"].tolist() == [False, False, False, True]
+    assert np.isnan(features[1, district]) and np.isnan(features[3, facing])
+    np.testing.assert_array_equal(features[[0, 2]], pipeline.transform(frame.iloc[[0, 2]])[0])
+
+
+@pytest.mark.parametrize("alias", ["Quận 1", "Quận Bình Thạnh", "Thành phố Thủ Đức", "Thủ Đức"])
+def test_district_aliases_map_to_training_codes(frame, pipeline, alias):
+    canonical = DISTRICT_ALIASES[alias]
+    assert normalize_district_name(alias) == canonical
+    assert pipeline.tables["district"].code(alias) == pipeline.tables["district"].code(canonical) >= 0
+
+    row = frame.iloc[0].to_dict()
+    by_alias, invalid = pipeline.transform({**row, "district": alias})
+    by_name, _ = pipeline.transform({**row, "district": canonical})
+    np.testing.assert_array_equal(by_alias, by_name)
+    assert not invalid["district"].any()
+
+    rows = frame.iloc[:3].assign(district=[alias, canonical, alias])
+    features, invalid = pipeline.transform(rows)
+    column = FEATURE_COLUMNS.index("district_encoded")
+    assert len(set(features[:, column])) == 1 and not invalid["district"].any()
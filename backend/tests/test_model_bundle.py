@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from src.feature_cache import load_features
+from src.features import FEATURE_COLUMNS
+from src.model_bundle import MANIFEST_FILE, ModelBundleError, latest_version, load_bundle, save_bundle
+
+
+@pytest.fixture(scope="module")
+def trained():
+    """Model nhỏ đã train cùng dữ liệu feature"""
+    data = load_features(os.environ["BDS_DATASET_PATH"], cache_dir=None)
+    model = xgb.XGBRegressor(n_estimators=20, max_depth=3, random_state=0)
+    model.fit(data.scaled, data.target)
+    return model, data
+
+
+@pytest.fixture
+def bundle_root(tmp_path, trained):
+    model, data = trained
+    root = str(tmp_path / "models")
+    save_bundle(
+        root, model, data.scaler, data.pipeline.tables, list(FEATURE_COLUMNS),
+        smoke_features=data.features[:8],
+    )
+    return root
+
+
+def test_round_trip_gives_identical_predictions(bundle_root, trained):
+    model, data = trained
+    bundle = load_bundle(bundle_root)
+
+    assert bundle.version == latest_version(bundle_root)
+    assert bundle.feature_columns == list(FEATURE_COLUMNS)
+    np.testing.assert_array_equal(bundle.predict(data.features[:200]), model.predict(data.scaled[:200]))
+    np.testing.assert_array_equal(bundle.smoke_predictions, model.predict(data.scaled[:8]))
+
+
+def test_same_content_gives_same_version(bundle_root, trained):
+    model, data = trained
+    again = save_bundle(
+        bundle_root, model, data.scaler, data.pipeline.tables, list(FEATURE_COLUMNS),
+        smoke_features=data.features[:8],
+    )
+    assert again == latest_version(bundle_root)
+    assert len([entry for entry in os.listdir(bundle_root) if not entry.startswith(".")]) == 2  # version + LATEST
+
+
+def test_tampered_file_is_rejected(bundle_root):
+    path = os.path.join(bundle_root, latest_version(bundle_root), "scaler_mean.npy")
+    mean = np.load(path)
+    np.save(path, mean + 1)
+
+    with pytest.raises(ModelBundleError, match="Checksum"):
+        load_bundle(bundle_root)
+
+
+def test_missing_file_is_rejected(bundle_root):
+    os.remove(os.path.join(bundle_root, latest_version(bundle_root), "vocab_district.npy"))
+
+    with pytest.raises(ModelBundleError, match="thiếu file"):
+        load_bundle(bundle_root)
+
+
+def test_manifest_without_file_entry_is_rejected(bundle_root):
+    manifest_path = os.path.join(bundle_root, latest_version(bundle_root), MANIFEST_FILE)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    del manifest["files"]["scaler_scale.npy"]
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    # File không có trong manifest thì không được kiểm checksum, bundle phải bị từ chối
+    with pytest.raises(ModelBundleError, match="thiếu checksum"):
+        load_bundle(bundle_root)
+
+
+def test_manifest_without_encoder_is_rejected(bundle_root):
+    manifest_path = os.path.join(bundle_root, latest_version(bundle_root), MANIFEST_FILE)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["encoders"].remove("district")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    with pytest.raises(ModelBundleError, match="thiếu encoder"):
+        load_bundle(bundle_root)
+
+
+def test_copied_bundle_under_other_version_is_rejected(bundle_root):
+    version = latest_version(bundle_root)
+    other = "0123456789abcdef"
+    shutil.copytree(os.path.join(bundle_root, version), os.path.join(bundle_root, other))
+
+    with pytest.raises(ModelBundleError, match="Manifest ghi version"):
+        load_bundle(bundle_root, other)
+
+
+@pytest.mark.parametrize("version", ["../models", "0123", "ABCDEF0123456789", "0123456789abcdef/.."])
+def test_malformed_version_is_rejected(bundle_root, version):
+    with pytest.raises(ModelBundleError, match="Version bundle không hợp lệ"):
+        load_bundle(bundle_root, version)
+
+
+def test_missing_bundle_is_rejected(bundle_root):
+    with pytest.raises(ModelBundleError, match="manifest"):
+        load_bundle(bundle_root, "fedcba9876543210")
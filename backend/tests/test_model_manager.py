@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from src.model_bundle import MANIFEST_FILE, ModelBundleError, _sha256_file, latest_version
+from src.model_manager import ModelManager
+
+
+@pytest.fixture
+def model_root(tmp_path):
+    """Bản sao thư mục model của phiên test (bundle đã train trong conftest.py)"""
+    root = str(tmp_path / "models")
+    shutil.copytree(os.environ["BDS_MODEL_DIR"], root)
+    return root
+
+
+def _publish_with_wrong_smoke_predictions(root: str, version: str) -> str:
+    """Bản sao của bundle `version` (version khác) có smoke_predictions không khớp model, checksum hợp lệ"""
+    bad = "badbadbadbadbad0"
+    path = os.path.join(root, bad)
+    shutil.copytree(os.path.join(root, version), path)
+    smoke_path = os.path.join(path, "smoke_predictions.npy")
+    np.save(smoke_path, np.load(smoke_path) * 2 + 1)
+
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["version"] = bad
+    manifest["files"]["smoke_predictions.npy"] = _sha256_file(smoke_path)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    with open(os.path.join(root, "LATEST"), "w") as f:
+        f.write(bad)
+    return bad
+
+
+def test_bundle_failing_smoke_set_is_rejected_and_old_model_keeps_serving(model_root):
+    manager = ModelManager(model_root, watch_interval=0)
+    good = manager.load()
+    assert good is not None
+    swaps = []
+    manager.add_listener(swaps.append)
+    expected = good.predict(good.smoke_features)
+
+    bad = _publish_with_wrong_smoke_predictions(model_root, good.version)
+    assert latest_version(model_root) == bad
+    with pytest.raises(ModelBundleError, match="smoke set"):
+        manager.reload()
+
+    assert manager.current() is good
+    np.testing.assert_array_equal(manager.current().predict(good.smoke_features), expected)
+    assert swaps == []
+
+
+def test_reload_swaps_to_valid_bundle_and_notifies(model_root):
+    manager = ModelManager(model_root, watch_interval=0)
+    first = manager.load()
+    swaps = []
+    manager.add_listener(swaps.append)
+
+    # Cùng version đang phục vụ: không load lại
+    assert manager.reload() is first
+    assert swaps == []
+
+    # Bundle hợp lệ dưới version khác
+    other = "0123456789abcdef"
+    shutil.copytree(os.path.join(model_root, first.version), os.path.join(model_root, other))
+    manifest_path = os.path.join(model_root, other, MANIFEST_FILE)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["version"] = other
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    bundle = manager.reload(other)
+    assert bundle.version == other
+    assert manager.current() is bundle
+    assert swaps == [bundle]
@@ -0,0 +1,63 @@
+"""update_grid phải cho kết quả giống hệt build_grid trên dữ liệu mới"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.neighbourhood_grid as neighbourhood_grid
+from benchmarks.synthetic_data import generate_chunk
+from src.neighbourhood_grid import ListingColumns, build_grid, update_grid
+from src.spatial_index import SpatialIndex
+
+CELL_DEG = 0.01
+
+
+def _build(frame, version):
+    return build_grid(frame, SpatialIndex.from_frame(frame), CELL_DEG, version, columns=ListingColumns(frame))
+
+
+def _assert_same(updated, rebuilt):
+    assert updated.shape == rebuilt.shape
+    np.testing.assert_array_equal(updated.bedroom_slots, rebuilt.bedroom_slots)
+    assert set(updated.values) == set(rebuilt.values)
+    for name, expected in rebuilt.values.items():
+        np.testing.assert_allclose(updated.values[name], expected, rtol=1e-12, equal_nan=True, err_msg=name)
+
+
+@pytest.fixture
+def frame():
+    return generate_chunk(3000, seed=7)
+
+
+def test_update_matches_full_build_after_adds_removes_and_edits(frame, monkeypatch):
+    grid = _build(frame, "v1")
+
+    rng = np.random.default_rng(0)
+    changed = frame.drop(index=rng.choice(frame.index, size=60, replace=False))
+    # Dòng mới nằm trong lưới cũ, số phòng ngủ trong dải slot
+    added = generate_chunk(400, seed=8)
+    _, _, inside = grid.cell_of(added['latitude'], added['longitude'])
+    added = added[inside & added['bedrooms'].between(frame['bedrooms'].min(), frame['bedrooms'].max())].head(60)
+    changed = changed.reset_index(drop=True)
+    edited = rng.choice(changed.index, size=40, replace=False)
+    changed.loc[edited, 'area'] *= 1.5
+    changed.loc[edited[:10], 'bedrooms'] = frame['bedrooms'].min()
+    changed = pd.concat([changed, added], ignore_index=True)
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("update_grid không được dựng lại toàn bộ lưới")
+
+    # Cập nhật tăng dần (không rơi vào nhánh dựng lại toàn bộ)
+    with monkeypatch.context() as patch:
+        patch.setattr(neighbourhood_grid, "build_grid", no_rebuild)
+        updated = update_grid(grid, changed, SpatialIndex.from_frame(changed), "v2")
+
+    _assert_same(updated, _build(changed, "v2"))
+    assert updated.dataset_version == "v2"
+
+
+def test_update_without_changes_keeps_values(frame):
+    grid = _build(frame, "v1")
+    updated = update_grid(grid, frame.copy(), SpatialIndex.from_frame(frame), "v1b")
+    _assert_same(updated, grid)
+    # Lưới cũ không bị sửa
+    assert updated.values['count'] is not grid.values['count']
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from crawler.pacing import AdaptivePacer
+
+
+def make_pacer(**kwargs) -> AdaptivePacer:
+    kwargs.setdefault("max_concurrency", 4)
+    kwargs.setdefault("min_interval", 0.1)
+    kwargs.setdefault("start_interval", 2.0)
+    return AdaptivePacer(**kwargs)
+
+
+def run(scenario):
+    """record() dùng thời gian của event loop, nên các kịch bản chạy trong một loop"""
+    return asyncio.run(scenario())
+
+
+def test_success_increases_rate_additively():
+    async def scenario():
+        pacer = make_pacer(rate_step=0.5)
+        pacer.record(0.2)
+        # Tốc độ 0.5 trang/giây tăng thêm rate_step / tốc độ, thêm một trang song song
+        assert pacer.interval == pytest.approx(1 / (0.5 + 0.5 / 0.5))
+        assert pacer.concurrency == pytest.approx(2.0)
+        pacer.record(0.2)
+        assert pacer.interval == pytest.approx(1 / (1.5 + 0.5 / 1.5))
+        assert pacer.concurrency == pytest.approx(2.5)
+
+        intervals = []
+        for _ in range(200):
+            pacer.record(0.2)
+            intervals.append(pacer.interval)
+        assert intervals == sorted(intervals, reverse=True)
+        # Không nhanh hơn min_interval, không vượt max_concurrency
+        assert pacer.interval == pytest.approx(0.1) and pacer.limit == 4
+        assert (pacer.requests, pacer.blocked, pacer.errors) == (202, 0, 0)
+
+    run(scenario)
+
+
+def test_block_cuts_rate_multiplicatively():
+    async def scenario():
+        pacer = make_pacer()
+        for _ in range(6):
+            pacer.record(0.2)
+        concurrency, interval = pacer.concurrency, pacer.interval
+
+        now = asyncio.get_running_loop().time()
+        pacer.record(blocked=True)
+
+        assert pacer.concurrency == pytest.approx(max(1.0, concurrency / 2))
+        assert pacer.interval == pytest.approx(interval * 2)
+        assert pacer.blocked == 1
+        # Lần tải tiếp theo chờ hết khoảng cách mới
+        assert pacer._next_start >= now + pacer.interval
+
+    run(scenario)
+
+
+def test_block_from_min_interval_zero_still_slows_down():
+    async def scenario():
+        pacer = make_pacer(min_interval=0.0, start_interval=0.0)
+        pacer.record(blocked=True)
+        assert pacer.interval == pytest.approx(0.1)
+        assert pacer.concurrency == 1.0
+
+    run(scenario)
+
+
+def test_at_most_one_cut_per_interval():
+    async def scenario():
+        pacer = make_pacer(min_interval=0.01, start_interval=0.01)
+        for _ in range(10):
+            pacer.record(0.01)
+        concurrency = pacer.concurrency
+
+        # Các request đang chạy cùng bị chặn chỉ tính một lần
+        pacer.record(blocked=True)
+        cut = (pacer.concurrency, pacer.interval)
+        pacer.record(blocked=True)
+        pacer.record(error=True)
+        assert (pacer.concurrency, pacer.interval) == cut
+        assert pacer.concurrency == pytest.approx(concurrency / 2)
+        assert (pacer.blocked, pacer.errors) == (2, 1)
+
+        await asyncio.sleep(pacer.interval + 0.01)
+        pacer.record(blocked=True)
+        assert pacer.interval == pytest.approx(cut[1] * 2)
+        assert pacer.concurrency == pytest.approx(max(1.0, cut[0] / 2))
+
+    run(scenario)
+
+
+def test_error_cuts_rate_by_a_quarter():
+    async def scenario():
+        pacer = make_pacer(start_interval=1.0)
+        pacer.record(error=True)
+        assert pacer.interval == pytest.approx(1.0 / 0.75)
+        assert pacer.errors == 1 and pacer.blocked == 0
+
+    run(scenario)
+
+
+def test_slow_responses_decrease_rate():
+    async def scenario():
+        pacer = make_pacer(start_interval=1.0, slow_factor=3.0)
+        for _ in range(3):
+            pacer.record(0.2, source="http")
+        interval = pacer.interval
+        concurrency = pacer.concurrency
+
+        # EWMA 0.7 * 0.2 + 0.3 * 2.0 = 0.74 > 3 * 0.2
+        pacer.record(2.0, source="http")
+
+        assert pacer.interval == pytest.approx(interval / 0.75)
+        assert pacer.concurrency == pytest.approx(max(1.0, concurrency * 0.75))
+        assert pacer.blocked == pacer.errors == 0
+
+    run(scenario)
+
+
+def test_latency_is_tracked_per_backend():
+    async def scenario():
+        pacer = make_pacer(start_interval=1.0)
+        for _ in range(3):
+            pacer.record(0.2, source="http")
+        interval = pacer.interval
+
+        # Trình duyệt chậm hơn HTTP nhiều nhưng không phải vì site quá tải
+        pacer.record(3.0, source="browser")
+        pacer.record(3.2, source="browser")
+
+        assert pacer.interval < interval
+
+    run(scenario)
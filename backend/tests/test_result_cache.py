@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import src.result_cache as result_cache_module
+from src.result_cache import ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Đồng hồ giả cho TTL: tăng bằng clock.now += giây"""
+    fake = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(result_cache_module, "time", SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Hết thời gian chờ"
+        time.sleep(0.001)
+
+
+def test_concurrent_requests_for_same_key_compute_once():
+    cache = ResultCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.stats()["coalesced"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    assert cache.get("key") == "value"
+
+
+def test_async_followers_await_leader_future_on_event_loop():
+    cache = ResultCache()
+
+    async def scenario():
+        future, leader = cache.claim("key")
+        followers = [cache.claim("key") for _ in range(3)]
+        assert leader
+        assert [is_leader for _, is_leader in followers] == [False] * 3
+        waiting = [asyncio.wrap_future(follower) for follower, _ in followers]
+
+        await asyncio.sleep(0)
+        assert not any(task.done() for task in waiting)
+        cache.resolve("key", future, "value")
+        return await asyncio.gather(*waiting)
+
+    assert asyncio.run(scenario()) == ["value"] * 3
+    hit, leader = cache.claim("key")
+    assert not leader and hit.result() == "value"
+    assert cache.stats()["coalesced"] == 3
+
+
+def test_leader_error_reaches_followers_and_is_not_cached():
+    cache = ResultCache()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError("lỗi")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_compute("key", compute)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.stats()["coalesced"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert cache.get("key") is None
+    assert cache.get_or_compute("key", lambda: "retry") == "retry"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(ttl_seconds=10)
+    assert cache.get_or_compute("key", lambda: 1) == 1
+
+    clock.now += 9.9
+    assert cache.get("key") == 1
+
+    clock.now += 0.2
+    assert cache.get("key") is None
+    assert cache.get_or_compute("key", lambda: 2) == 2
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["misses"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    assert cache.get("a") == 1
+    cache.get_or_compute("c", lambda: 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_clears_entries():
+    cache = ResultCache()
+    cache.get_or_compute("key", lambda: "old")
+    cache.invalidate()
+
+    assert cache.get("key") is None
+    assert cache.get_or_compute("key", lambda: "new") == "new"
+
+
+def test_result_computed_across_invalidate_is_not_stored():
+    cache = ResultCache()
+
+    def compute():
+        # Model/dữ liệu được load lại trong lúc đang tính
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get_or_compute("key", compute) == "stale"
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,119 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from crawler.sinks import FIELDNAMES, ColumnarSink, CsvSink, JsonlSink, open_sink, read_parts
+
+EXTENSIONS = {"csv": ".csv", "jsonl": ".jsonl", "columnar": ".cols"}
+
+
+def make_rows(page_num: int, count: int = 3):
+    return [
+        {
+            "title": f"Bán nhà {page_num}-{i}, sổ hồng", "price": f"{i + 1},5 tỷ", "price_unit": "",
+            "area": f"{40 + i} m²", "location": "Phường Thạch Thang, Quận Hải Châu", "description": "",
+            "url": f"https://www.nhatot.com/{page_num * 100 + i}.htm", "image_url": "", "posted_date": "",
+            "property_type": "Nhà ở", "direction": "Nam", "bedrooms": str(i + 1), "bathrooms": "1",
+            "page_number": page_num, "item_index": i + 1, "scraped_at": "2024-05-01T10:00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def read_output(path: str, fmt: str) -> pd.DataFrame:
+    if fmt == "csv":
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            return pd.DataFrame([json.loads(line) for line in f], columns=FIELDNAMES)
+    return read_parts(path)
+
+
+def expected_frame(rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=FIELDNAMES)
+
+
+def assert_same_rows(frame: pd.DataFrame, rows):
+    expected = expected_frame(rows)
+    assert list(frame.columns) == FIELDNAMES
+    assert len(frame) == len(expected)
+    for name in FIELDNAMES:
+        assert frame[name].astype(str).tolist() == expected[name].astype(str).tolist(), name
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "columnar"])
+def test_round_trip_through_partial_file(tmp_path, fmt):
+    path = str(tmp_path / f"out{EXTENSIONS[fmt]}")
+    sink = open_sink(path)
+    assert type(sink) is {"csv": CsvSink, "jsonl": JsonlSink, "columnar": ColumnarSink}[fmt]
+
+    rows = make_rows(1) + make_rows(2)
+    sink.write(rows[:3])
+    sink.write([])
+    sink.write(rows[3:])
+    # Người đọc chỉ thấy kết quả sau finalize
+    assert os.path.exists(sink.partial_path) and not os.path.exists(path)
+
+    assert sink.finalize() == path
+    assert sink.closed and sink.rows_written == len(rows)
+    assert not os.path.exists(sink.partial_path)
+    assert_same_rows(read_output(path, fmt), rows)
+
+
+def test_columnar_sink_writes_rows_in_parts(tmp_path):
+    path = str(tmp_path / "out.cols")
+    sink = ColumnarSink(path, part_rows=4)
+    rows = [row for page_num in range(1, 5) for row in make_rows(page_num)]
+    for page_num in range(4):
+        sink.write(rows[page_num * 3:(page_num + 1) * 3])
+    sink.finalize()
+
+    parts = sorted(entry for entry in os.listdir(path) if entry.startswith("part-"))
+    # Mỗi phần được ghi khi đã gom đủ part_rows tin (2 trang x 3 tin)
+    assert parts == ["part-00001", "part-00002"]
+    frame = read_parts(path)
+    assert pd.api.types.is_integer_dtype(frame["page_number"])
+    assert_same_rows(frame, rows)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "columnar"])
+def test_abort_removes_partial_output(tmp_path, fmt):
+    path = str(tmp_path / f"out{EXTENSIONS[fmt]}")
+    sink = open_sink(path)
+    sink.write(make_rows(1))
+    sink.sync()
+    sink.abort()
+
+    assert sink.closed
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "columnar"])
+def test_finalize_replaces_existing_output(tmp_path, fmt):
+    path = str(tmp_path / f"out{EXTENSIONS[fmt]}")
+    first = open_sink(path)
+    first.write(make_rows(1, count=5))
+    first.finalize()
+
+    second = open_sink(path)
+    second.write(make_rows(2))
+    assert second.finalize() == path
+
+    assert_same_rows(read_output(path, fmt), make_rows(2))
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(path)]
+
+
+def test_columnar_sink_ignores_stale_partial_directory(tmp_path):
+    path = str(tmp_path / "out.cols")
+    stale = ColumnarSink(path)
+    stale.write(make_rows(1))
+    stale.sync()
+    # Process bị kill: thư mục .partial còn lại, lần chạy sau ghi lại từ đầu
+
+    sink = ColumnarSink(path)
+    sink.write(make_rows(2))
+    sink.finalize()
+
+    assert_same_rows(read_parts(path), make_rows(2))
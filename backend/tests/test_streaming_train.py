@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.synthetic_data import generate_chunk
+from src.streaming_train import fit_statistics
+
+
+def test_fit_statistics_rejects_dataset_without_rows(tmp_path):
+    path = tmp_path / "empty.csv"
+    generate_chunk(0, seed=1).to_csv(path, index=False)
+
+    with pytest.raises(ValueError, match="Không có dòng dữ liệu hợp lệ"):
+        fit_statistics(str(path), chunk_rows=1000)
+
+
+def test_fit_statistics_counts_rows(tmp_path):
+    path = tmp_path / "data.csv"
+    generate_chunk(500, seed=1).to_csv(path, index=False)
+
+    pipeline, scaler, rows = fit_statistics(str(path), chunk_rows=128)
+    assert rows == 500
+    assert len(scaler.mean_) == len(scaler.scale_)
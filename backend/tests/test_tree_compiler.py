@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+import xgboost as xgb
+
+import src.tree_compiler as tree_compiler
+from src.tree_compiler import CompiledForest
+
+
+@pytest.fixture(scope="module")
+def booster_and_features():
+    """Booster nhỏ train trên dữ liệu có giá trị thiếu, cùng ma trận feature để so sánh"""
+    rng = np.random.default_rng(0)
+    n_rows, n_features = 2000, 6
+    features = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+    target = features[:, 0] * 3 + np.sin(features[:, 1]) + features[:, 2] * features[:, 3]
+    features[rng.random(features.shape) < 0.15] = np.nan
+
+    model = xgb.XGBRegressor(n_estimators=40, max_depth=5, learning_rate=0.3, random_state=0)
+    model.fit(features, target)
+
+    test_features = rng.normal(size=(700, n_features)).astype(np.float32)
+    test_features[rng.random(test_features.shape) < 0.2] = np.nan
+    test_features[0] = np.nan
+    return model.get_booster(), test_features
+
+
+def test_single_rows_match_booster(booster_and_features):
+    booster, features = booster_and_features
+    forest = CompiledForest.from_booster(booster)
+
+    for row in features[:50]:
+        expected = booster.predict(xgb.DMatrix(row[None, :]))
+        assert np.allclose(forest.predict(row), expected, rtol=1e-5, atol=1e-5)
+
+
+def test_chunked_batch_matches_booster(booster_and_features, monkeypatch):
+    booster, features = booster_and_features
+    forest = CompiledForest.from_booster(booster)
+    # Chia 700 dòng thành nhiều khối, khối cuối không đầy
+    monkeypatch.setattr(tree_compiler, "ROW_CHUNK", 64)
+
+    expected = booster.predict(xgb.DMatrix(features))
+    assert np.allclose(forest.predict(features), expected, rtol=1e-5, atol=1e-5)